@@ -1,3 +1,8 @@
 """Brecha AI Service - Classification API for public infrastructure projects."""
 
+import time
+
 __version__ = "1.0.0"
+
+# Reference point of the startup-time report (see app.main)
+IMPORT_STARTED_AT = time.perf_counter()
@@ -0,0 +1,103 @@
+"""Request dependencies resolving the services built by the application lifespan."""
+
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.profiling import ProfileStore, is_authorized
+from app.services.admission import LANES, AdmissionController
+from app.services.classifier_service import ClassifierService
+from app.services.jobs import JobManager
+
+
+def get_classifier_service(request: Request) -> ClassifierService:
+    """The classifier service of the running application."""
+    return request.app.state.classifier_service
+
+
+def get_job_manager(request: Request) -> JobManager:
+    """The classification job manager of the running application."""
+    return request.app.state.job_manager
+
+
+def get_admission_controller(request: Request) -> Optional[AdmissionController]:
+    """The admission controller of the running application, if enabled."""
+    return request.app.state.admission
+
+
+def get_request_lane(
+    x_priority: Optional[str] = Header(None, description='"interactive" or "bulk"'),
+    x_api_key: Optional[str] = Header(None),
+) -> Optional[str]:
+    """
+    Admission lane asked for by the client.
+
+    Keys listed in ADMISSION_BULK_API_KEYS always go to the bulk lane,
+    whatever their X-Priority header says.
+
+    Args:
+        x_priority: Lane named by the client
+        x_api_key: Client API key
+
+    Returns:
+        The lane, or None to use the endpoint's default
+
+    Raises:
+        HTTPException: If X-Priority names an unknown lane
+    """
+    bulk_keys = {key.strip() for key in settings.ADMISSION_BULK_API_KEYS.split(",") if key.strip()}
+    if x_api_key is not None and x_api_key in bulk_keys:
+        return "bulk"
+    if x_priority is None:
+        return None
+    if x_priority.lower() not in LANES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"X-Priority must be one of: {', '.join(LANES)}",
+        )
+    return x_priority.lower()
+
+
+def get_request_deadline(
+    x_request_timeout: Optional[float] = Header(
+        None, description="Seconds the client is willing to wait, retries included"
+    ),
+) -> Optional[float]:
+    """
+    Time budget of a classification request.
+
+    Args:
+        x_request_timeout: Budget asked by the client, capped at
+            REQUEST_DEADLINE_MAX_SECONDS
+
+    Returns:
+        Seconds, or None if requests have no deadline
+
+    Raises:
+        HTTPException: If the header is not a positive number
+    """
+    if x_request_timeout is None:
+        return settings.REQUEST_DEADLINE_SECONDS or None
+    if x_request_timeout <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="X-Request-Timeout must be a positive number of seconds",
+        )
+    return min(x_request_timeout, settings.REQUEST_DEADLINE_MAX_SECONDS)
+
+
+def get_profile_store(request: Request) -> ProfileStore:
+    """The store of request profiles of the running application."""
+    return request.app.state.profiles
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """
+    Reject requests without the profiling token.
+
+    Raises:
+        HTTPException: If X-Profile-Token does not match PROFILING_TOKEN
+    """
+    if not is_authorized(x_profile_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling token")
@@ -0,0 +1,22 @@
+"""Response classes."""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    JSON response serialized directly from a validated Pydantic model.
+
+    The model is rendered by pydantic-core in one pass, skipping FastAPI's
+    `jsonable_encoder` round trip. Unset optional fields are left out, so
+    payloads keep the same shape as the service dictionaries.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Serialize the content to JSON bytes."""
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(exclude_none=True).encode("utf-8")
+        return super().render(content)
@@ -1,19 +1,62 @@
 """Classification router."""
 
+import json
 import logging
-from typing import Any, Dict
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Optional
 
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from app.models.schemas import ClassificationRequest, ClassificationResponse
+from app.api.dependencies import (
+    get_admission_controller,
+    get_classifier_service,
+    get_request_deadline,
+    get_request_lane,
+)
+from app.api.responses import ModelJSONResponse
+from app.core.config import settings
+from app.models.schemas import (
+    BatchClassificationRequest,
+    BatchClassificationResponse,
+    ClassificationRequest,
+    ClassificationResponse,
+)
+from app.services.admission import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    AdmissionController,
+    AdmissionRejected,
+)
 from app.services.classifier_service import ClassifierService
+from app.services.resilience import deadline
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize classifier service
-classifier_service = ClassifierService()
+
+def _admitted(admission: Optional[AdmissionController], lane: str) -> AsyncContextManager:
+    """Slot of the admission controller for the request, if it is enabled."""
+    return admission.admit(lane) if admission is not None else nullcontext()
+
+
+def _overloaded(error: AdmissionRejected) -> HTTPException:
+    """
+    Response for a request rejected by admission control.
+
+    Bulk clients get 429 so they slow down; interactive requests get 503,
+    since the service itself is the bottleneck.
+    """
+    return HTTPException(
+        status_code=(
+            status.HTTP_429_TOO_MANY_REQUESTS
+            if error.lane == LANE_BULK
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        detail="The service is overloaded. Please retry later.",
+        headers={"Retry-After": str(error.retry_after)},
+    )
 
 
 @router.post(
@@ -23,30 +66,54 @@ classifier_service = ClassifierService()
     summary="Classify project title",
     description="Classifies a public infrastructure project title into one or more service categories.",
 )
-async def classify_project(request: ClassificationRequest) -> Dict[str, Any]:
+async def classify_project(
+    request: ClassificationRequest,
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+    request_deadline: Optional[float] = Depends(get_request_deadline),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    lane: Optional[str] = Depends(get_request_lane),
+) -> Dict[str, Any]:
     """
     Classify a project title using Gemini AI.
 
     Args:
         request: Classification request with project title
+        classifier_service: Classifier service of the application
+        request_deadline: Seconds the classification may take, retries included
+        admission: Admission controller, None if disabled
+        lane: Admission lane (interactive unless the client asks otherwise)
 
     Returns:
         Classification result with labels, confidence scores, and justifications
 
     Raises:
-        HTTPException: If classification fails
+        HTTPException: If classification fails or the service is overloaded
     """
     try:
-        logger.info(f"Received classification request for title: {request.title[:50]}...")
+        logger.info("Received classification request for title: %.50s...", request.title)
 
-        result = await classifier_service.classify(request.title)
+        with deadline(request_deadline):
+            async with _admitted(admission, lane or LANE_INTERACTIVE):
+                result = ClassificationResponse.model_validate(
+                    await classifier_service.classify(request.title, request.detail)
+                )
 
-        logger.info(f"Classification completed with {len(result.get('labels', []))} labels")
-        return JSONResponse(
+        logger.info("Classification completed with %d labels", len(result.labels))
+        return ModelJSONResponse(
             status_code=status.HTTP_200_OK,
             content=result,
         )
 
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+
+    except ValidationError as e:
+        logger.error(f"Invalid classification result: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during classification. Please try again later.",
+        )
+
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
         raise HTTPException(
@@ -62,27 +129,294 @@ async def classify_project(request: ClassificationRequest) -> Dict[str, Any]:
         )
 
 
-@router.get(
-    "/categories",
-    summary="List available categories",
-    description="Returns all available classification categories with their definitions.",
+def _sse(event: str, data: str) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _classification_events(
+    classifier_service: ClassifierService,
+    request: ClassificationRequest,
+    request_deadline: Optional[float],
+    admission: Optional[AdmissionController],
+    lane: str,
+) -> AsyncIterator[str]:
+    """
+    Events of a streamed classification, as Server-Sent Events.
+
+    The first value is yielded (and not sent) once the request is admitted,
+    so a rejection can still become an HTTP error before the stream starts.
+    """
+    async with _admitted(admission, lane):
+        yield ""
+        try:
+            with deadline(request_deadline):
+                async for event, data in classifier_service.classify_stream(
+                    request.title, request.detail
+                ):
+                    if event == "result":
+                        result = ClassificationResponse.model_validate(data)
+                        logger.info(
+                            "Streamed classification completed with %d labels", len(result.labels)
+                        )
+                        yield _sse(event, result.model_dump_json(exclude_none=True))
+                    else:
+                        yield _sse(event, json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"Streamed classification error: {str(e)}", exc_info=True)
+            detail = "An error occurred during classification. Please try again later."
+            yield _sse("error", json.dumps({"detail": detail}))
+
+
+@router.post(
+    "/classify/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Classify project title, streaming the labels",
+    description=(
+        "Classifies a project title, sending each label as a Server-Sent Event as soon as the "
+        "model has written it."
+    ),
+    response_class=StreamingResponse,
 )
-async def list_categories() -> Dict[str, Any]:
+async def classify_project_stream(
+    request: ClassificationRequest,
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+    request_deadline: Optional[float] = Depends(get_request_deadline),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    lane: Optional[str] = Depends(get_request_lane),
+) -> StreamingResponse:
     """
-    List all available classification categories.
+    Classify a project title, streaming the labels as Server-Sent Events.
+
+    Events:
+        - `label`: `{"index", "label", "id", "confianza"}`, as soon as the
+          model has written them
+        - `justificacion`: `{"index", "text"}`, each new piece of a label's
+          justification
+        - `result`: the final classification, same body as `POST /classify`.
+          Streamed labels are a preview; this is the result to keep.
+        - `error`: `{"detail"}` if the classification failed mid-stream
+
+    Args:
+        request: Classification request with project title
+        classifier_service: Classifier service of the application
+        request_deadline: Seconds the classification may take, retries included
+        admission: Admission controller, None if disabled
+        lane: Admission lane (interactive unless the client asks otherwise)
+
+    Returns:
+        An event stream
+
+    Raises:
+        HTTPException: If the service is overloaded
+    """
+    logger.info("Received streamed classification request for title: %.50s...", request.title)
+    events = _classification_events(
+        classifier_service, request, request_deadline, admission, lane or LANE_INTERACTIVE
+    )
+    try:
+        await anext(events)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Proxies must pass events on as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/classify/batch",
+    response_model=BatchClassificationResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Classify several project titles",
+    description="Classifies many project titles, packing them into shared prompts.",
+)
+async def classify_projects_batch(
+    request: BatchClassificationRequest,
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+    request_deadline: Optional[float] = Depends(get_request_deadline),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    lane: Optional[str] = Depends(get_request_lane),
+) -> Dict[str, Any]:
+    """
+    Classify several project titles using Gemini AI.
+
+    Args:
+        request: Batch classification request with project titles
+        classifier_service: Classifier service of the application
+        request_deadline: Seconds the classification may take, retries included
+        admission: Admission controller, None if disabled
+        lane: Admission lane (bulk unless the client asks otherwise)
 
     Returns:
-        Dictionary of category names and definitions
+        One classification result per title, in request order
+
+    Raises:
+        HTTPException: If classification fails or the service is overloaded
     """
     try:
-        categories = classifier_service.get_categories()
-        return {
-            "categories": categories,
-            "total": len(categories),
-        }
+        logger.info("Received batch classification request for %d titles", len(request.titles))
+
+        with deadline(request_deadline):
+            async with _admitted(admission, lane or LANE_BULK):
+                results = await classifier_service.classify_many(request.titles, request.detail)
+
+        failed = sum(1 for result in results if result.get("error"))
+        logger.info("Batch classification completed with %d failed titles", failed)
+        response = BatchClassificationResponse.model_validate(
+            {
+                "results": [
+                    {"title": title, **result} for title, result in zip(request.titles, results)
+                ],
+                "total": len(results),
+            }
+        )
+        return ModelJSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=response,
+        )
+
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+
+    except ValidationError as e:
+        logger.error(f"Invalid batch classification result: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during classification. Please try again later.",
+        )
+
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
     except Exception as e:
-        logger.error(f"Error listing categories: {str(e)}", exc_info=True)
+        logger.error(f"Batch classification error: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An error occurred while retrieving categories.",
+            detail="An error occurred during classification. Please try again later.",
         )
+
+
+@router.get(
+    "/categories",
+    summary="List available categories",
+    description="Returns all available classification categories with their definitions.",
+)
+async def list_categories(
+    if_none_match: Optional[str] = Header(None),
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+) -> Response:
+    """
+    List all available classification categories.
+
+    The body is serialized once per categories version, and the version is
+    the ETag, so clients can revalidate with If-None-Match.
+
+    Args:
+        if_none_match: ETag of the copy the client already has
+        classifier_service: Classifier service of the application
+
+    Returns:
+        Dictionary of category names and definitions, with their version
+    """
+    categories = classifier_service.categories.current
+    etag = f'"{categories.version}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(
+        content=categories.payload,
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
+
+
+@router.get(
+    "/cache/stats",
+    summary="Result cache statistics",
+    description="Returns size and hit/miss/eviction counters of the classification cache.",
+)
+async def cache_stats(
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+) -> Dict[str, Any]:
+    """
+    Get classification cache statistics.
+
+    Returns:
+        Cache counters, or a disabled marker if the cache is off
+    """
+    if classifier_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **classifier_service.cache.stats()}
+
+
+@router.get(
+    "/admission/stats",
+    summary="Admission control statistics",
+    description="Returns requests in progress, queue depth, expected wait and rejections per lane.",
+)
+async def admission_stats(
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+) -> Dict[str, Any]:
+    """
+    Get admission control statistics.
+
+    Returns:
+        Current load per lane, or a disabled marker if admission control is off
+    """
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
+
+
+@router.get(
+    "/credentials/stats",
+    summary="Credential pool statistics",
+    description="Returns calls, failures, tokens and health of every Gemini API key.",
+)
+async def credential_stats(
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+) -> Dict[str, Any]:
+    """
+    Get usage and health of the Gemini API keys.
+
+    Keys are identified by their position in GEMINI_API_KEYS, never by value.
+
+    Returns:
+        One entry per key of the credential pool
+    """
+    return {"members": classifier_service.pool.stats()}
+
+
+@router.get(
+    "/prompt/fingerprint",
+    summary="Prompt prefix fingerprint",
+    description="Returns the hash of the static prompt prefix shared by every request.",
+)
+async def prompt_fingerprint(
+    classifier_service: ClassifierService = Depends(get_classifier_service),
+) -> Dict[str, Any]:
+    """
+    Get the fingerprint of the precompiled prompt prefix.
+
+    The hash only changes when the instructions or categories change, so
+    comparing it across instances and deploys shows whether provider-side
+    prompt caching can hit.
+
+    Returns:
+        Prefix hash and size
+    """
+    categories = classifier_service.categories.current
+    template = categories.prompt_template
+    return {
+        "sha256": template.fingerprint,
+        "prefix_chars": len(template.prefix),
+        "categories_version": categories.version,
+        "context_cache_enabled": settings.GEMINI_CONTEXT_CACHE_ENABLED,
+    }
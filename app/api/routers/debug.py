@@ -0,0 +1,84 @@
+"""Profiling endpoints, only mounted when PROFILING_ENABLED is set."""
+
+import logging
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies import get_profile_store, require_profiling_token
+from app.core.config import settings
+from app.core.profiling import Profile, ProfileStore, profile_for
+
+logger = logging.getLogger(__name__)
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+
+def _download(profile: Profile, name: str) -> PlainTextResponse:
+    """Profile as a downloadable folded-stacks file."""
+    return PlainTextResponse(
+        profile.folded(),
+        headers={"Content-Disposition": f'attachment; filename="{name}.folded"'},
+    )
+
+
+@router.post(
+    "/profile",
+    summary="Profile the service for a time window",
+    description="Samples the event loop for the given seconds and returns the folded stacks.",
+)
+async def profile_window(
+    seconds: float = Query(10.0, gt=0, description="Length of the window"),
+    store: ProfileStore = Depends(get_profile_store),
+) -> PlainTextResponse:
+    """
+    Profile everything the event loop runs for a while.
+
+    Args:
+        seconds: Length of the window, capped at PROFILING_MAX_SECONDS
+        store: Profile store, whose lock allows one session at a time
+
+    Returns:
+        The profile, as a file download
+
+    Raises:
+        HTTPException: If another profiling session is running
+    """
+    if store.lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profiling session is already running",
+        )
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    logger.info("Profiling the event loop for %.1fs", seconds)
+    async with store.lock:
+        profile = await profile_for(seconds)
+    return _download(profile, f"profile-{int(time.time())}")
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    summary="Download a request profile",
+    description="Returns the profile of a request sent with X-Profile: 1.",
+)
+async def get_request_profile(
+    profile_id: str,
+    store: ProfileStore = Depends(get_profile_store),
+) -> PlainTextResponse:
+    """
+    Download the profile of an individual request.
+
+    Args:
+        profile_id: Id from the request's X-Profile-URL header
+        store: Profile store
+
+    Returns:
+        The profile, as a file download
+
+    Raises:
+        HTTPException: If the profile does not exist (anymore)
+    """
+    profile = store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return _download(profile, f"profile-{profile_id}")
@@ -0,0 +1,220 @@
+"""Asynchronous classification jobs router."""
+
+import io
+import itertools
+import logging
+from typing import Any, Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+
+from app.api.dependencies import get_job_manager
+from app.core.config import settings
+from app.models.schemas import JobRequest, JobResultsResponse, JobStatusResponse
+from app.services.jobs import JobManager
+from app.services.title_sources import SUPPORTED_FORMATS, iter_titles
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+async def _submit(job_manager: JobManager, titles: List[Tuple[int, str]]) -> JSONResponse:
+    """Queue a job and answer with its id."""
+    if len(titles) > settings.JOBS_MAX_TITLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A job cannot have more than {settings.JOBS_MAX_TITLES} titles",
+        )
+
+    try:
+        job = await job_manager.submit(titles)
+    except Exception as e:
+        logger.error(f"Error creating job: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while creating the job. Please try again later.",
+        )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job)
+
+
+async def _read_upload(request: Request) -> bytes:
+    """
+    Read an uploaded file, stopping as soon as it exceeds JOBS_MAX_UPLOAD_MB.
+
+    Raises:
+        HTTPException: If the file is too large
+    """
+    limit = int(settings.JOBS_MAX_UPLOAD_MB * 1024 * 1024)
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"The file cannot be larger than {settings.JOBS_MAX_UPLOAD_MB:g} MB",
+    )
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+@router.post(
+    "/jobs",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Create a classification job",
+    description="Queues a list of project titles for background classification.",
+)
+async def create_job(
+    request: JobRequest,
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JSONResponse:
+    """
+    Create an asynchronous classification job.
+
+    Args:
+        request: Job request with project titles
+        job_manager: Job manager of the application
+
+    Returns:
+        Job id and initial progress
+
+    Raises:
+        HTTPException: If the job is too large or cannot be created
+    """
+    logger.info(f"Received job request for {len(request.titles)} titles")
+    return await _submit(job_manager, list(enumerate(request.titles, start=1)))
+
+
+@router.post(
+    "/jobs/upload",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Create a classification job from a file",
+    description=(
+        "Queues the titles of a CSV, JSONL or plain-text file (sent as the raw request body) "
+        "for background classification."
+    ),
+)
+async def upload_job(
+    request: Request,
+    format: str = Query("csv", description="File format: csv, jsonl or txt"),
+    column: str = Query("title", description="CSV column or JSON key holding the title"),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JSONResponse:
+    """
+    Create an asynchronous classification job from an uploaded file.
+
+    Args:
+        request: Request whose body is the file content
+        format: File format
+        column: CSV column or JSON key holding the title
+        job_manager: Job manager of the application
+
+    Returns:
+        Job id and initial progress
+
+    Raises:
+        HTTPException: If the file is invalid, too large or the job cannot be created
+    """
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}'; expected one of {', '.join(SUPPORTED_FORMATS)}",
+        )
+
+    body = await _read_upload(request)
+    try:
+        content = body.decode("utf-8-sig")
+        rows = iter_titles(io.StringIO(content, newline=""), format, column)
+        # One title past the limit is enough for _submit to reject the job
+        titles = list(itertools.islice(rows, settings.JOBS_MAX_TITLES + 1))
+    except (UnicodeDecodeError, ValueError) as e:
+        logger.error(f"Invalid job file: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    empty_rows = [row for row, title in titles if not title]
+    if not titles or empty_rows:
+        detail = f"Empty title on row {empty_rows[0]}" if empty_rows else "The file has no titles"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    logger.info(f"Received job file with {len(titles)} titles")
+    return await _submit(job_manager, titles)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Get job progress",
+    description="Returns the status and progress counters of a classification job.",
+)
+async def get_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager),
+) -> Dict[str, Any]:
+    """
+    Get the progress of a classification job.
+
+    Args:
+        job_id: Job identifier
+        job_manager: Job manager of the application
+
+    Returns:
+        Job status and progress counters
+
+    Raises:
+        HTTPException: If the job does not exist
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}/results",
+    response_model=JobResultsResponse,
+    summary="Get job results",
+    description="Returns a page of the results finished so far, in row order.",
+)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Number of finished results to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> JSONResponse:
+    """
+    Get the finished results of a classification job.
+
+    Results are available while the job is still running.
+
+    Args:
+        job_id: Job identifier
+        offset: Number of finished results to skip
+        limit: Maximum number of results to return
+        job_manager: Job manager of the application
+
+    Returns:
+        Page of results
+
+    Raises:
+        HTTPException: If the job does not exist
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    results = await job_manager.results(job_id, offset, limit)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "job_id": job_id,
+            "status": job["status"],
+            "offset": offset,
+            "limit": limit,
+            "results": results,
+        },
+    )
@@ -0,0 +1,355 @@
+"""
+Offline bulk classification of a file of project titles.
+
+Streams a CSV, JSONL or plain-text file through ClassifierService with bounded
+concurrency and appends one result per input row to a JSONL or CSV file. The
+output file doubles as the checkpoint: running the same command again skips
+rows that already have a successful result, so an interrupted run resumes
+where it stopped.
+
+Usage:
+    python -m app.bulk proyectos.csv -o resultados.jsonl --column titulo --concurrency 16
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, TextIO, Tuple
+
+from app.services.text_utils import normalize_title
+from app.services.title_sources import SUPPORTED_FORMATS, count_titles, iter_titles_from_file
+
+logger = logging.getLogger(__name__)
+
+_CSV_COLUMNS = ["row", "title", "ids", "labels", "confianzas", "source", "error"]
+# Results of recently finished titles kept to answer repeats of them
+_FINISHED_TITLES = 10_000
+_READ_BLOCK = 64 * 1024
+
+
+class BulkStats:
+    """Progress counters of a bulk run."""
+
+    def __init__(self, total: Optional[int] = None):
+        """
+        Initialize the counters.
+
+        Args:
+            total: Number of input rows, if known
+        """
+        self.total = total
+        self.skipped = 0
+        self.processed = 0
+        self.errors = 0
+        self.upstream_titles = 0
+        self.started_at = time.monotonic()
+
+    def rate(self) -> float:
+        """Rows processed per second since the start of the run."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds until all rows are processed, if known."""
+        rate = self.rate()
+        if self.total is None or rate <= 0:
+            return None
+        return max(self.total - self.skipped - self.processed, 0) / rate
+
+    def summary(self) -> str:
+        """One-line progress summary."""
+        done = self.skipped + self.processed
+        total = f"/{self.total}" if self.total is not None else ""
+        eta = self.eta_seconds()
+        eta_text = f", ETA {eta:.0f}s" if eta is not None else ""
+        return (
+            f"{done}{total} rows ({self.skipped} resumed), {self.rate():.1f} titles/s, "
+            f"{self.errors} errors, {self.upstream_titles} unique titles classified{eta_text}"
+        )
+
+
+def _drop_incomplete_record(path: str) -> None:
+    """
+    Cut a last record left half-written by a crash off the output file.
+
+    Every record ends with a line break, so anything after the last one is
+    incomplete. Cutting it also keeps the next record from being appended
+    to it.
+    """
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(position - _READ_BLOCK, 0)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+            logger.warning(f"Dropped an incomplete last record ({end - position} bytes) of {path}")
+
+
+def _read_done_rows(path: str, output_format: str) -> Set[int]:
+    """
+    Collect rows that already have a successful result in the output file.
+
+    The last record of a row wins, so rows that failed and were retried later
+    count as done. An incomplete last record is removed from the file first.
+    """
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+
+    _drop_incomplete_record(path)
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        records = (
+            csv.DictReader(f)
+            if output_format == "csv"
+            else (json.loads(line) for line in f if line.strip())
+        )
+        for record in records:
+            row = int(record["row"])
+            if record.get("error"):
+                done.discard(row)
+            else:
+                done.add(row)
+    return done
+
+
+class _ResultWriter:
+    """Appends result records to the output file, flushing each one."""
+
+    def __init__(self, path: str, output_format: str):
+        self._format = output_format
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file: TextIO = open(path, "a", encoding="utf-8", newline="")
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=_CSV_COLUMNS)
+            if is_new:
+                self._csv.writeheader()
+
+    def write(self, row: int, title: str, result: Dict[str, Any]) -> None:
+        """Write the result of one input row."""
+        if self._csv is not None:
+            labels = result.get("labels", [])
+            self._csv.writerow(
+                {
+                    "row": row,
+                    "title": title,
+                    "ids": ";".join(str(label.get("id")) for label in labels),
+                    "labels": ";".join(str(label.get("label")) for label in labels),
+                    "confianzas": ";".join(str(label.get("confianza")) for label in labels),
+                    "source": result.get("source") or "",
+                    "error": result.get("error") or "",
+                }
+            )
+        else:
+            self._file.write(
+                json.dumps({"row": row, "title": title, **result}, ensure_ascii=False) + "\n"
+            )
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the output file."""
+        self._file.close()
+
+
+async def run_bulk(
+    service: Any,
+    input_path: str,
+    output_path: str,
+    *,
+    column: str = "title",
+    input_format: Optional[str] = None,
+    output_format: str = "jsonl",
+    concurrency: int = 8,
+    batch_size: int = 1,
+    detail: str = "full",
+    progress_interval: float = 10.0,
+    count_rows: bool = True,
+) -> BulkStats:
+    """
+    Classify every title of a file and write the results incrementally.
+
+    Args:
+        service: ClassifierService used to classify titles
+        input_path: CSV, JSONL or plain-text file of titles
+        output_path: JSONL or CSV file of results (also the checkpoint)
+        column: CSV column or JSON key holding the title
+        input_format: Input format (detected from the extension if omitted)
+        output_format: "jsonl" or "csv"
+        concurrency: Number of titles (or batches) classified at the same time
+        batch_size: Titles per `classify_many` call (1 uses `classify`)
+        detail: "full" or "compact" (ids and confidences only, much faster)
+        progress_interval: Seconds between progress reports
+        count_rows: Count input rows first to report an ETA
+
+    Returns:
+        Final counters of the run
+    """
+    total = count_titles(input_path, column, input_format) if count_rows else None
+    stats = BulkStats(total)
+    done_rows = _read_done_rows(output_path, output_format)
+    writer = _ResultWriter(output_path, output_format)
+
+    queue: "asyncio.Queue[Optional[Tuple[str, str]]]" = asyncio.Queue(maxsize=concurrency * 4)
+    # Rows waiting for each normalized title, and results of recently finished
+    # titles (older repeats are classified again, usually from the service cache)
+    waiting: Dict[str, List[Tuple[int, str]]] = {}
+    finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def deliver(key: str, result: Dict[str, Any]) -> None:
+        if not result.get("error"):
+            finished[key] = result
+            finished.move_to_end(key)
+            if len(finished) > _FINISHED_TITLES:
+                finished.popitem(last=False)
+        for row, title in waiting.pop(key, []):
+            writer.write(row, title, result)
+            stats.processed += 1
+            stats.errors += bool(result.get("error"))
+
+    async def classify(titles: List[str]) -> List[Dict[str, Any]]:
+        try:
+            if len(titles) == 1:
+                return [await service.classify(titles[0], detail)]
+            return await service.classify_many(titles, detail)
+        except Exception as e:
+            logger.error(f"Bulk classification failed: {str(e)}")
+            return [{"labels": [], "error": str(e)} for _ in titles]
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            items = [item]
+            while len(items) < batch_size and not queue.empty():
+                next_item = queue.get_nowait()
+                if next_item is None:
+                    queue.put_nowait(None)
+                    break
+                items.append(next_item)
+
+            results = await classify([title for _, title in items])
+            stats.upstream_titles += len(items)
+            for (key, _), result in zip(items, results):
+                deliver(key, result)
+
+    async def report_progress() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            print(stats.summary(), file=sys.stderr, flush=True)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    reporter = asyncio.create_task(report_progress())
+    try:
+        for row, title in iter_titles_from_file(input_path, column, input_format):
+            if row in done_rows:
+                stats.skipped += 1
+                continue
+            if not title:
+                writer.write(row, title, {"labels": [], "error": "Empty title"})
+                stats.processed += 1
+                stats.errors += 1
+                continue
+
+            key = normalize_title(title)
+            if key in finished:
+                waiting[key] = [(row, title)]
+                deliver(key, finished[key])
+            elif key in waiting:
+                waiting[key].append((row, title))
+            else:
+                waiting[key] = [(row, title)]
+                await queue.put((key, title))
+
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        reporter.cancel()
+        for task in workers:
+            task.cancel()
+        writer.close()
+
+    print(stats.summary(), file=sys.stderr, flush=True)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bulk",
+        description="Classify a file of project titles and write results incrementally.",
+    )
+    parser.add_argument("input", help="CSV, JSONL or plain-text file of titles")
+    parser.add_argument("-o", "--output", required=True, help="JSONL or CSV results file")
+    parser.add_argument("--column", default="title", help="CSV column / JSON key of the title")
+    parser.add_argument("--input-format", choices=SUPPORTED_FORMATS, help="Default: by extension")
+    parser.add_argument("--output-format", choices=("jsonl", "csv"), help="Default: by extension")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel classifications")
+    parser.add_argument("--batch-size", type=int, default=1, help="Titles packed per prompt")
+    parser.add_argument(
+        "--detail",
+        choices=("full", "compact"),
+        default="full",
+        help="'compact' skips the justifications",
+    )
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--no-count", action="store_true", help="Skip the row count (no ETA)")
+    parser.add_argument("--restart", action="store_true", help="Ignore existing results")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    from app.core.logging_config import setup_logging
+    from app.services.classifier_service import ClassifierService
+
+    setup_logging()
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.WARNING)
+
+    output_format = args.output_format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    service = ClassifierService()
+    try:
+        stats = asyncio.run(
+            run_bulk(
+                service,
+                args.input,
+                args.output,
+                column=args.column,
+                input_format=args.input_format,
+                output_format=output_format,
+                concurrency=args.concurrency,
+                batch_size=args.batch_size,
+                detail=args.detail,
+                progress_interval=args.progress_interval,
+                count_rows=not args.no_count,
+            )
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+        return 130
+    finally:
+        service.close()
+
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
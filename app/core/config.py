@@ -14,15 +14,94 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     PORT: int = 8080
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATE: float = 1.0
+    SLOW_REQUEST_THRESHOLD_MS: float = 5000.0
+
+    # Profiling (mounted under /debug only when enabled and a token is set)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_MAX_SECONDS: float = 60.0
+
+    # Metrics settings
+    METRICS_ENABLED: bool = True
+
+    # Category settings (empty path: the bundled data/categorias.csv)
+    CATEGORIES_CSV_PATH: str = ""
+    CATEGORIES_RELOAD_INTERVAL_SECONDS: float = 10.0
+
+    # Startup settings
+    WARM_UP_ENABLED: bool = True
 
     # CORS settings
     ALLOWED_ORIGINS: str = "*"
 
     # Gemini API settings
     GEMINI_API_KEY: str
+    GEMINI_API_KEYS: str = ""
     GEMINI_MODEL_NAME: str
+    GEMINI_BACKEND: str = "gemini"
+    GEMINI_CASCADE_MODELS: str = ""
+    GEMINI_CASCADE_CONFIDENCE_THRESHOLD: float = 0.7
     GEMINI_MAX_RETRIES: int = 3
     GEMINI_RETRY_DELAY: int = 2
+    GEMINI_RETRY_MAX_DELAY: int = 30
+    GEMINI_RPM_LIMIT: int = 0
+    GEMINI_TPM_LIMIT: int = 0
+    GEMINI_CIRCUIT_FAILURE_THRESHOLD: float = 0.5
+    GEMINI_CIRCUIT_WINDOW: int = 20
+    GEMINI_CIRCUIT_MIN_CALLS: int = 10
+    GEMINI_CIRCUIT_COOLDOWN_SECONDS: int = 30
+    GEMINI_HEDGE_PERCENTILE: float = 0.0
+    GEMINI_HEDGE_MAX_RATE: float = 0.1
+    GEMINI_HEDGE_MIN_SAMPLES: int = 20
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120.0
+    GEMINI_MAX_CONCURRENCY: int = 16
+    GEMINI_BATCH_MAX_TITLES: int = 20
+    GEMINI_BATCH_MAX_CHARS: int = 8000
+    GEMINI_STRUCTURED_OUTPUT: bool = True
+    GEMINI_COMPACT_MAX_OUTPUT_TOKENS: int = 128
+    GEMINI_CONTEXT_CACHE_ENABLED: bool = False
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+
+    # Admission control
+    ADMISSION_MAX_CONCURRENCY: int = 32
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS: float = 2.0
+    ADMISSION_BULK_MAX_WAIT_SECONDS: float = 30.0
+    ADMISSION_INTERACTIVE_RESERVED: int = 4
+    ADMISSION_BULK_API_KEYS: str = ""
+
+    # Fake model settings (GEMINI_BACKEND=fake)
+    FAKE_MODEL_LATENCY_MS: float = 800.0
+    FAKE_MODEL_ERROR_RATE: float = 0.0
+    FAKE_MODEL_MALFORMED_RATE: float = 0.0
+
+    # Lexical pre-classifier settings
+    LEXICAL_CLASSIFIER_ENABLED: bool = True
+    LEXICAL_CONFIDENCE_THRESHOLD: float = 0.85
+
+    # Near-duplicate title index settings
+    SIMILARITY_INDEX_ENABLED: bool = True
+    SIMILARITY_THRESHOLD: float = 0.9
+    SIMILARITY_INDEX_DIM: int = 256
+    SIMILARITY_INDEX_MAX_MB: int = 128
+    SIMILARITY_INDEX_PATH: str = ".cache/similarity_index"
+
+    # Result cache settings
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_TTL_SECONDS: int = 604800
+    CACHE_DB_PATH: str = ".cache/classifications.sqlite3"
+
+    # Asynchronous job settings
+    JOBS_MAX_WORKERS: int = 2
+    JOBS_CHUNK_SIZE: int = 100
+    JOBS_MAX_TITLES: int = 100000
+    JOBS_MAX_UPLOAD_MB: float = 50.0
+    JOBS_DB_PATH: str = ".cache/jobs.sqlite3"
 
     class Config:
         """Pydantic configuration."""
@@ -1,35 +1,225 @@
 """Logging configuration."""
 
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Any, Dict
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional, TextIO
 
 from app.core.config import settings
 
+# Id of the request being served, attached to every record logged for it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# Whether the INFO records of the current request are kept (see LOG_SAMPLE_RATE)
+_log_sampled: ContextVar[bool] = ContextVar("log_sampled", default=True)
 
-def setup_logging() -> None:
-    """Configure application logging."""
-    log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the request id to records and drop unsampled INFO records.
+
+    Runs in the thread that logs, where the request's context variables are
+    visible; warnings and errors are always kept.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Tag the record and decide whether to keep it."""
+        record.request_id = request_id_var.get() or "-"
+        return record.levelno >= logging.WARNING or _log_sampled.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the request id and `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a record."""
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            # Cloud Logging reads the level from "severity"
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
 
-    # Define log format
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    date_format = "%Y-%m-%d %H:%M:%S"
-
-    # Configure root logger
-    logging.basicConfig(
-        level=log_level,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-        ],
+    The stock handler formats every message before enqueueing it, on the
+    caller's thread; records only cross threads here, so they can be passed
+    as they are.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueue the record unformatted."""
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    """Formatter selected by LOG_FORMAT."""
+    if settings.LOG_FORMAT.lower() == "json":
+        return JsonFormatter()
+    return logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
     )
 
+
+def setup_logging(stream: Optional[TextIO] = None) -> None:
+    """
+    Configure application logging.
+
+    Records are put on a queue by the thread that logs them and written out
+    by a background listener thread, so a slow log pipe never blocks the
+    event loop. Message formatting happens in the listener too.
+
+    Args:
+        stream: Where logs are written (defaults to stdout)
+    """
+    global _listener
+    log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    # No formatter prints these; skipping them makes every record cheaper
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(_build_formatter())
+
+    handler = _LazyQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(log_level)
+    for existing in list(root.handlers):
+        if isinstance(existing, _LazyQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
     # Set third-party loggers to WARNING
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
     logging.getLogger("fastapi").setLevel(logging.WARNING)
 
 
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Log the block as one request.
+
+    Records get the request id, and the request's INFO records are kept or
+    dropped together according to LOG_SAMPLE_RATE.
+
+    Args:
+        request_id: Id sent by the client (a new one is generated if missing)
+
+    Yields:
+        The request id
+    """
+    request_id = request_id or uuid.uuid4().hex
+    request_id_token = request_id_var.set(request_id)
+    sampled_token = _log_sampled.set(
+        settings.LOG_SAMPLE_RATE >= 1 or random.random() < settings.LOG_SAMPLE_RATE
+    )
+    try:
+        yield request_id
+    finally:
+        _log_sampled.reset(sampled_token)
+        request_id_var.reset(request_id_token)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving every request an id and a sampling decision.
+
+    The id is taken from the `X-Request-ID` header when the client sent one.
+    Each request is logged once when it finishes, with its method, path,
+    status and duration as structured fields.
+    """
+
+    def __init__(self, app: Any):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Application to wrap
+        """
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Serve a request inside its logging context."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64]
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with request_context(request_id):
+            started_at = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                duration_ms = (time.perf_counter() - started_at) * 1000
+                self.logger.info(
+                    "%s %s %d %.1fms",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    duration_ms,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 2),
+                    },
+                )
+
+
 class LoggerAdapter(logging.LoggerAdapter):
     """Custom logger adapter for structured logging."""
 
@@ -0,0 +1,387 @@
+"""In-process metrics exposed in the Prometheus text format."""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+# Latency buckets (seconds) covering local shortcuts up to slow Gemini calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """
+    One value per thread, created on first use.
+
+    Every thread only writes its own shard, so updates need no lock; reads
+    add the shards up.
+    """
+
+    def __init__(self, factory: Callable[[], List[float]]):
+        self._factory = factory
+        self._local = threading.local()
+        self._all: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> List[float]:
+        """The shard of the calling thread."""
+        try:
+            return self._local.value
+        except AttributeError:
+            value = self._factory()
+            with self._lock:
+                self._all.append(value)
+            self._local.value = value
+            return value
+
+    def total(self) -> List[float]:
+        """Element-wise sum of every shard."""
+        with self._lock:
+            shards = list(self._all)
+        totals = self._factory()
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    """A counter for one combination of label values."""
+
+    def __init__(self):
+        self._shards = _Shards(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        self._shards.get()[0] += amount
+
+    def value(self) -> float:
+        """Current value."""
+        return self._shards.total()[0]
+
+
+class _GaugeChild(_CounterChild):
+    """A gauge for one combination of label values."""
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge."""
+        self._shards.get()[0] -= amount
+
+
+class _HistogramChild:
+    """A histogram for one combination of label values."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        # One count per bucket, one for +Inf, then the sum of observations
+        self._shards = _Shards(lambda: [0.0] * (len(buckets) + 2))
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        shard = self._shards.get()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[float], float]:
+        """Per-bucket counts (last one is +Inf) and the sum of observations."""
+        totals = self._shards.total()
+        return totals[:-1], totals[-1]
+
+
+class _Timer:
+    """Observes elapsed wall time into a histogram."""
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+        self._started_at = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started_at)
+
+
+class _Metric:
+    """A named metric with one child per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """
+        Get the child for some label values, creating it on first use.
+
+        Args:
+            values: One value per label name, in order
+
+        Returns:
+            The child metric
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        """Lines of this metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {_format(child.value())}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the unlabelled counter."""
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the unlabelled gauge."""
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the unlabelled gauge."""
+        self._children[()].dec(amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record one observation in the unlabelled histogram."""
+        self._children[()].observe(value)
+
+    def _render_child(self, key: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format(bound)
+            label_text = self._label_text(key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{label_text} {_format(cumulative)}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {_format(total)}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {_format(cumulative)}")
+        return lines
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: MetricT) -> MetricT:
+        """Add a metric and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+    )
+)
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+    )
+)
+HTTP_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+)
+ADMISSION_ACTIVE = REGISTRY.register(
+    Gauge("admission_active_requests", "Classification requests holding an admission slot.")
+)
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "admission_queue_depth", "Classification requests waiting for a slot, by lane.", ("lane",)
+    )
+)
+ADMISSION_WAIT = REGISTRY.register(
+    Histogram(
+        "admission_wait_seconds", "Time admitted requests waited for a slot, by lane.", ("lane",)
+    )
+)
+ADMISSION_REJECTED = REGISTRY.register(
+    Counter(
+        "admission_rejected_total",
+        "Requests rejected by admission control, by lane and reason.",
+        ("lane", "reason"),
+    )
+)
+CLASSIFY_STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "classify_stage_duration_seconds",
+        "Time spent building prompts, calling Gemini and parsing responses.",
+        ("stage",),
+    )
+)
+GEMINI_IN_FLIGHT = REGISTRY.register(
+    Gauge("gemini_requests_in_flight", "Gemini calls currently in flight.")
+)
+GEMINI_RETRIES = REGISTRY.register(
+    Counter("gemini_retries_total", "Gemini calls retried, by failure cause.", ("cause",))
+)
+GEMINI_FAILURES = REGISTRY.register(
+    Counter("gemini_failures_total", "Classifications that failed, by cause.", ("cause",))
+)
+GEMINI_HEDGES = REGISTRY.register(
+    Counter(
+        "gemini_hedges_total",
+        "Gemini calls that got a backup copy, by outcome (won, lost, failed).",
+        ("outcome",),
+    )
+)
+GEMINI_CREDENTIAL_CALLS = REGISTRY.register(
+    Counter(
+        "gemini_credential_calls_total",
+        "Gemini calls by credential pool member and outcome (ok or failure cause).",
+        ("member", "outcome"),
+    )
+)
+GEMINI_TOKENS = REGISTRY.register(
+    Counter("gemini_tokens_total", "Gemini tokens by kind (prompt, cached, response).", ("kind",))
+)
+GEMINI_OUTPUT_REPAIRS = REGISTRY.register(
+    Counter(
+        "gemini_output_repairs_total",
+        "Defects of model answers fixed locally instead of calling the model again.",
+        ("defect",),
+    )
+)
+CASCADE_ANSWERS = REGISTRY.register(
+    Counter(
+        "cascade_answers_total",
+        "Model classifications by the cascade tier that answered.",
+        ("tier",),
+    )
+)
+CASCADE_ESCALATIONS = REGISTRY.register(
+    Counter(
+        "cascade_escalations_total",
+        "Titles sent on to the next cascade tier, by tier and reason.",
+        ("tier", "reason"),
+    )
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing requests per route template."""
+
+    def __init__(self, app: Any):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Application to instrument
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Serve a request while recording its metrics."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unknown paths
+            # share one label so they cannot blow up the number of series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started_at)
+            HTTP_REQUESTS.labels(method, route, status_code).inc()
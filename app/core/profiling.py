@@ -0,0 +1,206 @@
+"""On-demand sampling profiler for the event loop thread."""
+
+import asyncio
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(code: Any) -> str:
+    """Readable, stable name of a code object: `function (package/module.py:line)`."""
+    path = os.path.normpath(code.co_filename).split(os.sep)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Stack samples of one profiling session, in the folded flame graph format."""
+
+    def __init__(self, samples: Counter, seconds: float, interval: float):
+        """
+        Initialize a finished profile.
+
+        Args:
+            samples: Number of samples per folded stack
+            seconds: Duration of the session
+            interval: Seconds between samples
+        """
+        self.samples = samples
+        self.seconds = seconds
+        self.interval = interval
+
+    def folded(self) -> str:
+        """
+        Stacks as `root;caller;callee count` lines, most frequent first.
+
+        Readable by flamegraph.pl, speedscope and similar tools. Samples
+        ending in the selector are time the event loop spent idle.
+        """
+        header = (
+            f"# {sum(self.samples.values())} samples over {self.seconds:.2f}s, "
+            f"every {self.interval * 1000:.1f}ms\n"
+        )
+        return header + "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of one thread from a background thread.
+
+    Sampling only reads the target thread's current frame, so the profiled
+    code runs unmodified; the cost is one short GIL acquisition per sample.
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample (defaults to the calling one)
+        """
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self._samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self._samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        """Stop sampling and return the profile."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return Profile(self._samples, time.perf_counter() - self._started_at, self.interval)
+
+
+class ProfileStore:
+    """The most recent per-request profiles, kept in memory for download."""
+
+    def __init__(self, max_profiles: int = 20):
+        """
+        Initialize an empty store.
+
+        Args:
+            max_profiles: Profiles kept; the oldest are dropped first
+        """
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        # One session at a time, so profiles do not sample each other
+        self.lock = asyncio.Lock()
+
+    def put(self, profile_id: str, profile: Profile) -> None:
+        """Store a profile."""
+        self._profiles[profile_id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        """A stored profile, or None if unknown or dropped."""
+        return self._profiles.get(profile_id)
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Whether `token` matches PROFILING_TOKEN (never true while it is unset)."""
+    return bool(settings.PROFILING_TOKEN) and secrets.compare_digest(
+        (token or "").encode(), settings.PROFILING_TOKEN.encode()
+    )
+
+
+async def profile_for(seconds: float) -> Profile:
+    """
+    Profile the event loop thread for a fixed time window.
+
+    Args:
+        seconds: Duration of the window
+
+    Returns:
+        The profile
+    """
+    profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = profiler.stop()
+    return profile
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling individual requests on demand.
+
+    A request sent with `X-Profile: 1` and a valid `X-Profile-Token` is
+    sampled while it is served (along with anything else the event loop runs
+    meanwhile). Its response gets an `X-Profile-URL` header pointing to the
+    download of the profile.
+    """
+
+    def __init__(self, app: Any, store: ProfileStore):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Application to wrap
+            store: Where finished profiles are kept
+        """
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Serve a request, profiling it if asked to."""
+        headers = dict(scope.get("headers", [])) if scope["type"] == "http" else {}
+        if headers.get(b"x-profile") not in (b"1", b"true") or not is_authorized(
+            headers.get(b"x-profile-token", b"").decode("latin-1")
+        ):
+            await self.app(scope, receive, send)
+            return
+        if self.store.lock.locked():
+            logger.warning("Profiling already in progress; serving the request unprofiled")
+            await self.app(scope, receive, send)
+            return
+
+        # Generated here: client-sent ids (X-Request-ID) end up in a URL path
+        profile_id = secrets.token_hex(16)
+        logger.info(f"Profiling the request into profile {profile_id}")
+
+        async def send_with_link(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                link = f"/debug/profiles/{profile_id}".encode("latin-1")
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-profile-url", link)],
+                }
+            await send(message)
+
+        async with self.store.lock:
+            profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_with_link)
+            finally:
+                self.store.put(profile_id, profiler.stop())
@@ -0,0 +1,142 @@
+"""Per-request timing breakdown, reported in the Server-Timing header."""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.logging_config import request_id_var
+from app.core.metrics import CLASSIFY_STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """
+    Time spent per stage while serving one request.
+
+    Stages that run several times (e.g. one upstream call per retry) are
+    summed and counted. Work done concurrently for a request, like the chunks
+    of a batch, is summed too, so stages can add up to more than the total.
+    """
+
+    def __init__(self):
+        """Initialize an empty breakdown."""
+        self.stages: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add one run of a stage."""
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def milliseconds(self) -> Dict[str, float]:
+        """Total milliseconds per stage."""
+        return {stage: round(seconds * 1000, 2) for stage, (seconds, _) in self.stages.items()}
+
+    def header(self, total: float) -> str:
+        """
+        Server-Timing header value.
+
+        Args:
+            total: Seconds the whole request took
+
+        Returns:
+            One metric per stage plus `total`, durations in milliseconds
+        """
+        metrics = []
+        for stage, (seconds, count) in self.stages.items():
+            metric = f"{stage};dur={seconds * 1000:.1f}"
+            if count > 1:
+                metric += f';desc="{int(count)} runs"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add a stage run to the breakdown of the current request, if any."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """
+    Time a classification stage.
+
+    The duration goes to the `classify_stage_duration_seconds` histogram and
+    to the breakdown of the current request.
+
+    Args:
+        stage: Stage name (a Server-Timing token, e.g. "upstream")
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        CLASSIFY_STAGE_DURATION.labels(stage).observe(elapsed)
+        record_stage(stage, elapsed)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware reporting where the time of every request went.
+
+    Adds `Server-Timing` (stage breakdown and total) and `X-Request-ID` to
+    every response, and logs requests slower than SLOW_REQUEST_THRESHOLD_MS
+    with their breakdown.
+    """
+
+    def __init__(self, app: Any):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Application to wrap
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Serve a request while collecting its timings."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", timings.header(time.perf_counter() - started_at).encode())
+                )
+                headers.append((b"x-request-id", (request_id_var.get() or "").encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+            if threshold > 0 and duration_ms >= threshold:
+                stages = timings.milliseconds()
+                logger.warning(
+                    "Slow request %s %s took %.0fms (%s)",
+                    scope["method"],
+                    scope["path"],
+                    duration_ms,
+                    ", ".join(f"{stage} {ms:.0f}ms" for stage, ms in stages.items()) or "-",
+                    extra={"duration_ms": round(duration_ms, 2), "stages_ms": stages},
+                )
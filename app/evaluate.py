@@ -0,0 +1,512 @@
+"""
+Offline evaluation of prompt variants and models against a labelled dataset.
+
+Classifies every title of a labelled CSV with each combination of prompt
+variant and model, and reports per-category precision and recall next to
+model latency, tokens and estimated cost, so the speed-versus-quality
+trade-off of a change is visible before it ships.
+
+Model responses can be recorded to a JSONL file and replayed later: replayed
+runs need no network access or API key and give the same results, with the
+latencies and token counts of the recording.
+
+Usage:
+    python -m app.evaluate eval.csv --models gemini-2.0-flash gemini-2.5-flash \\
+        --variants full compact --record recordings.jsonl -o report.json
+    python -m app.evaluate eval.csv --models gemini-2.0-flash --replay recordings.jsonl
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.models.categories import DEFAULT_CATEGORIES_CSV, load_categories
+
+logger = logging.getLogger(__name__)
+
+# Built-in prompt variants; more can be given in a JSON file (--variants-file)
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    "full": {"detail": "full", "structured_output": True},
+    "compact": {"detail": "compact", "structured_output": True},
+    "full_free_form": {"detail": "full", "structured_output": False},
+}
+
+# USD per million tokens; list prices of Gemini 2.0 Flash, override per run
+DEFAULT_INPUT_PRICE = 0.10
+DEFAULT_OUTPUT_PRICE = 0.40
+
+
+@dataclass
+class Example:
+    """One labelled title."""
+
+    title: str
+    expected: Set[int]
+
+
+@dataclass
+class TitleUsage:
+    """Model calls made to classify one title."""
+
+    calls: int = 0
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+# Usage of the title being classified by the current task
+_title_usage: ContextVar[Optional[TitleUsage]] = ContextVar("title_usage", default=None)
+
+
+def response_key(model_name: str, prompt: Any, generation_config: Optional[Dict[str, Any]]) -> str:
+    """Key of a recorded response: hash of the model, generation options and prompt."""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(json.dumps(generation_config, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(str(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Recording:
+    """Model responses saved to a JSONL file, keyed by `response_key`."""
+
+    def __init__(self, path: str, writable: bool):
+        """
+        Load the responses already recorded.
+
+        Args:
+            path: JSONL file (created when recording if missing)
+            writable: Append new responses to the file
+        """
+        self.path = path
+        self.writable = writable
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+        except FileNotFoundError:
+            if not writable:
+                raise
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A recorded response, if any."""
+        return self.entries.get(key)
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        """Record a response."""
+        self.entries[entry["key"]] = entry
+        if self.writable:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class MissingRecording(LookupError):
+    """
+    A replayed run needs a response that was never recorded.
+
+    Handled like an upstream request error (404): the call is not retried
+    and does not count against the circuit breaker.
+    """
+
+    code = 404
+
+
+class EvaluatedModel:
+    """
+    Model wrapper measuring every call, recording or replaying responses.
+
+    Latency and tokens of each call are added to the usage of the title
+    being classified. When replaying, no call is made: the recorded response
+    is returned with its recorded latency and tokens.
+    """
+
+    def __init__(self, model_name: str, model: Any, recording: Optional[Recording], replay: bool):
+        """
+        Wrap a model.
+
+        Args:
+            model_name: Name used in the recording keys
+            model: Model to call (unused when replaying)
+            recording: Where responses are recorded or replayed from
+            replay: Serve responses from the recording only
+        """
+        self.model_name = model_name
+        self.model = model
+        self.recording = recording
+        self.replay = replay
+
+    async def generate_content_async(self, prompt: Any, **kwargs: Any) -> Any:
+        """Same as `genai.GenerativeModel.generate_content_async`."""
+        key = response_key(self.model_name, prompt, kwargs.get("generation_config"))
+        if self.replay:
+            entry = self.recording.get(key) if self.recording is not None else None
+            if entry is None:
+                raise MissingRecording(f"No recorded response for this prompt ({key[:12]})")
+        else:
+            started_at = time.perf_counter()
+            response = await self.model.generate_content_async(prompt, **kwargs)
+            usage = getattr(response, "usage_metadata", None)
+            entry = {
+                "key": key,
+                "model": self.model_name,
+                "text": response.text,
+                "latency_s": round(time.perf_counter() - started_at, 4),
+                "input_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            }
+            if self.recording is not None:
+                self.recording.put(entry)
+
+        title_usage = _title_usage.get()
+        if title_usage is not None:
+            title_usage.calls += 1
+            title_usage.latency += entry["latency_s"]
+            title_usage.input_tokens += entry["input_tokens"]
+            title_usage.output_tokens += entry["output_tokens"]
+        return SimpleNamespace(
+            text=entry["text"],
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=entry["input_tokens"],
+                cached_content_token_count=0,
+                candidates_token_count=entry["output_tokens"],
+            ),
+        )
+
+
+def load_dataset(path: str, column: str, expected_column: str) -> List[Example]:
+    """
+    Read a labelled CSV.
+
+    Args:
+        path: CSV file
+        column: Column of the title
+        expected_column: Column of the expected category ids, separated by
+            ";" or "," (empty when no category applies)
+
+    Returns:
+        The labelled titles
+    """
+    examples = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            title = (row.get(column) or "").strip()
+            if not title:
+                continue
+            ids = (row.get(expected_column) or "").replace(",", ";").split(";")
+            examples.append(Example(title, {int(i) for i in ids if i.strip() and int(i) != 0}))
+    return examples
+
+
+def _predicted_ids(result: Dict[str, Any]) -> Set[int]:
+    """Category ids of a classification result, without NO_CLASIFICADO."""
+    return {label["id"] for label in result.get("labels", []) if label.get("id") not in (None, 0)}
+
+
+def score(
+    expected: List[Set[int]], predicted: List[Set[int]], category_ids: Dict[int, str]
+) -> Dict[str, Any]:
+    """
+    Precision and recall per category and overall.
+
+    Args:
+        expected: Expected ids per title
+        predicted: Predicted ids per title
+        category_ids: Category names by id
+
+    Returns:
+        Per-category counts and scores, micro-averaged scores and the share
+        of titles whose predicted ids are exactly the expected ones
+    """
+
+    def ratio(numerator: int, denominator: int) -> float:
+        return round(numerator / denominator, 4) if denominator else 0.0
+
+    def f1(precision: float, recall: float) -> float:
+        return (
+            round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0
+        )
+
+    categories = {}
+    totals = [0, 0, 0]
+    for category_id, name in sorted(category_ids.items()):
+        tp = sum(category_id in e and category_id in p for e, p in zip(expected, predicted))
+        fp = sum(category_id not in e and category_id in p for e, p in zip(expected, predicted))
+        fn = sum(category_id in e and category_id not in p for e, p in zip(expected, predicted))
+        precision, recall = ratio(tp, tp + fp), ratio(tp, tp + fn)
+        categories[category_id] = {
+            "name": name,
+            "support": tp + fn,
+            "predicted": tp + fp,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1(precision, recall),
+        }
+        totals = [totals[0] + tp, totals[1] + fp, totals[2] + fn]
+
+    tp, fp, fn = totals
+    precision, recall = ratio(tp, tp + fp), ratio(tp, tp + fn)
+    return {
+        "micro_precision": precision,
+        "micro_recall": recall,
+        "micro_f1": f1(precision, recall),
+        "exact_match": ratio(sum(e == p for e, p in zip(expected, predicted)), len(expected)),
+        "categories": categories,
+    }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+@contextmanager
+def _overridden_settings(**values: Any) -> Iterator[None]:
+    """Temporarily change settings."""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+async def evaluate_run(
+    examples: List[Example],
+    model_name: str,
+    variant: Dict[str, Any],
+    recording: Optional[Recording],
+    replay: bool,
+    concurrency: int,
+    prices: Tuple[float, float],
+) -> Dict[str, Any]:
+    """
+    Classify the dataset with one model and prompt variant.
+
+    Only the model is evaluated: the lexical classifier, similarity index
+    and caches are off, and so are cascades and hedging.
+
+    Args:
+        examples: Labelled titles
+        model_name: Gemini model
+        variant: Prompt variant (detail, structured_output, categories_csv)
+        recording: Where responses are recorded or replayed from
+        replay: Serve responses from the recording only
+        concurrency: Titles classified at the same time
+        prices: USD per million input and output tokens
+
+    Returns:
+        Quality, latency, token and cost figures of the run
+    """
+    from app.services.classifier_service import ClassifierService
+
+    categories_csv = variant.get("categories_csv") or DEFAULT_CATEGORIES_CSV
+    with _overridden_settings(
+        GEMINI_MODEL_NAME=model_name,
+        GEMINI_CASCADE_MODELS="",
+        GEMINI_STRUCTURED_OUTPUT=variant.get("structured_output", True),
+        GEMINI_CONTEXT_CACHE_ENABLED=False,
+        GEMINI_HEDGE_PERCENTILE=0.0,
+        GEMINI_MAX_RETRIES=1 if replay else settings.GEMINI_MAX_RETRIES,
+        CATEGORIES_CSV_PATH=categories_csv,
+        LEXICAL_CLASSIFIER_ENABLED=False,
+        SIMILARITY_INDEX_ENABLED=False,
+        CACHE_ENABLED=False,
+    ):
+        # Retries and the context cache are read on every call, so the
+        # overrides stay in place for the whole run
+        service = ClassifierService()
+        service.model = EvaluatedModel(model_name, service.model, recording, replay)
+        slots = asyncio.Semaphore(concurrency)
+        detail = variant.get("detail", "full")
+
+        async def classify(example: Example) -> Tuple[Dict[str, Any], TitleUsage]:
+            usage = TitleUsage()
+            _title_usage.set(usage)
+            async with slots:
+                return await service.classify(example.title, detail), usage
+
+        try:
+            outcomes = await asyncio.gather(*(classify(example) for example in examples))
+        finally:
+            service.close()
+
+    results = [result for result, _ in outcomes]
+    usages = [usage for _, usage in outcomes]
+    latencies = [usage.latency * 1000 for usage in usages]
+    input_tokens = statistics.mean(usage.input_tokens for usage in usages)
+    output_tokens = statistics.mean(usage.output_tokens for usage in usages)
+    category_ids = {
+        category["id"]: name
+        for name, category in load_categories(categories_csv).items()
+        if category["id"] != 0
+    }
+    return {
+        "model": model_name,
+        "variant": variant["name"],
+        "titles": len(examples),
+        "errors": sum(1 for result in results if result.get("error")),
+        **score([e.expected for e in examples], [_predicted_ids(r) for r in results], category_ids),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1),
+            "p95": round(_percentile(latencies, 0.95), 1),
+        },
+        "calls_per_title": round(statistics.mean(usage.calls for usage in usages), 2),
+        "input_tokens_per_title": round(input_tokens, 1),
+        "output_tokens_per_title": round(output_tokens, 1),
+        "cost_per_1k_titles_usd": round(
+            (input_tokens * prices[0] + output_tokens * prices[1]) / 1e6 * 1000, 4
+        ),
+    }
+
+
+def mark_pareto(runs: List[Dict[str, Any]]) -> None:
+    """
+    Flag the runs no other run beats on quality, latency and cost at once.
+
+    A run is dominated when another has at least its micro F1, at most its
+    p95 latency and cost, and is strictly better on one of them.
+    """
+
+    def figures(run: Dict[str, Any]) -> Tuple[float, float, float]:
+        return (-run["micro_f1"], run["latency_ms"]["p95"], run["cost_per_1k_titles_usd"])
+
+    for run in runs:
+        run["pareto"] = not any(
+            all(a <= b for a, b in zip(figures(other), figures(run)))
+            and figures(other) != figures(run)
+            for other in runs
+        )
+
+
+def format_report(runs: List[Dict[str, Any]]) -> str:
+    """Markdown tables comparing the runs, best micro F1 first."""
+    runs = sorted(runs, key=lambda run: (-run["micro_f1"], run["latency_ms"]["p95"]))
+    lines = [
+        "| Variant | Model | Micro F1 | Precision | Recall | Exact | Errors "
+        "| Mean ms | p95 ms | In tok/title | Out tok/title | USD/1k | Pareto |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for run in runs:
+        lines.append(
+            f"| {run['variant']} | {run['model']} | {run['micro_f1']:.3f} "
+            f"| {run['micro_precision']:.3f} | {run['micro_recall']:.3f} "
+            f"| {run['exact_match']:.3f} | {run['errors']} "
+            f"| {run['latency_ms']['mean']:.0f} | {run['latency_ms']['p95']:.0f} "
+            f"| {run['input_tokens_per_title']:.0f} | {run['output_tokens_per_title']:.0f} "
+            f"| {run['cost_per_1k_titles_usd']:.4f} | {'yes' if run['pareto'] else ''} |"
+        )
+
+    lines += ["", "Per-category precision / recall:", ""]
+    lines.append("| Category | " + " | ".join(f"{r['variant']} {r['model']}" for r in runs) + " |")
+    lines.append("|---|" + "---|" * len(runs))
+    for category_id, category in runs[0]["categories"].items():
+        # Categories absent from the dataset and never predicted say nothing
+        if not category["support"] and not any(
+            run["categories"].get(category_id, {}).get("predicted") for run in runs
+        ):
+            continue
+        cells = [
+            f"{run['categories'][category_id]['precision']:.2f} / "
+            f"{run['categories'][category_id]['recall']:.2f}"
+            for run in runs
+            if category_id in run["categories"]
+        ]
+        lines.append(
+            f"| {category_id} {category['name'][:40]} ({category['support']}) | "
+            + " | ".join(cells)
+            + " |"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.evaluate",
+        description="Compare prompt variants and models on a labelled dataset.",
+    )
+    parser.add_argument("dataset", help="CSV with a title and the expected category ids")
+    parser.add_argument("--column", default="titulo", help="Column of the title")
+    parser.add_argument("--expected-column", default="ids", help="Column of the expected ids")
+    parser.add_argument("--models", nargs="+", help="Default: GEMINI_MODEL_NAME")
+    parser.add_argument(
+        "--variants", nargs="+", default=["full", "compact"], help="Prompt variants to run"
+    )
+    parser.add_argument(
+        "--variants-file",
+        help='JSON list of extra variants: {"name", "detail", "structured_output", '
+        '"categories_csv"}',
+    )
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument("--record", help="Append model responses to this JSONL file")
+    recording.add_argument("--replay", help="Serve model responses from this JSONL file only")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel classifications")
+    parser.add_argument("--input-price", type=float, default=DEFAULT_INPUT_PRICE, help="USD/1M")
+    parser.add_argument("--output-price", type=float, default=DEFAULT_OUTPUT_PRICE, help="USD/1M")
+    parser.add_argument("-o", "--output", help="Also write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    from app.core.logging_config import setup_logging
+
+    setup_logging()
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    variants = {name: {"name": name, **variant} for name, variant in VARIANTS.items()}
+    if args.variants_file:
+        with open(args.variants_file, encoding="utf-8") as f:
+            variants.update({variant["name"]: variant for variant in json.load(f)})
+    unknown = [name for name in args.variants if name not in variants]
+    if unknown:
+        parser.error(f"Unknown variants: {', '.join(unknown)}")
+
+    examples = load_dataset(args.dataset, args.column, args.expected_column)
+    if not examples:
+        parser.error("The dataset has no titles")
+    path = args.replay or args.record
+    store = Recording(path, writable=bool(args.record)) if path else None
+
+    runs = []
+    for model_name in args.models or [settings.GEMINI_MODEL_NAME]:
+        for name in args.variants:
+            print(f"Evaluating {name} on {model_name}...", file=sys.stderr, flush=True)
+            runs.append(
+                asyncio.run(
+                    evaluate_run(
+                        examples,
+                        model_name,
+                        variants[name],
+                        store,
+                        replay=bool(args.replay),
+                        concurrency=args.concurrency,
+                        prices=(args.input_price, args.output_price),
+                    )
+                )
+            )
+    mark_pareto(runs)
+
+    print(format_report(runs))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"dataset": args.dataset, "runs": runs}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
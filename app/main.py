@@ -1,29 +1,90 @@
 """FastAPI main application."""
 
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.api.routers import classifier
+from app import IMPORT_STARTED_AT
+from app.api.routers import classifier, debug, jobs
 from app.core.config import settings
-from app.core.logging_config import setup_logging
+from app.core.logging_config import RequestContextMiddleware, setup_logging
+from app.core.metrics import REGISTRY, MetricsMiddleware
+from app.core.profiling import ProfileStore, ProfilingMiddleware
+from app.core.timing import TimingMiddleware
+from app.services.admission import LANE_BULK, LANE_INTERACTIVE, AdmissionController
+from app.services.classifier_service import ClassifierService
+from app.services.jobs import JobManager, JobStore
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Startup phases in seconds, logged once the first health check is answered
+startup_times = {"import": time.perf_counter() - IMPORT_STARTED_AT}
+
+
+async def _warm_up(service: ClassifierService) -> None:
+    """Load the Gemini SDK and clients in the background after startup."""
+    started_at = time.perf_counter()
+    try:
+        await service.warm_up()
+    except Exception as e:
+        logger.warning(f"Warm-up failed; clients will load on first use: {str(e)}")
+        return
+    startup_times["warm_up"] = time.perf_counter() - started_at
+    logger.info(f"Warm-up finished in {startup_times['warm_up']:.2f}s")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
+    started_at = time.perf_counter()
     logger.info("Starting Brecha AI Service...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"Gemini Model: {settings.GEMINI_MODEL_NAME}")
+    # The Gemini SDK is not imported here, so the service builds in milliseconds
+    service = ClassifierService()
+    job_manager = JobManager(
+        service,
+        JobStore(settings.JOBS_DB_PATH or ":memory:"),
+        workers=settings.JOBS_MAX_WORKERS,
+        chunk_size=settings.JOBS_CHUNK_SIZE,
+    )
+    app.state.classifier_service = service
+    app.state.job_manager = job_manager
+    app.state.admission = (
+        AdmissionController(
+            settings.ADMISSION_MAX_CONCURRENCY,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_wait={
+                LANE_INTERACTIVE: settings.ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS,
+                LANE_BULK: settings.ADMISSION_BULK_MAX_WAIT_SECONDS,
+            },
+            interactive_reserved=settings.ADMISSION_INTERACTIVE_RESERVED,
+        )
+        if settings.ADMISSION_MAX_CONCURRENCY > 0
+        else None
+    )
+    await job_manager.start()
+    background = []
+    if settings.WARM_UP_ENABLED:
+        background.append(asyncio.create_task(_warm_up(service)))
+    if settings.CATEGORIES_RELOAD_INTERVAL_SECONDS > 0:
+        interval = settings.CATEGORIES_RELOAD_INTERVAL_SECONDS
+        background.append(asyncio.create_task(service.categories.watch(interval)))
+    startup_times["lifespan"] = time.perf_counter() - started_at
     yield
     logger.info("Shutting down Brecha AI Service...")
+    for task in background:
+        task.cancel()
+    await job_manager.stop()
+    job_manager.store.close()
+    service.close()
 
 
 # Create FastAPI app
@@ -45,8 +106,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+profiling_enabled = settings.PROFILING_ENABLED and bool(settings.PROFILING_TOKEN)
+if settings.PROFILING_ENABLED and not profiling_enabled:
+    logger.warning("PROFILING_ENABLED is set without a PROFILING_TOKEN; profiling stays off")
+if profiling_enabled:
+    app.state.profiles = ProfileStore()
+    app.add_middleware(ProfilingMiddleware, store=app.state.profiles)
+
+app.add_middleware(TimingMiddleware)
+
+# Outermost, so everything below logs with the request id
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(classifier.router, prefix="/api/v1", tags=["classification"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+if profiling_enabled:
+    app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
 
 
 @app.get("/")
@@ -63,12 +142,29 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Cloud Run."""
+    if "first_health" not in startup_times:
+        startup_times["first_health"] = time.perf_counter() - IMPORT_STARTED_AT
+        logger.info(
+            "Startup: "
+            + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in startup_times.items())
+        )
     return JSONResponse(
         status_code=200,
         content={"status": "healthy", "service": settings.APP_NAME},
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Metrics endpoint in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled", status_code=404)
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
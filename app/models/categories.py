@@ -1,13 +1,31 @@
 """Category definitions for project classification."""
 
 import csv
+import hashlib
+import json
 import os
 from typing import Dict
 
+# CSV shipped with the service; CATEGORIES_CSV_PATH can point elsewhere
+DEFAULT_CATEGORIES_CSV = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "categorias.csv"
+)
 
-def _load_categories_from_csv() -> Dict[str, dict]:
-    """Load categories from CSV file."""
-    csv_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "categorias.csv")
+
+def load_categories(csv_path: str = DEFAULT_CATEGORIES_CSV) -> Dict[str, dict]:
+    """
+    Load categories from a CSV file.
+
+    Args:
+        csv_path: CSV with `id`, `nombre` and `definicion` columns
+
+    Returns:
+        Category definitions keyed by name
+
+    Raises:
+        OSError: If the file cannot be read
+        KeyError, ValueError: If a row is malformed
+    """
     categories = {}
 
     with open(csv_path, "r", encoding="utf-8-sig") as f:
@@ -23,5 +41,11 @@ def _load_categories_from_csv() -> Dict[str, dict]:
     return categories
 
 
+def hash_categories(categories: Dict[str, dict]) -> str:
+    """Compute a stable hash of the category definitions."""
+    payload = json.dumps(categories, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 # Load categories from CSV
-DEFINICIONES_DE_CATEGORIAS = _load_categories_from_csv()
+DEFINICIONES_DE_CATEGORIAS = load_categories()
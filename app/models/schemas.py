@@ -1,12 +1,15 @@
 """Pydantic schemas for API requests and responses."""
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
+# 'full' asks the model for a justification per label; 'compact' for ids and confidences only
+Detail = Literal["full", "compact"]
 
-class ClassificationLabel(BaseModel):
-    """Single classification label with confidence and justification."""
+
+class CompactClassificationLabel(BaseModel):
+    """Single classification label with confidence."""
 
     label: str = Field(..., description="Category label name")
     id: int = Field(..., description="Category ID")
@@ -16,7 +19,55 @@ class ClassificationLabel(BaseModel):
         le=1.0,
         description="Confidence score between 0.0 and 1.0",
     )
-    justificacion: str = Field(..., description="Justification for the classification")
+
+
+class ClassificationLabel(CompactClassificationLabel):
+    """Single classification label with confidence and justification."""
+
+    justificacion: str = Field(
+        ...,
+        description="Justification for the classification (empty in compact mode)",
+    )
+
+
+class ClassificationOutput(BaseModel):
+    """Output the model must produce for a single title."""
+
+    labels: List[ClassificationLabel] = Field(..., description="Assigned categories")
+
+
+class BatchClassificationOutputItem(BaseModel):
+    """Labels of one title in a batch output."""
+
+    indice: int = Field(..., description="1-based position of the title in the prompt")
+    labels: List[ClassificationLabel] = Field(..., description="Assigned categories")
+
+
+class BatchClassificationOutput(BaseModel):
+    """Output the model must produce for several titles."""
+
+    resultados: List[BatchClassificationOutputItem] = Field(..., description="One item per title")
+
+
+class CompactClassificationOutput(BaseModel):
+    """Output the model must produce for a single title in compact mode."""
+
+    labels: List[CompactClassificationLabel] = Field(..., description="Assigned categories")
+
+
+class CompactBatchClassificationOutputItem(BaseModel):
+    """Labels of one title in a compact batch output."""
+
+    indice: int = Field(..., description="1-based position of the title in the prompt")
+    labels: List[CompactClassificationLabel] = Field(..., description="Assigned categories")
+
+
+class CompactBatchClassificationOutput(BaseModel):
+    """Output the model must produce for several titles in compact mode."""
+
+    resultados: List[CompactBatchClassificationOutputItem] = Field(
+        ..., description="One item per title"
+    )
 
 
 class ClassificationRequest(BaseModel):
@@ -28,6 +79,10 @@ class ClassificationRequest(BaseModel):
         max_length=1000,
         description="Project title to classify",
     )
+    detail: Detail = Field(
+        "full",
+        description="'full' includes a justification per label; 'compact' only ids and confidences",
+    )
 
     @field_validator("title")
     @classmethod
@@ -66,6 +121,26 @@ class ClassificationResponse(BaseModel):
         None,
         description="Raw response from the model (only included if parsing failed)",
     )
+    repaired: Optional[List[str]] = Field(
+        None,
+        description="Defects of the model answer fixed locally (e.g. 'truncated', 'id_mismatch')",
+    )
+    source: Optional[str] = Field(
+        None,
+        description="Which path answered: 'lexical', 'cache', 'similarity' or 'model'",
+    )
+    model: Optional[str] = Field(
+        None,
+        description="Gemini model (cascade tier) that produced the labels",
+    )
+    tier: Optional[int] = Field(
+        None,
+        description="1-based cascade tier that produced the labels",
+    )
+    categories_version: Optional[str] = Field(
+        None,
+        description="Version (content hash) of the category definitions used",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -83,3 +158,105 @@ class ClassificationResponse(BaseModel):
             ]
         }
     }
+
+
+class BatchClassificationRequest(BaseModel):
+    """Request model for classifying several project titles at once."""
+
+    titles: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Project titles to classify",
+    )
+    detail: Detail = Field(
+        "full",
+        description="'full' includes a justification per label; 'compact' only ids and confidences",
+    )
+
+    @field_validator("titles")
+    @classmethod
+    def validate_titles(cls, v: List[str]) -> List[str]:
+        """Validate and clean every title."""
+        cleaned = [title.strip() for title in v]
+        if any(not title for title in cleaned):
+            raise ValueError("Titles cannot be empty or only whitespace")
+        if any(len(title) > 1000 for title in cleaned):
+            raise ValueError("Titles cannot be longer than 1000 characters")
+        return cleaned
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "titles": [
+                        "Mejoramiento del servicio de agua potable en el distrito de San Juan",
+                        "Creación del servicio de educación inicial en la localidad de Pampas",
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class BatchClassificationResult(ClassificationResponse):
+    """Classification result for one title of a batch."""
+
+    title: str = Field(..., description="Project title that was classified")
+
+
+class BatchClassificationResponse(BaseModel):
+    """Response model for batch project classification."""
+
+    results: List[BatchClassificationResult] = Field(
+        default_factory=list,
+        description="One classification result per title, in request order",
+    )
+    total: int = Field(..., description="Number of classified titles")
+
+
+class JobRequest(BaseModel):
+    """Request model for an asynchronous classification job."""
+
+    titles: List[str] = Field(
+        ...,
+        min_length=1,
+        description="Project titles to classify",
+    )
+
+    @field_validator("titles")
+    @classmethod
+    def validate_titles(cls, v: List[str]) -> List[str]:
+        """Validate and clean every title."""
+        return BatchClassificationRequest.validate_titles(v)
+
+
+class JobStatusResponse(BaseModel):
+    """Progress of an asynchronous classification job."""
+
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="'queued', 'running' or 'completed'")
+    total: int = Field(..., description="Number of titles in the job")
+    processed: int = Field(..., description="Number of titles already classified")
+    failed: int = Field(..., description="Number of titles that could not be classified")
+    created_at: float = Field(..., description="Creation time (Unix timestamp)")
+    updated_at: float = Field(..., description="Time of the last progress (Unix timestamp)")
+
+
+class JobResult(BatchClassificationResult):
+    """Classification result for one title of a job."""
+
+    row: int = Field(..., description="1-based position of the title in the job")
+
+
+class JobResultsResponse(BaseModel):
+    """Page of the finished results of a job."""
+
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="'queued', 'running' or 'completed'")
+    offset: int = Field(..., description="Number of finished results skipped")
+    limit: int = Field(..., description="Maximum number of results in the page")
+    results: List[JobResult] = Field(
+        default_factory=list,
+        description="Finished results, in row order",
+    )
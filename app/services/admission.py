@@ -0,0 +1,202 @@
+"""Admission control: bounded, prioritized queueing of classification requests."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.core.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+)
+from app.core.timing import record_stage
+from app.services.resilience import deadline_remaining
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+# Served in this order whenever a slot frees up
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing a request that would wait too long."""
+
+    def __init__(self, lane: str, reason: str, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            lane: Lane the request was submitted to
+            reason: "queue_full" or "queue_wait"
+            retry_after: Seconds after which the client should try again
+        """
+        super().__init__(f"Service overloaded ({lane} lane, {reason}); retry in {retry_after:.0f}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of the classifier.
+
+    At most `max_concurrency` requests are served at once; the rest wait in
+    one FIFO queue per lane. Freed slots go to interactive requests first,
+    and `interactive_reserved` slots are never given to bulk requests, so a
+    bulk client flooding the service cannot delay interactive users by more
+    than the requests already running.
+
+    Instead of queueing work that would time out anyway, a request is
+    rejected right away when its lane's queue is full or when its expected
+    wait (requests ahead of it times the recent service time) is above the
+    lane's limit or its remaining deadline. A request that still waits
+    longer than that limit gives up its place and is rejected too.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int = 256,
+        max_wait: Optional[Dict[str, float]] = None,
+        interactive_reserved: int = 0,
+    ):
+        """
+        Initialize an empty controller.
+
+        Args:
+            max_concurrency: Requests served at the same time
+            max_queue: Requests waiting per lane
+            max_wait: Longest queue wait accepted per lane, in seconds
+            interactive_reserved: Slots only interactive requests may use
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = {LANE_INTERACTIVE: 2.0, LANE_BULK: 30.0, **(max_wait or {})}
+        self.interactive_reserved = min(interactive_reserved, max_concurrency - 1)
+        self._active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        # Moving average of how long admitted requests hold their slot
+        self._service_time = 0.5
+        self.rejected = {lane: 0 for lane in LANES}
+
+    def _slots(self, lane: str) -> int:
+        """Slots a lane may use."""
+        if lane == LANE_BULK:
+            return self.max_concurrency - self.interactive_reserved
+        return self.max_concurrency
+
+    def _ahead(self, lane: str) -> int:
+        """Queued requests that will be served before a new one in `lane`."""
+        return sum(len(self._waiters[other]) for other in LANES[: LANES.index(lane) + 1])
+
+    def expected_wait(self, lane: str) -> float:
+        """Seconds a request submitted to `lane` now is expected to wait."""
+        if self._active < self._slots(lane) and not self._ahead(lane):
+            return 0.0
+        return (self._ahead(lane) + 1) * self._service_time / self._slots(lane)
+
+    def _reject(self, lane: str, reason: str, retry_after: float) -> AdmissionRejected:
+        """Count and build a rejection."""
+        self.rejected[lane] += 1
+        ADMISSION_REJECTED.labels(lane, reason).inc()
+        logger.warning(f"Rejected a {lane} request ({reason}); expected wait {retry_after:.1f}s")
+        return AdmissionRejected(lane, reason, retry_after)
+
+    def _grant_waiting(self) -> None:
+        """Hand free slots to queued requests, interactive ones first."""
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._active < self._slots(lane):
+                waiter = waiters.popleft()
+                ADMISSION_QUEUE_DEPTH.labels(lane).dec()
+                if waiter.done():
+                    continue
+                self._active += 1
+                ADMISSION_ACTIVE.inc()
+                waiter.set_result(None)
+
+    def _release(self) -> None:
+        """Give a slot back."""
+        self._active -= 1
+        ADMISSION_ACTIVE.dec()
+        self._grant_waiting()
+
+    async def _acquire(self, lane: str) -> None:
+        """
+        Take a slot in `lane`, waiting in its queue if needed.
+
+        Raises:
+            AdmissionRejected: If the wait would be, or turned out, too long
+        """
+        if self._active < self._slots(lane) and not self._ahead(lane):
+            self._active += 1
+            ADMISSION_ACTIVE.inc()
+            ADMISSION_WAIT.labels(lane).observe(0.0)
+            return
+
+        max_wait = self.max_wait[lane]
+        remaining = deadline_remaining()
+        if remaining is not None:
+            max_wait = min(max_wait, remaining)
+        expected = self.expected_wait(lane)
+        if len(self._waiters[lane]) >= self.max_queue:
+            raise self._reject(lane, "queue_full", expected)
+        if expected > max_wait:
+            raise self._reject(lane, "queue_wait", expected)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(lane).inc()
+        started_at = time.monotonic()
+        try:
+            async with asyncio.timeout(max_wait):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we gave up; pass it on
+                self._release()
+            elif waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+                ADMISSION_QUEUE_DEPTH.labels(lane).dec()
+            if isinstance(e, TimeoutError):
+                raise self._reject(lane, "queue_wait", self.expected_wait(lane)) from e
+            raise
+        waited = time.monotonic() - started_at
+        ADMISSION_WAIT.labels(lane).observe(waited)
+        record_stage("queue", waited)
+
+    @asynccontextmanager
+    async def admit(self, lane: str = LANE_INTERACTIVE) -> AsyncIterator[None]:
+        """
+        Hold a slot while the block runs.
+
+        Args:
+            lane: "interactive" or "bulk"
+
+        Raises:
+            AdmissionRejected: If the request is not admitted
+        """
+        await self._acquire(lane)
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_time += 0.1 * (time.monotonic() - started_at - self._service_time)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load of the controller."""
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": {lane: len(self._waiters[lane]) for lane in LANES},
+            "expected_wait_seconds": {lane: self.expected_wait(lane) for lane in LANES},
+            "rejected": dict(self.rejected),
+        }
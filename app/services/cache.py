@@ -0,0 +1,211 @@
+"""Two-tier cache for classification results (in-memory LRU + SQLite)."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.text_utils import normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+def _decode(value: str) -> Dict[str, Any]:
+    """Rebuild a result stored as JSON (a fresh copy every time)."""
+    result: Dict[str, Any] = json.loads(value)
+    return result
+
+
+def make_cache_key(project_title: str, *scope: str) -> str:
+    """
+    Build the cache key for a project title.
+
+    Args:
+        project_title: The project title to classify
+        scope: Values that invalidate the entry when they change
+            (model name, categories hash, ...)
+
+    Returns:
+        Hex digest identifying the classification
+    """
+    raw = "\x1f".join([normalize_title(project_title), *scope])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _SQLiteStore:
+    """Persistent key/value store backing the in-memory cache."""
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the SQLite database.
+
+        Args:
+            db_path: Path of the SQLite file
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM classifications WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the stored value and expiry time, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM classifications WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        """Insert or replace a value."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove a value."""
+        with self._lock:
+            self._conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class ClassificationCache:
+    """
+    LRU/TTL cache of classification results with an optional disk tier.
+
+    Entries live in memory up to `max_entries`; the least recently used entry
+    is evicted beyond that. When a `db_path` is given every entry is also
+    written to SQLite, so the cache survives restarts and cold starts.
+    Error payloads are never stored.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl_seconds: Time to live of every entry
+            db_path: SQLite file for the persistent tier (None or "" to disable)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._store = _SQLiteStore(db_path) if db_path else None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a classification result.
+
+        Args:
+            key: Cache key from `make_cache_key`
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _decode(value)
+            del self._entries[key]
+            self.expirations += 1
+
+        if self._store is not None:
+            stored = await asyncio.to_thread(self._store.get, key)
+            if stored is not None:
+                value, expires_at = stored
+                if expires_at > now:
+                    self._remember(key, value, expires_at)
+                    self.disk_hits += 1
+                    return _decode(value)
+                self.expirations += 1
+                await asyncio.to_thread(self._store.delete, key)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a classification result.
+
+        Results carrying an "error" are ignored.
+
+        Args:
+            key: Cache key from `make_cache_key`
+            result: Classification result to store
+        """
+        if result.get("error"):
+            return
+
+        value = json.dumps(result, ensure_ascii=False)
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.set, key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist cache entry: {str(e)}")
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Insert into the memory tier, evicting the least recently used entries."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with sizes and hit/miss/eviction counters
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._store is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Release the persistent tier."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,182 @@
+"""Versioned category definitions with everything derived from them, reloadable at runtime."""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.categories import DEFAULT_CATEGORIES_CSV, hash_categories, load_categories
+from app.services.prompts import PromptTemplate, compile_prompt_template
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CategorySet:
+    """
+    One version of the category definitions and the data derived from them.
+
+    Built once per version and never modified, so a request that grabbed a
+    set keeps using consistent definitions, prompts and maps even if a
+    reload swaps in a newer one meanwhile.
+    """
+
+    definitions: Dict[str, dict]
+    hash: str
+    version: str
+    id_to_name: Dict[int, str]
+    name_to_id: Dict[str, int]
+    prompt_template: PromptTemplate
+    compact_prompt_template: PromptTemplate
+    # Body of GET /categories, serialized once per version
+    payload: bytes
+
+    @classmethod
+    def build(cls, definitions: Dict[str, dict]) -> "CategorySet":
+        """
+        Derive everything from a set of definitions.
+
+        Args:
+            definitions: Category definitions keyed by name
+
+        Returns:
+            The category set
+
+        Raises:
+            ValueError: If there are no categories or two share an id
+        """
+        if not definitions:
+            raise ValueError("No categories defined")
+        id_to_name = {category["id"]: name for name, category in definitions.items()}
+        if len(id_to_name) != len(definitions):
+            raise ValueError("Category ids must be unique")
+
+        content_hash = hash_categories(definitions)
+        version = content_hash[:12]
+        payload = {"categories": definitions, "total": len(definitions), "version": version}
+        return cls(
+            definitions=definitions,
+            hash=content_hash,
+            version=version,
+            id_to_name=id_to_name,
+            name_to_id={name: category_id for category_id, name in id_to_name.items()},
+            prompt_template=compile_prompt_template(definitions),
+            compact_prompt_template=compile_prompt_template(definitions, compact=True),
+            payload=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def template(self, detail: str = "full") -> PromptTemplate:
+        """Prompt template for a level of detail ("full" or "compact")."""
+        return self.compact_prompt_template if detail == "compact" else self.prompt_template
+
+
+class CategoryRegistry:
+    """
+    Category definitions loaded from a CSV and reloaded when it changes.
+
+    A reload builds a complete new `CategorySet` before swapping it in with
+    a single assignment; readers never see a half-updated state. A file that
+    fails to load or validate is logged and ignored, and the previous set
+    stays in use.
+    """
+
+    def __init__(self, csv_path: str = DEFAULT_CATEGORIES_CSV):
+        """
+        Load the categories.
+
+        Args:
+            csv_path: CSV with the category definitions
+
+        Raises:
+            OSError, KeyError, ValueError: If the initial file is invalid
+        """
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[CategorySet], None]] = []
+        self._mtime = os.stat(csv_path).st_mtime_ns
+        self._current = CategorySet.build(load_categories(csv_path))
+        logger.info(f"Loaded {len(self._current.definitions)} categories ({self._current.version})")
+
+    @property
+    def current(self) -> CategorySet:
+        """The category set in use."""
+        return self._current
+
+    def on_change(self, listener: Callable[[CategorySet], None]) -> None:
+        """Call `listener` with the new set after every reload that changed it."""
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """
+        Load the CSV again if it was modified since the last load.
+
+        Returns:
+            True if a new version was swapped in
+        """
+        loaded = self._load()
+        return loaded is not None and self._publish(*loaded)
+
+    def _load(self) -> Optional[Tuple[int, CategorySet]]:
+        """
+        Read and build the CSV if it was modified since the last load.
+
+        Only reads the file, so it can run in a worker thread; `_publish`
+        swaps the result in.
+
+        Returns:
+            The file's modification time and its category set, or None if
+            the file is unchanged or invalid
+        """
+        try:
+            mtime = os.stat(self.csv_path).st_mtime_ns
+            if mtime == self._mtime:
+                return None
+            return mtime, CategorySet.build(load_categories(self.csv_path))
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Keeping categories {self._current.version}; reload failed: {e}")
+            return None
+
+    def _publish(self, mtime: int, categories: CategorySet) -> bool:
+        """
+        Swap in a loaded category set and notify the listeners.
+
+        Args:
+            mtime: Modification time of the file the set was loaded from
+            categories: The loaded set
+
+        Returns:
+            True if the set differs from the one in use
+        """
+        with self._lock:
+            self._mtime = mtime
+            if categories.hash == self._current.hash:
+                return False
+            previous, self._current = self._current, categories
+
+        logger.info(f"Categories reloaded: {previous.version} -> {categories.version}")
+        for listener in self._listeners:
+            try:
+                listener(categories)
+            except Exception as e:
+                logger.error(f"Category reload listener failed: {str(e)}", exc_info=True)
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """
+        Check the CSV for changes every `interval` seconds until cancelled.
+
+        The file is read and parsed in a worker thread; the new set is
+        swapped in and the listeners are called on the event loop, so they
+        can safely replace state the loop is using.
+
+        Args:
+            interval: Seconds between checks
+        """
+        while True:
+            await asyncio.sleep(interval)
+            loaded = await asyncio.to_thread(self._load)
+            if loaded is not None:
+                self._publish(*loaded)
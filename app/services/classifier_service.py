@@ -1,17 +1,67 @@
 """Classifier service using Gemini API."""
 
+import asyncio
 import json
 import logging
 import time
-from typing import Any, Dict
+from datetime import timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type, TypeVar
 
-import google.generativeai as genai
+from pydantic import BaseModel, ValidationError
 
 from app.core.config import settings
-from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.core.metrics import (
+    CASCADE_ANSWERS,
+    CASCADE_ESCALATIONS,
+    GEMINI_CREDENTIAL_CALLS,
+    GEMINI_FAILURES,
+    GEMINI_HEDGES,
+    GEMINI_IN_FLIGHT,
+    GEMINI_OUTPUT_REPAIRS,
+    GEMINI_RETRIES,
+    GEMINI_TOKENS,
+)
+from app.core.timing import timed_stage
+from app.models.categories import DEFAULT_CATEGORIES_CSV
+from app.models.schemas import (
+    BatchClassificationOutput,
+    ClassificationOutput,
+    CompactBatchClassificationOutput,
+    CompactClassificationOutput,
+    Detail,
+)
+from app.services.cache import ClassificationCache, make_cache_key
+from app.services.category_registry import CategoryRegistry, CategorySet
+from app.services.credential_pool import CredentialPool, PoolMember
+from app.services.gemini_client import LazyGenerativeModel, load_genai
+from app.services.json_repair import repair_classification, repair_json, repair_labels
+from app.services.label_stream import LabelStreamParser, StreamEvent
+from app.services.lexical_classifier import LexicalClassifier, category_vocabulary
+from app.services.prompts import INVALID_OUTPUT_REMINDER, PromptTemplate
+from app.services.resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    HedgePolicy,
+    UpstreamFailure,
+    backoff_delay,
+    classify_failure,
+    deadline_remaining,
+)
+from app.services.similarity_index import SimilarityIndex
+from app.services.singleflight import SingleFlight
+from app.services.structured_output import json_generation_config
 
 logger = logging.getLogger(__name__)
 
+OutputT = TypeVar("OutputT", bound=BaseModel)
+
+# Rough size of a Gemini token in Spanish text, and the output allowance of a
+# classification, used to charge requests against the TPM quota
+_CHARS_PER_TOKEN = 4
+_EXPECTED_OUTPUT_TOKENS = 256
+# Time a key rejected as invalid or unauthorized stays out of the credential pool
+_AUTH_FAILURE_BENCH_SECONDS = 300.0
+
 
 class ClassifierService:
     """Service for classifying project titles using Gemini AI."""
@@ -19,13 +69,149 @@ class ClassifierService:
     def __init__(self):
         """Initialize the classifier service."""
         try:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(settings.GEMINI_MODEL_NAME)
-            logger.info(f"Gemini API configured with model: {settings.GEMINI_MODEL_NAME}")
+            if settings.GEMINI_BACKEND == "fake":
+                logger.warning("Using the fake Gemini backend; results are simulated")
+            # Cascade tiers, cheapest first; later tiers only see uncertain titles
+            self.model_names: List[str] = [
+                name.strip() for name in settings.GEMINI_CASCADE_MODELS.split(",") if name.strip()
+            ] or [settings.GEMINI_MODEL_NAME]
+            # Categories and their compiled prompts; reloaded when the CSV changes
+            self.categories = CategoryRegistry(
+                settings.CATEGORIES_CSV_PATH or DEFAULT_CATEGORIES_CSV
+            )
+            self.model = self._build_model(self.model_names[0])
+            self.escalation_models = [self._build_model(name) for name in self.model_names[1:]]
+            self.categories.on_change(self._on_categories_changed)
+            definitions = self.categories.current.definitions
+            # Constrain answers to the output schemas so they parse in one pass
+            self._generation_config: Optional[Dict[str, Any]] = None
+            self._batch_generation_config: Optional[Dict[str, Any]] = None
+            # Compact answers are a few tokens per label, so their output is capped
+            compact_tokens = settings.GEMINI_COMPACT_MAX_OUTPUT_TOKENS
+            self._compact_generation_config: Dict[str, Any] = {"max_output_tokens": compact_tokens}
+            self._compact_batch_generation_config: Dict[str, Any] = {}
+            if settings.GEMINI_STRUCTURED_OUTPUT:
+                self._generation_config = json_generation_config(ClassificationOutput)
+                self._batch_generation_config = json_generation_config(BatchClassificationOutput)
+                self._compact_generation_config = json_generation_config(
+                    CompactClassificationOutput, max_output_tokens=compact_tokens
+                )
+                self._compact_batch_generation_config = json_generation_config(
+                    CompactBatchClassificationOutput
+                )
+            self._context_model: Optional[Any] = None
+            self._context_model_expires_at = 0.0
+            self._context_model_lock = asyncio.Lock()
+            # Answers formulaic titles locally before any cache or model lookup
+            self.lexical_classifier: Optional[LexicalClassifier] = None
+            if settings.LEXICAL_CLASSIFIER_ENABLED:
+                self.lexical_classifier = LexicalClassifier(definitions)
+            # Caps the number of Gemini calls in flight for this process
+            self._upstream_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+            # API keys to spread calls over; each keeps its RPM/TPM quota and
+            # stops being called while it fails
+            self.pool = CredentialPool.from_settings()
+            # Sends a backup copy of calls slower than most recent ones
+            self.hedge_policy = HedgePolicy(
+                percentile=settings.GEMINI_HEDGE_PERCENTILE,
+                max_rate=settings.GEMINI_HEDGE_MAX_RATE,
+                min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES,
+            )
+            # Identical titles classified concurrently share one upstream call
+            self._inflight = SingleFlight()
+            self.cache: Optional[ClassificationCache] = None
+            if settings.CACHE_ENABLED:
+                self.cache = ClassificationCache(
+                    max_entries=settings.CACHE_MAX_ENTRIES,
+                    ttl_seconds=settings.CACHE_TTL_SECONDS,
+                    db_path=settings.CACHE_DB_PATH or None,
+                )
+            # Reuses the labels of near-identical titles classified before
+            self.similarity_index: Optional[SimilarityIndex] = None
+            if settings.SIMILARITY_INDEX_ENABLED:
+                self.similarity_index = self._build_similarity_index(definitions)
+                if settings.SIMILARITY_INDEX_PATH:
+                    self.similarity_index.load(
+                        settings.SIMILARITY_INDEX_PATH, self._similarity_scope()
+                    )
+            logger.info(f"Gemini models: {', '.join(self.model_names)}")
+            if len(self.pool.members) > 1:
+                logger.info(f"Gemini credential pool: {len(self.pool.members)} keys")
+            logger.info(
+                f"Prompt prefix compiled ({len(self.prompt_template.prefix)} chars, "
+                f"sha256 {self.prompt_template.fingerprint[:12]})"
+            )
         except Exception as e:
             logger.error(f"Failed to configure Gemini API: {str(e)}")
             raise
 
+    def _build_model(self, model_name: str) -> Any:
+        """Create the client of one Gemini model (or its fake stand-in)."""
+        if settings.GEMINI_BACKEND == "fake":
+            from app.services.fake_model import FakeGenerativeModel
+
+            return FakeGenerativeModel(
+                latency_ms=settings.FAKE_MODEL_LATENCY_MS,
+                error_rate=settings.FAKE_MODEL_ERROR_RATE,
+                malformed_rate=settings.FAKE_MODEL_MALFORMED_RATE,
+                categories=self.categories,
+            )
+        # The SDK is only imported on the first call (or by `warm_up`)
+        return LazyGenerativeModel(model_name)
+
+    @staticmethod
+    def _build_similarity_index(definitions: Dict[str, dict]) -> SimilarityIndex:
+        """Create an empty similarity index for a set of categories."""
+        return SimilarityIndex(
+            vocabulary=category_vocabulary(definitions),
+            dim=settings.SIMILARITY_INDEX_DIM,
+            max_bytes=settings.SIMILARITY_INDEX_MAX_MB * 1024**2,
+        )
+
+    def _on_categories_changed(self, categories: CategorySet) -> None:
+        """
+        Rebuild the local shortcuts after a category reload.
+
+        Cached results need no flush: their keys include the categories
+        hash. The similarity index holds labels of the old definitions, so it
+        starts over, and the context cache is recreated with the new prefix.
+        """
+        self._context_model_expires_at = 0.0
+        if self.lexical_classifier is not None:
+            self.lexical_classifier = LexicalClassifier(categories.definitions)
+        if self.similarity_index is not None:
+            self.similarity_index = self._build_similarity_index(categories.definitions)
+
+    @property
+    def prompt_template(self) -> PromptTemplate:
+        """Prompt template of the current categories."""
+        return self.categories.current.prompt_template
+
+    @property
+    def compact_prompt_template(self) -> PromptTemplate:
+        """Prompt template of the current categories, without justifications."""
+        return self.categories.current.compact_prompt_template
+
+    async def warm_up(self) -> None:
+        """
+        Prepare the model clients ahead of the first request.
+
+        Imports the Gemini SDK, builds the client of every cascade tier and
+        creates the context cache of the prompt prefix when it is enabled.
+        Meant to run in the background once the service is already serving.
+        """
+        for model in (self.model, *self.escalation_models):
+            if isinstance(model, LazyGenerativeModel):
+                await asyncio.to_thread(model.load)
+        await self._get_context_model()
+
+    def close(self) -> None:
+        """Release resources held by the service."""
+        if self.cache is not None:
+            self.cache.close()
+        if self.similarity_index is not None and settings.SIMILARITY_INDEX_PATH:
+            self.similarity_index.save(settings.SIMILARITY_INDEX_PATH, self._similarity_scope())
+
     def get_categories(self) -> Dict[str, str]:
         """
         Get all available classification categories.
@@ -33,95 +219,64 @@ class ClassifierService:
         Returns:
             Dictionary of category names and definitions
         """
-        return DEFINICIONES_DE_CATEGORIAS.copy()
+        return self.categories.current.definitions.copy()
+
+    def _single_generation_config(self, detail: Detail) -> Optional[Dict[str, Any]]:
+        """Generation config of a single-title call."""
+        return self._compact_generation_config if detail == "compact" else self._generation_config
 
-    def _build_prompt(self, project_title: str) -> str:
+    def _chunk_generation_config(self, titles: int, detail: Detail) -> Optional[Dict[str, Any]]:
+        """Generation config of a call packing `titles` titles."""
+        if detail != "compact":
+            return self._batch_generation_config
+        return {
+            **self._compact_batch_generation_config,
+            "max_output_tokens": settings.GEMINI_COMPACT_MAX_OUTPUT_TOKENS * titles,
+        }
+
+    def _build_prompt(
+        self,
+        project_title: str,
+        detail: Detail = "full",
+        categories: Optional[CategorySet] = None,
+    ) -> str:
         """
         Build the classification prompt for Gemini.
 
         Args:
             project_title: The project title to classify
+            detail: "full" asks for justifications, "compact" only for ids
+            categories: Category set to use (defaults to the current one)
 
         Returns:
             Formatted prompt string
         """
-        project_title = str(project_title).strip()
+        categories = categories or self.categories.current
+        return categories.template(detail).render(project_title)
 
-        category_text_parts = []
-        for name, category_info in DEFINICIONES_DE_CATEGORIAS.items():
-            category_id = category_info["id"]
-            definition = category_info["definicion"]
-            category_text_parts.append(
-                f"- ID: {category_id}\n"
-                f"  NOMBRE: {name}\n"
-                f"  DEFINICION: {definition.strip()}\n"
-            )
-        categories_text = "\n".join(category_text_parts)
-
-        prompt = f"""
-Eres un modelo de lenguaje experto en clasificación de títulos de proyectos públicos
-según brechas de infraestructura y servicios definidas por el SNPMGI del Perú.
-
-Tu única tarea es leer el título del proyecto y asignarle UNA O VARIAS categorías
-de servicios publicos de la lista definida abajo.
-
-CATEGORÍAS DISPONIBLES:
-{categories_text}
-
-REGLAS ESTRICTAS:
-- Analiza el significado del título del proyecto, no solo palabras sueltas.
-- Asigna múltiples categorías solo si el título realmente cubre más de una brecha.
-- No inventes información adicional que no esté presente o inferida razonablemente del título del proyecto.
-
-FORMATO DE RESPUESTA (OBLIGATORIO):
-Responde ÚNICAMENTE con JSON válido, sin texto adicional, sin explicaciones, sin backticks.
-Ejemplo de formato:
-
-{{
-  "labels": [
-    {{
-      "label": "NOMBRE_DE_CATEGORIA_1",
-      "id": 1,
-      "confianza": 0.95,
-      "justificacion": "Texto de la justificación"
-    }},
-    {{
-      "label": "NOMBRE_DE_CATEGORIA_2",
-      "id": 3,
-      "confianza": 0.98,
-      "justificacion": "Texto de la justificación"
-    }}
-  ]
-}}
-
-donde:
-- "labels" es una lista de objetos.
-- "label" es el nombre de la categoría seleccionada.
--"id": es el identificador numérico único asignado a cada categoría. Debes devolver exactamente el id asociado a la categoría, según la lista de categorías proporcionada en el prompt.
-- "confianza": representa el nivel de certeza del modelo sobre la asignación de una categoría. Debe ser un valor numérico entre 0 y 1, donde:
-1.0 indica certeza máxima basada en una alta coincidencia semántica con la definición de la categoría,
-0.7 a 0.9 indica coincidencia fuerte pero no absoluta,
-0.4 a 0.6 indica coincidencia débil o parcialmente relacionada,
-< 0.4 indica baja certeza; la categoría probablemente no aplica.
-- "justificacion": explica por qué el proyecto fue clasificado en esa categoria usando unicamente la DEFINICIÓN de la categoria. máximo 200 palabras.
-
-Si el título del proyecto es ambiguo o no coincide con ninguna definición, debes devolver:
-
-{{
-  "labels": [
-    {{
-      "label": "NO_CLASIFICADO",
-      "id": 0,
-      "confianza": 0.0,
-      "justificacion": "El texto no es suficiente o no coincide con ninguna categoría."
-    }}
-  ]
-}}
-
-TEXTO A CLASIFICAR:
-\"\"\"{project_title}\"\"\"
-"""
-        return prompt
+    def _build_batch_prompt(
+        self,
+        project_titles: List[str],
+        detail: Detail = "full",
+        categories: Optional[CategorySet] = None,
+    ) -> str:
+        """
+        Build a prompt that classifies several titles in a single call.
+
+        The category block is sent once per chunk instead of once per title.
+        The prompt shares its instructions and categories with single-title
+        prompts but has an output format of its own.
+
+        Args:
+            project_titles: Project titles to classify, in order
+            detail: "full" asks for justifications, "compact" only for ids
+            categories: Category set to use (defaults to the current one)
+
+        Returns:
+            Formatted prompt string
+        """
+        categories = categories or self.categories.current
+        return categories.template(detail).render_batch(project_titles)
 
     def _extract_json_from_response(self, text: str) -> str:
         """
@@ -160,60 +315,1091 @@ TEXTO A CLASIFICAR:
         obj = json.loads(s)
         return json.dumps(obj, ensure_ascii=False)
 
-    async def classify(self, project_title: str) -> Dict[str, Any]:
+    async def _generate_content(
+        self,
+        prompt: str,
+        model: Any = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        member: Optional[PoolMember] = None,
+    ) -> str:
+        """
+        Send a prompt to Gemini without blocking the event loop.
+
+        Args:
+            prompt: Full prompt to send to the model
+            model: Model to call (defaults to the first cascade tier)
+            generation_config: Generation options (output schema, token cap)
+            member: Credential to call with (defaults to the first one)
+
+        Returns:
+            Stripped response text (empty string if the model returned nothing)
+        """
+        if model is None:
+            model = self.model
+        if member is None:
+            member = self.pool.members[0]
+        # The context cache belongs to the default key
+        context_model = None
+        if model is self.model and member.uses_default_key:
+            context_model = await self._get_context_model()
+        if context_model is not None and prompt.startswith(self.prompt_template.prefix):
+            # The static prefix already lives in the provider-side cache
+            model = context_model
+            prompt = prompt[len(self.prompt_template.prefix) :]
+        else:
+            model = member.client(model)
+
+        async with self._upstream_slots:
+            GEMINI_IN_FLIGHT.inc()
+            member.in_flight += 1
+            member.calls += 1
+            try:
+                with timed_stage("upstream"):
+                    response = await model.generate_content_async(
+                        prompt, generation_config=generation_config
+                    )
+            except Exception as e:
+                member.failures += 1
+                GEMINI_CREDENTIAL_CALLS.labels(member.name, classify_failure(e).cause).inc()
+                raise
+            finally:
+                GEMINI_IN_FLIGHT.dec()
+                member.in_flight -= 1
+        GEMINI_CREDENTIAL_CALLS.labels(member.name, "ok").inc()
+        self._record_usage(response, member)
+        return (response.text or "").strip()
+
+    @staticmethod
+    def _record_usage(response: Any, member: PoolMember) -> None:
+        """Count the tokens reported by a Gemini response."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        GEMINI_TOKENS.labels("prompt").inc(usage.prompt_token_count or 0)
+        GEMINI_TOKENS.labels("cached").inc(usage.cached_content_token_count or 0)
+        GEMINI_TOKENS.labels("response").inc(usage.candidates_token_count or 0)
+        member.record_usage(usage.prompt_token_count or 0, usage.candidates_token_count or 0)
+        logger.debug(
+            "Prompt tokens: %s, cached tokens: %s",
+            usage.prompt_token_count,
+            usage.cached_content_token_count,
+        )
+
+    async def _stream_content(
+        self,
+        prompt: str,
+        generation_config: Optional[Dict[str, Any]],
+        on_chunk: Callable[[str], None],
+    ) -> str:
+        """
+        Send a prompt to the first cascade tier, passing on its answer as it is written.
+
+        Quota, the credential pool, the circuit breaker and the request
+        deadline apply as to any other call, but a failed stream is not
+        retried: callers fall back to the non-streaming path, which is. The
+        Gemini context cache is not used.
+
+        Args:
+            prompt: Full prompt to send to the model
+            generation_config: Generation options (output schema, token cap)
+            on_chunk: Called with every piece of the answer
+
+        Returns:
+            The whole answer
+
+        Raises:
+            CircuitOpenError: If upstream is failing with every key
+            DeadlineExceeded: If the request deadline expired
+            Exception: The upstream error
+        """
+        output_tokens = (generation_config or {}).get("max_output_tokens", _EXPECTED_OUTPUT_TOKENS)
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= 0:
+            raise self._deadline_exceeded()
+        try:
+            with timed_stage("quota"):
+                async with asyncio.timeout(remaining):
+                    member = await self.pool.acquire(
+                        len(prompt) // _CHARS_PER_TOKEN + output_tokens
+                    )
+        except TimeoutError:
+            raise self._deadline_exceeded()
+        model = member.client(self.model)
+
+        chunks: List[str] = []
+        call_timeout = asyncio.timeout(deadline_remaining())
+        async with self._upstream_slots:
+            GEMINI_IN_FLIGHT.inc()
+            member.in_flight += 1
+            member.calls += 1
+            try:
+                with timed_stage("upstream"):
+                    async with call_timeout:
+                        response = await model.generate_content_async(
+                            prompt, generation_config=generation_config, stream=True
+                        )
+                        if hasattr(response, "__aiter__"):
+                            async for chunk in response:
+                                try:
+                                    text = chunk.text
+                                except ValueError:
+                                    # Chunks carrying only the finish reason have no text
+                                    continue
+                                chunks.append(text)
+                                on_chunk(text)
+                        else:
+                            chunks.append(response.text or "")
+                            on_chunk(chunks[-1])
+            except asyncio.CancelledError:
+                member.circuit_breaker.release()
+                raise
+            except Exception as e:
+                member.failures += 1
+                if call_timeout.expired():
+                    member.circuit_breaker.release()
+                    raise self._deadline_exceeded() from e
+                failure = self._record_failure(member, e)
+                GEMINI_CREDENTIAL_CALLS.labels(member.name, failure.cause).inc()
+                raise
+            finally:
+                GEMINI_IN_FLIGHT.dec()
+                member.in_flight -= 1
+
+        member.circuit_breaker.record_success()
+        GEMINI_CREDENTIAL_CALLS.labels(member.name, "ok").inc()
+        self._record_usage(response, member)
+        return "".join(chunks).strip()
+
+    async def _get_context_model(self) -> Optional[Any]:
+        """
+        Get a model bound to a Gemini context cache holding the prompt prefix.
+
+        The cached content is created lazily and recreated shortly before it
+        expires. If it cannot be created (e.g. the prefix is below the model's
+        minimum cacheable size) the full prompt is sent instead and creation is
+        retried later.
+
+        Returns:
+            Model using the cached prefix, or None if context caching is off
+        """
+        if not settings.GEMINI_CONTEXT_CACHE_ENABLED or settings.GEMINI_BACKEND == "fake":
+            return None
+        if time.time() < self._context_model_expires_at:
+            return self._context_model
+
+        async with self._context_model_lock:
+            if time.time() < self._context_model_expires_at:
+                return self._context_model
+
+            ttl = settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+            try:
+                genai = await asyncio.to_thread(load_genai)
+                cached_content = await asyncio.to_thread(
+                    genai.caching.CachedContent.create,
+                    model=self.model_names[0],
+                    display_name=f"brecha-prompt-{self.prompt_template.fingerprint[:12]}",
+                    contents=[self.prompt_template.prefix],
+                    ttl=timedelta(seconds=ttl),
+                )
+                self._context_model = genai.GenerativeModel.from_cached_content(cached_content)
+                # Refresh a minute early so requests never hit an expired cache
+                self._context_model_expires_at = time.time() + max(ttl - 60, 0)
+                logger.info(f"Gemini context cache created: {cached_content.name}")
+            except Exception as e:
+                logger.warning(f"Failed to create Gemini context cache: {str(e)}")
+                self._context_model = None
+                self._context_model_expires_at = time.time() + 300
+
+        return self._context_model
+
+    async def _generate_hedged(
+        self,
+        prompt: str,
+        model: Any,
+        generation_config: Optional[Dict[str, Any]],
+        estimated_tokens: int,
+        member: PoolMember,
+    ) -> str:
+        """
+        Make one upstream call, hedged with a backup copy if it is slow.
+
+        If the call is still running after the delay chosen by the hedge
+        policy (and a credential has quota available right away), a second
+        identical call is sent, possibly with another key; the first
+        successful answer wins and the other is cancelled.
+
+        Every copy's outcome goes to the circuit breaker of the member it was
+        made with. When no copy succeeds, the first call's error is raised
+        and left for the caller to report.
+
+        Args:
+            prompt: Full prompt to send to the model
+            model: Model to call
+            generation_config: Generation options (output schema, token cap)
+            estimated_tokens: Quota charged for the backup call
+            member: Credential of the first call
+
+        Returns:
+            Stripped response text
+        """
+        started_at = time.perf_counter()
+        hedge_after = self.hedge_policy.delay()
+        if hedge_after is None:
+            text = await self._generate_content(prompt, model, generation_config, member)
+            member.circuit_breaker.record_success()
+            self.hedge_policy.record(time.perf_counter() - started_at, hedged=False)
+            return text
+
+        primary = asyncio.ensure_future(
+            self._generate_content(prompt, model, generation_config, member)
+        )
+        calls = {primary}
+        try:
+            done, _ = await asyncio.wait(calls, timeout=hedge_after)
+            backup_member = None if done else self.pool.try_acquire(estimated_tokens)
+            if backup_member is not None:
+                logger.info("Hedging an upstream call still running after %.2fs", hedge_after)
+                calls.add(
+                    asyncio.ensure_future(
+                        self._generate_backup(prompt, model, generation_config, backup_member)
+                    )
+                )
+
+            hedged = len(calls) > 1
+            while True:
+                done, pending = await asyncio.wait(calls, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((call for call in done if not call.exception()), None)
+                if winner is not None or not pending:
+                    break
+                calls = pending
+
+            if hedged:
+                outcome = "failed" if winner is None else "lost" if winner is primary else "won"
+                GEMINI_HEDGES.labels(outcome).inc()
+            if winner is None:
+                # Every copy failed; report the error of the first one
+                return primary.result()
+            error = primary.exception() if primary.done() else None
+            if winner is primary:
+                member.circuit_breaker.record_success()
+            elif error is not None:
+                self._record_failure(member, error)
+            else:
+                # The first call is cancelled before it could tell anything
+                member.circuit_breaker.release()
+            self.hedge_policy.record(time.perf_counter() - started_at, hedged)
+            return winner.result()
+        finally:
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+
+    async def _generate_backup(
+        self,
+        prompt: str,
+        model: Any,
+        generation_config: Optional[Dict[str, Any]],
+        member: PoolMember,
+    ) -> str:
+        """
+        Make the backup call of a hedged request.
+
+        Its outcome is reported to the member's circuit breaker as for any
+        other attempt (see `_generate_hedged` for the first call's).
+        """
+        try:
+            text = await self._generate_content(prompt, model, generation_config, member)
+        except asyncio.CancelledError:
+            member.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self._record_failure(member, e)
+            raise
+        member.circuit_breaker.record_success()
+        return text
+
+    def _record_failure(self, member: PoolMember, error: BaseException) -> UpstreamFailure:
+        """
+        Report a failed call to the member's circuit breaker and rotation.
+
+        A key that hit its quota is benched for the server's retry hint, and
+        one that was rejected for longer, unless it is the only key: benching
+        it would stop every call, not just the ones with that key.
+
+        Args:
+            member: Credential the call was made with
+            error: Exception raised by the call
+
+        Returns:
+            How the error should be handled
+        """
+        failure = classify_failure(error)
+        if failure.counts_against_upstream:
+            member.circuit_breaker.record_failure()
+        else:
+            member.circuit_breaker.release()
+        if failure.cause == "rate_limited":
+            member.bench(failure.retry_after or settings.GEMINI_RETRY_DELAY)
+        elif failure.cause == "auth" and len(self.pool.members) > 1:
+            member.bench(_AUTH_FAILURE_BENCH_SECONDS)
+        return failure
+
+    def _deadline_exceeded(self) -> DeadlineExceeded:
+        """Count and build the error raised when the request runs out of time."""
+        GEMINI_FAILURES.labels("deadline_exceeded").inc()
+        return DeadlineExceeded("The request deadline expired before the model answered")
+
+    async def _generate_with_retries(
+        self,
+        prompt: str,
+        model: Any = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Send a prompt to Gemini, retrying failed calls.
+
+        Every attempt picks a key from the credential pool and waits for its
+        RPM/TPM quota first. Retryable errors (quota, timeouts, server errors)
+        are retried with jittered exponential backoff that honours the
+        server's retry hint; request and auth errors are raised immediately.
+        A key that hits its quota or is rejected is taken out of rotation, and
+        while another key can take the call it is retried right away. While
+        the circuit breaker of every key is open no call is made.
+        Quota waits, calls and backoff all stop at the request deadline (see
+        `resilience.deadline`); a retry that could not finish in time is not
+        attempted.
+
+        Args:
+            prompt: Full prompt to send to the model
+            model: Model to call (defaults to the first cascade tier)
+            generation_config: Generation options (output schema, token cap)
+
+        Returns:
+            Stripped response text
+
+        Raises:
+            CircuitOpenError: If upstream is failing with every key and calls are paused
+            DeadlineExceeded: If the request deadline expired
+            Exception: The upstream error once it is not retryable or all
+                retries are exhausted
+        """
+        output_tokens = (generation_config or {}).get("max_output_tokens", _EXPECTED_OUTPUT_TOKENS)
+        estimated_tokens = len(prompt) // _CHARS_PER_TOKEN + output_tokens
+
+        for attempt in range(1, settings.GEMINI_MAX_RETRIES + 1):
+            remaining = deadline_remaining()
+            if remaining is not None and remaining <= 0:
+                raise self._deadline_exceeded()
+            try:
+                with timed_stage("quota"):
+                    async with asyncio.timeout(remaining):
+                        member = await self.pool.acquire(estimated_tokens)
+            except TimeoutError:
+                raise self._deadline_exceeded()
+            except CircuitOpenError:
+                GEMINI_FAILURES.labels("circuit_open").inc()
+                raise
+            call_timeout = asyncio.timeout(deadline_remaining())
+            try:
+                logger.info(
+                    "Classification attempt %d/%d with %s",
+                    attempt,
+                    settings.GEMINI_MAX_RETRIES,
+                    member.name,
+                )
+                async with call_timeout:
+                    text = await self._generate_hedged(
+                        prompt, model, generation_config, estimated_tokens, member
+                    )
+
+            except asyncio.CancelledError:
+                member.circuit_breaker.release()
+                raise
+
+            except Exception as e:
+                if call_timeout.expired():
+                    # Our own budget ran out; that says nothing about upstream health
+                    member.circuit_breaker.release()
+                    raise self._deadline_exceeded() from e
+                failure = self._record_failure(member, e)
+                logger.error(f"Attempt {attempt} failed ({failure.cause}): {str(e)}")
+                # Another key can take the call now; no need to wait for this one
+                switch_key = failure.cause in ("rate_limited", "auth") and self.pool.has_available(
+                    exclude=member
+                )
+                retryable = failure.retryable or switch_key
+                if not retryable or attempt >= settings.GEMINI_MAX_RETRIES:
+                    GEMINI_FAILURES.labels(failure.cause).inc()
+                    raise
+                delay = 0.0
+                if not switch_key:
+                    delay = backoff_delay(
+                        attempt,
+                        settings.GEMINI_RETRY_DELAY,
+                        settings.GEMINI_RETRY_MAX_DELAY,
+                        failure.retry_after,
+                    )
+                remaining = deadline_remaining()
+                if remaining is not None and delay >= remaining:
+                    raise self._deadline_exceeded() from e
+                GEMINI_RETRIES.labels(failure.cause).inc()
+                with timed_stage("backoff"):
+                    await asyncio.sleep(delay)
+
+            else:
+                return text
+
+        raise RuntimeError("Classification failed after all retries")
+
+    async def classify(self, project_title: str, detail: Detail = "full") -> Dict[str, Any]:
         """
         Classify a project title.
 
         Args:
             project_title: The project title to classify
+            detail: "full" includes a justification per label; "compact" asks
+                the model for ids and confidences only, which is much faster
 
         Returns:
             Classification result as dictionary
 
         Raises:
             ValueError: If project title is empty
-            Exception: If classification fails after retries
         """
         if not project_title or not project_title.strip():
             raise ValueError("Project title cannot be empty")
 
-        prompt = self._build_prompt(project_title)
+        cache_key = self._cache_key(project_title, detail)
+        result = await self._classify_without_model(project_title, cache_key)
+        if result is not None:
+            return result
 
-        for attempt in range(1, settings.GEMINI_MAX_RETRIES + 1):
-            try:
-                logger.info(f"Classification attempt {attempt}/{settings.GEMINI_MAX_RETRIES}")
+        return await self._inflight.do(
+            cache_key, lambda: self._classify_and_store(project_title, cache_key, detail)
+        )
 
-                response = self.model.generate_content(prompt)
-                text = (response.text or "").strip()
+    async def classify_stream(
+        self, project_title: str, detail: Detail = "full"
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Classify a project title, yielding its labels while the model writes them.
 
-                try:
-                    json_clean = self._extract_json_from_response(text)
-                    result = json.loads(json_clean)
+        Yields ("label", ...) as soon as a label's name, id and confidence are
+        complete and ("justificacion", ...) with every new piece of its
+        justification (see `LabelStreamParser`), then ("result", ...) with
+        the same result `classify` returns. Streamed labels are a preview:
+        the result is parsed, repaired and escalated like any other answer,
+        so it is the one to keep. If the stream fails, the title is
+        classified again without streaming before the result is yielded.
 
-                    logger.info(f"Classification successful on attempt {attempt}")
-                    return result
+        Titles answered without the model (lexical classifier, cache,
+        similarity index) yield their labels and result right away.
 
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON response on attempt {attempt}: {str(e)}")
-                    return {
-                        "labels": [],
-                        "error": "La respuesta del modelo no es JSON válido",
-                        "detalle_error": str(e),
-                        "raw_response": text,
-                    }
+        Args:
+            project_title: The project title to classify
+            detail: "full" includes a justification per label; "compact" asks
+                the model for ids and confidences only
 
-            except Exception as e:
-                logger.error(f"Attempt {attempt} failed: {str(e)}")
-                if attempt < settings.GEMINI_MAX_RETRIES:
-                    time.sleep(settings.GEMINI_RETRY_DELAY)
+        Yields:
+            (event, data) pairs
+
+        Raises:
+            ValueError: If project title is empty
+        """
+        if not project_title or not project_title.strip():
+            raise ValueError("Project title cannot be empty")
+
+        cache_key = self._cache_key(project_title, detail)
+        result = await self._classify_without_model(project_title, cache_key)
+        if result is None:
+            categories = self.categories.current
+            with timed_stage("prompt"):
+                prompt = self._build_prompt(project_title, detail, categories)
+
+            chunks: asyncio.Queue = asyncio.Queue()
+            call = asyncio.ensure_future(
+                self._stream_content(
+                    prompt, self._single_generation_config(detail), chunks.put_nowait
+                )
+            )
+            call.add_done_callback(lambda _: chunks.put_nowait(None))
+            parser = LabelStreamParser()
+            try:
+                while (chunk := await chunks.get()) is not None:
+                    for event in parser.feed(chunk):
+                        yield event
+                text = await call
+                with timed_stage("parse"):
+                    result = self._parse_classification(text, detail)
+                result.update(model=self.model_names[0], tier=1)
+                result["categories_version"] = categories.version
+                reason = self._escalation_reason(result) if self.escalation_models else None
+                if reason is None:
+                    CASCADE_ANSWERS.labels(1).inc()
                 else:
-                    return {
-                        "labels": [],
-                        "error": "No se pudo obtener respuesta del modelo luego de varios intentos.",
-                        "detalle_error": str(e),
-                    }
+                    CASCADE_ESCALATIONS.labels(1, reason).inc()
+                    result = await self._classify_uncached(
+                        project_title, first_tier=1, detail=detail, fallback=result
+                    )
+            except Exception as e:
+                logger.warning("Streamed classification failed (%s); retrying without streaming", e)
+                result = await self._classify_uncached(project_title, detail=detail)
+            finally:
+                if not call.done():
+                    call.cancel()
+            await self._store(project_title, cache_key, result, detail)
+        else:
+            for index, label in enumerate(result["labels"]):
+                yield "label", {
+                    "index": index,
+                    **{field: label[field] for field in ("label", "id", "confianza")},
+                }
 
+        yield "result", result
+
+    async def _classify_without_model(
+        self, project_title: str, cache_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """Answer a title with the lexical classifier, the cache or the similarity index."""
+        with timed_stage("lexical"):
+            lexical_result = self._classify_lexically(project_title)
+        if lexical_result is not None:
+            logger.info("Classification served by the lexical classifier")
+            return lexical_result
+
+        if self.cache is not None:
+            with timed_stage("cache"):
+                cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Classification served from cache")
+                cached["source"] = "cache"
+                return cached
+
+        with timed_stage("similarity"):
+            similar_result = self._find_similar(project_title)
+        if similar_result is not None:
+            logger.info("Classification reused from a similar title")
+            return similar_result
+        return None
+
+    async def _classify_and_store(
+        self, project_title: str, cache_key: str, detail: Detail = "full"
+    ) -> Dict[str, Any]:
+        """Classify a title with Gemini and store the result in the cache."""
+        result = await self._classify_uncached(project_title, detail=detail)
+        await self._store(project_title, cache_key, result, detail)
+        return result
+
+    async def _store(
+        self, project_title: str, cache_key: str, result: Dict[str, Any], detail: Detail
+    ) -> None:
+        """Mark a result as coming from the model and remember it for later requests."""
+        result["source"] = "model"
+        if self.cache is not None:
+            await self.cache.set(cache_key, result)
+        self._remember_similar(project_title, result, detail)
+
+    def _classify_lexically(self, project_title: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a title with the local lexical classifier.
+
+        Args:
+            project_title: The project title to classify
+
+        Returns:
+            Classification result if the lexical classifier is confident
+            enough (LEXICAL_CONFIDENCE_THRESHOLD), otherwise None
+        """
+        if self.lexical_classifier is None:
+            return None
+
+        prediction = self.lexical_classifier.predict(project_title)
+        if prediction is None or prediction.confidence < settings.LEXICAL_CONFIDENCE_THRESHOLD:
+            return None
         return {
-            "labels": [],
-            "error": "Classification failed after all retries",
+            "labels": prediction.labels,
+            "source": "lexical",
+            "categories_version": self.categories.current.version,
         }
+
+    def _find_similar(self, project_title: str) -> Optional[Dict[str, Any]]:
+        """
+        Reuse the classification of a near-identical title.
+
+        Args:
+            project_title: The project title to classify
+
+        Returns:
+            Labels of the nearest stored title if its similarity reaches
+            SIMILARITY_THRESHOLD, otherwise None
+        """
+        if self.similarity_index is None:
+            return None
+
+        match = self.similarity_index.query(project_title, settings.SIMILARITY_THRESHOLD)
+        if match is None:
+            return None
+        _, stored = match
+        return {
+            "labels": stored.get("labels", []),
+            "source": "similarity",
+            "categories_version": self.categories.current.version,
+        }
+
+    def _remember_similar(
+        self, project_title: str, result: Dict[str, Any], detail: Detail = "full"
+    ) -> None:
+        """Add a successful model classification to the similarity index."""
+        # Compact answers have no justifications, so they could not serve full requests
+        if detail != "full" or self.similarity_index is None:
+            return
+        if not result.get("error") and result.get("labels"):
+            self.similarity_index.add(project_title, {"labels": result["labels"]})
+
+    def _similarity_scope(self) -> str:
+        """Models and categories the labels in the similarity index were produced with."""
+        return f"{','.join(self.model_names)};{self.categories.current.hash}"
+
+    def _cache_key(self, project_title: str, detail: Detail = "full") -> str:
+        """Build the result cache key for a project title."""
+        scope = ",".join(self.model_names)
+        if detail != "full":
+            scope = f"{scope};{detail}"
+        return make_cache_key(project_title, scope, self.categories.current.hash)
+
+    async def _classify_uncached(
+        self,
+        project_title: str,
+        first_tier: int = 0,
+        detail: Detail = "full",
+        fallback: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Classify a project title with Gemini, bypassing the result cache.
+
+        The title goes to the first cascade tier and is escalated to the next
+        one while the answer is uncertain (see `_escalation_reason`). If a
+        higher tier fails, the last answer of a lower tier is kept instead:
+        an uncertain answer is better than none.
+
+        Args:
+            project_title: The project title to classify
+            first_tier: Index of the cascade tier to start from
+            detail: "full" asks for justifications, "compact" only for ids
+            fallback: Answer of a lower tier already escalated by the caller
+
+        Returns:
+            Classification result as dictionary, with the model that answered
+        """
+        categories = self.categories.current
+        with timed_stage("prompt"):
+            prompt = self._build_prompt(project_title, detail, categories)
+
+        generation_config = self._single_generation_config(detail)
+        models = [self.model, *self.escalation_models]
+        for tier in range(first_tier, len(models)):
+            result = await self._classify_with_model(
+                prompt, models[tier], generation_config, detail
+            )
+            result["model"] = self.model_names[tier]
+            result["tier"] = tier + 1
+            result["categories_version"] = categories.version
+
+            reason = self._escalation_reason(result)
+            if reason != "error":
+                fallback = result
+            if reason is None or tier == len(models) - 1:
+                if reason == "error" and fallback is not None:
+                    logger.info(
+                        "Keeping the answer of %s (%s failed)", fallback["model"], result["model"]
+                    )
+                    result = fallback
+                break
+            CASCADE_ESCALATIONS.labels(tier + 1, reason).inc()
+            logger.info("Escalating from %s (%s)", self.model_names[tier], reason)
+
+        CASCADE_ANSWERS.labels(result["tier"]).inc()
+        return result
+
+    @staticmethod
+    def _escalation_reason(result: Dict[str, Any]) -> Optional[str]:
+        """
+        Decide whether a cascade tier's answer should go to the next tier.
+
+        Args:
+            result: Classification result of the tier
+
+        Returns:
+            "error", "not_classified" or "low_confidence", or None to keep it
+        """
+        if result.get("error"):
+            return "error"
+        labels = result.get("labels") or []
+        if not labels or any(
+            label.get("id") == 0 or label.get("label") == "NO_CLASIFICADO" for label in labels
+        ):
+            return "not_classified"
+        confidence = max(float(label.get("confianza") or 0.0) for label in labels)
+        if confidence < settings.GEMINI_CASCADE_CONFIDENCE_THRESHOLD:
+            return "low_confidence"
+        return None
+
+    async def _classify_with_model(
+        self,
+        prompt: str,
+        model: Any,
+        generation_config: Optional[Dict[str, Any]] = None,
+        detail: Detail = "full",
+    ) -> Dict[str, Any]:
+        """
+        Send a single-title prompt to one model and parse its answer.
+
+        Answers that do not parse are repaired locally when possible (see
+        `json_repair`); only when nothing usable can be recovered is the
+        model asked once more, with a reminder of the expected format.
+
+        Args:
+            prompt: Full prompt to send
+            model: Model to call
+            generation_config: Generation options (output schema, token cap)
+            detail: "full" asks for justifications, "compact" only for ids
+
+        Returns:
+            Classification result as dictionary
+        """
+        for reminded in (False, True):
+            if reminded:
+                prompt += INVALID_OUTPUT_REMINDER
+                if generation_config and "max_output_tokens" in generation_config:
+                    # A truncated answer needs more room the second time
+                    generation_config = {
+                        **generation_config,
+                        "max_output_tokens": generation_config["max_output_tokens"] * 2,
+                    }
+            try:
+                text = await self._generate_with_retries(prompt, model, generation_config)
+            except DeadlineExceeded as e:
+                return {
+                    "labels": [],
+                    "error": "No se obtuvo respuesta del modelo dentro del tiempo límite.",
+                    "detalle_error": str(e),
+                }
+            except CircuitOpenError as e:
+                return {
+                    "labels": [],
+                    "error": (
+                        "El modelo no está disponible temporalmente. Intente nuevamente más tarde."
+                    ),
+                    "detalle_error": str(e),
+                }
+            except Exception as e:
+                return {
+                    "labels": [],
+                    "error": "No se pudo obtener respuesta del modelo luego de varios intentos.",
+                    "detalle_error": str(e),
+                }
+
+            try:
+                with timed_stage("parse"):
+                    result = self._parse_classification(text, detail)
+
+                logger.info("Classification successful")
+                return result
+
+            except json.JSONDecodeError as e:
+                logger.warning(f"Invalid JSON response: {str(e)}")
+                cause = "invalid_json"
+                error = {
+                    "labels": [],
+                    "error": "La respuesta del modelo no es JSON válido",
+                    "detalle_error": str(e),
+                    "raw_response": text,
+                }
+
+            except ValidationError as e:
+                logger.warning(f"Response does not match the output schema: {str(e)}")
+                cause = "invalid_schema"
+                error = {
+                    "labels": [],
+                    "error": "La respuesta del modelo no tiene el formato esperado",
+                    "detalle_error": str(e),
+                    "raw_response": text,
+                }
+
+            if not reminded:
+                logger.info("Answer could not be repaired; asking the model again")
+                GEMINI_RETRIES.labels("invalid_output").inc()
+
+        GEMINI_FAILURES.labels(cause).inc()
+        return error
+
+    def _parse_classification(self, text: str, detail: Detail = "full") -> Dict[str, Any]:
+        """
+        Parse a single-title answer, repairing it if needed.
+
+        Args:
+            text: Raw response text
+            detail: Level of detail the answer was asked for; full answers
+                must justify every label
+
+        Returns:
+            Classification result, with the defects fixed under "repaired"
+
+        Raises:
+            json.JSONDecodeError: If the answer is not JSON and cannot be repaired
+            ValidationError: If no usable label can be recovered from it
+        """
+        definitions = self.categories.current.definitions
+        compact = detail == "compact"
+        output_type = CompactClassificationOutput if compact else ClassificationOutput
+        try:
+            output = self._parse_output(text, output_type)
+        except (json.JSONDecodeError, ValidationError):
+            repaired = repair_classification(text, definitions, compact)
+            if repaired is None:
+                raise
+            labels, repairs = repaired
+        else:
+            labels, repairs = repair_labels(output.model_dump()["labels"], definitions, compact)
+
+        result: Dict[str, Any] = {"labels": labels}
+        if repairs:
+            logger.info("Repaired the model answer locally (%s)", ", ".join(repairs))
+            for defect in repairs:
+                GEMINI_OUTPUT_REPAIRS.labels(defect).inc()
+            result["repaired"] = repairs
+        return result
+
+    def _parse_output(self, text: str, output_type: Type[OutputT]) -> OutputT:
+        """
+        Parse and validate a model answer in a single pass.
+
+        Structured output is already plain JSON. Free-form answers (markdown
+        fences, surrounding text) are cleaned up first.
+
+        Args:
+            text: Raw response text
+            output_type: Pydantic model of the expected output
+
+        Returns:
+            The validated output
+
+        Raises:
+            json.JSONDecodeError: If no valid JSON can be found
+            ValidationError: If the JSON does not match the output schema
+        """
+        try:
+            return output_type.model_validate_json(text)
+        except ValidationError as e:
+            if not any(error["type"] == "json_invalid" for error in e.errors()):
+                raise
+        return output_type.model_validate_json(self._extract_json_from_response(text))
+
+    async def classify_many(
+        self, project_titles: List[str], detail: Detail = "full"
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several project titles, packing them into shared prompts.
+
+        Titles are split into chunks bounded by GEMINI_BATCH_MAX_TITLES and
+        GEMINI_BATCH_MAX_CHARS, and each chunk is sent as a single prompt.
+        Titles that are missing or malformed in a chunk response are retried
+        individually, so one bad title does not fail the whole batch. Titles
+        answered by the lexical classifier, the cache or the similarity index
+        are not sent, and repeated titles are only sent once.
+
+        Args:
+            project_titles: The project titles to classify
+            detail: "full" includes a justification per label; "compact" asks
+                the model for ids and confidences only, which is much faster
+
+        Returns:
+            One classification result per title, in input order
+
+        Raises:
+            ValueError: If any project title is empty
+        """
+        if any(not title or not title.strip() for title in project_titles):
+            raise ValueError("Project titles cannot be empty")
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(project_titles)
+        pending: Dict[str, List[int]] = {}
+        for index, title in enumerate(project_titles):
+            results[index] = self._classify_lexically(title)
+            if results[index] is not None:
+                continue
+            cache_key = self._cache_key(title, detail)
+            if cache_key in pending:
+                pending[cache_key].append(index)
+                continue
+            if self.cache is not None:
+                results[index] = await self.cache.get(cache_key)
+            if results[index] is not None:
+                results[index]["source"] = "cache"
+                continue
+            results[index] = self._find_similar(title)
+            if results[index] is None:
+                pending[cache_key] = [index]
+
+        pending_titles = [project_titles[indexes[0]] for indexes in pending.values()]
+        chunks = self._chunk_titles(pending_titles)
+        chunk_results = await asyncio.gather(
+            *(self._classify_chunk(chunk, detail) for chunk in chunks)
+        )
+        fresh_results = [result for results in chunk_results for result in results]
+
+        for (cache_key, indexes), result in zip(pending.items(), fresh_results):
+            result["source"] = "model"
+            if self.cache is not None:
+                await self.cache.set(cache_key, result)
+            self._remember_similar(project_titles[indexes[0]], result, detail)
+            for index in indexes:
+                results[index] = result
+
+        return results
+
+    def _chunk_titles(self, project_titles: List[str]) -> List[List[str]]:
+        """
+        Split titles into chunks that fit the batch size and size budget.
+
+        Args:
+            project_titles: The project titles to split
+
+        Returns:
+            List of chunks, preserving input order
+        """
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_chars = 0
+
+        for title in project_titles:
+            too_many = len(current) >= settings.GEMINI_BATCH_MAX_TITLES
+            too_long = current_chars + len(title) > settings.GEMINI_BATCH_MAX_CHARS
+            if current and (too_many or too_long):
+                chunks.append(current)
+                current, current_chars = [], 0
+            current.append(title)
+            current_chars += len(title)
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _classify_chunk(
+        self, project_titles: List[str], detail: Detail = "full"
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify one chunk of titles with a single packed prompt.
+
+        Args:
+            project_titles: The project titles in this chunk
+            detail: "full" asks for justifications, "compact" only for ids
+
+        Returns:
+            One classification result per title, in chunk order
+        """
+        if len(project_titles) == 1:
+            return [await self._classify_uncached(project_titles[0], detail=detail)]
+
+        categories = self.categories.current
+        with timed_stage("prompt"):
+            prompt = self._build_batch_prompt(project_titles, detail, categories)
+
+        try:
+            text = await self._generate_with_retries(
+                prompt, generation_config=self._chunk_generation_config(len(project_titles), detail)
+            )
+            with timed_stage("parse"):
+                payload, repairs = repair_json(text)
+                for defect in repairs:
+                    GEMINI_OUTPUT_REPAIRS.labels(defect).inc()
+                results = self._parse_batch_items(
+                    payload.get("resultados", []),
+                    len(project_titles),
+                    categories.definitions,
+                    repairs,
+                    detail,
+                )
+        except Exception as e:
+            logger.warning(f"Batch of {len(project_titles)} titles failed: {str(e)}")
+            results = {}
+
+        # Uncertain answers continue individually on the next cascade tier
+        escalated = []
+        for position, result in results.items():
+            result.update(model=self.model_names[0], tier=1)
+            result["categories_version"] = categories.version
+            reason = self._escalation_reason(result) if self.escalation_models else None
+            if reason is None:
+                CASCADE_ANSWERS.labels(1).inc()
+            else:
+                CASCADE_ESCALATIONS.labels(1, reason).inc()
+                escalated.append((position, project_titles[position - 1]))
+
+        missing = [
+            (position, title)
+            for position, title in enumerate(project_titles, start=1)
+            if position not in results
+        ]
+        if missing:
+            logger.warning(f"Retrying {len(missing)}/{len(project_titles)} titles individually")
+        if missing or escalated:
+            retried = await asyncio.gather(
+                *(self._classify_uncached(title, detail=detail) for _, title in missing),
+                *(
+                    self._classify_uncached(
+                        title, first_tier=1, detail=detail, fallback=results[position]
+                    )
+                    for position, title in escalated
+                ),
+            )
+            for (position, _), result in zip(missing + escalated, retried):
+                results[position] = result
+
+        return [results[position] for position in range(1, len(project_titles) + 1)]
+
+    @staticmethod
+    def _parse_batch_items(
+        items: Any,
+        titles: int,
+        definitions: Dict[str, dict],
+        repairs: Optional[List[str]] = None,
+        detail: Detail = "full",
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Validate the per-title items of a batch response.
+
+        Args:
+            items: The "resultados" list returned by the model
+            titles: Number of titles in the prompt
+            definitions: Category definitions the labels must refer to
+            repairs: Defects already fixed in the whole response
+            detail: Level of detail the labels were asked for
+
+        Returns:
+            Mapping of 1-based title position to classification result. Items
+            that are malformed, point outside `1..titles` or have no usable
+            labels are left out.
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        if not isinstance(items, list):
+            return results
+
+        for item in items:
+            try:
+                position = int(item["indice"])
+                labels, label_repairs = repair_labels(
+                    item["labels"], definitions, detail == "compact"
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not labels or not 1 <= position <= titles:
+                continue
+            results[position] = {"labels": labels}
+            for defect in label_repairs:
+                GEMINI_OUTPUT_REPAIRS.labels(defect).inc()
+            item_repairs = list(dict.fromkeys([*(repairs or []), *label_repairs]))
+            if item_repairs:
+                results[position]["repaired"] = item_repairs
+
+        return results
@@ -0,0 +1,254 @@
+"""Pool of Gemini API keys, each with its own quota and health state."""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.gemini_client import LazyGenerativeModel
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMember:
+    """
+    One API key of the pool.
+
+    Tracks the key's RPM/TPM quota, its circuit breaker and its usage, and
+    holds the model clients authenticated with it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        api_key: str,
+        weight: float = 1.0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize a member.
+
+        Args:
+            name: Name shown in stats and metrics (never the key itself)
+            api_key: Gemini API key
+            weight: Relative share of the calls the member should get
+            requests_per_minute: Request quota of the key (0 disables the limit)
+            tokens_per_minute: Token quota of the key (0 disables the limit)
+            circuit_breaker: Health tracking of the key (a default one if omitted)
+        """
+        self.name = name
+        self.api_key = api_key
+        self.weight = weight
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.benched_until = 0.0
+        self._clients: Dict[str, LazyGenerativeModel] = {}
+
+    @property
+    def uses_default_key(self) -> bool:
+        """Whether the member's key is the one the SDK is configured with."""
+        return self.api_key == settings.GEMINI_API_KEY
+
+    @property
+    def load(self) -> float:
+        """Calls running or waiting for quota, relative to the member's weight."""
+        return (self.in_flight + self.waiting) / self.weight
+
+    def benched_for(self) -> float:
+        """Seconds until the member is back in rotation (0 if it is in rotation)."""
+        return max(self.benched_until - time.monotonic(), 0.0)
+
+    def bench(self, seconds: float) -> None:
+        """Take the member out of rotation for `seconds`."""
+        self.benched_until = max(self.benched_until, time.monotonic() + seconds)
+        logger.warning("Credential %s out of rotation for %.0fs", self.name, seconds)
+
+    def client(self, model: Any) -> Any:
+        """
+        The member's version of a model client.
+
+        Args:
+            model: Client of a cascade tier, built for the default key
+
+        Returns:
+            The same model authenticated with the member's key. Other clients
+            (fakes, stubs) are returned as they are.
+        """
+        if self.uses_default_key or not isinstance(model, LazyGenerativeModel):
+            return model
+        client = self._clients.get(model.model_name)
+        if client is None:
+            client = self._clients[model.model_name] = LazyGenerativeModel(
+                model.model_name, api_key=self.api_key
+            )
+        return client
+
+    def record_usage(self, prompt_tokens: int, response_tokens: int) -> None:
+        """Add the tokens of a successful call."""
+        self.prompt_tokens += prompt_tokens
+        self.response_tokens += response_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage and health of the member."""
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "failures": self.failures,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "benched_for_seconds": round(self.benched_for(), 1),
+            "circuit": self.circuit_breaker.stats(),
+        }
+
+
+class CredentialPool:
+    """
+    Spread upstream calls over several API keys.
+
+    Each call goes to the least loaded member (calls running or waiting for
+    quota, divided by its weight) that has quota left right now, so throughput
+    grows with the number of keys. Members that hit their quota or keep
+    failing are taken out of rotation until they recover; calls only wait
+    when every member is out of quota or benched, and only fail fast when
+    every member's circuit is open.
+    """
+
+    def __init__(self, members: List[PoolMember]):
+        """
+        Initialize the pool.
+
+        Args:
+            members: Keys of the pool (at least one)
+        """
+        if not members:
+            raise ValueError("A credential pool needs at least one member")
+        self.members = members
+        # Rotates the starting member so ties do not always go to the first one
+        self._turn = itertools.count()
+
+    @classmethod
+    def from_settings(cls) -> "CredentialPool":
+        """
+        Build the pool from GEMINI_API_KEYS (or GEMINI_API_KEY alone).
+
+        GEMINI_API_KEYS is a comma-separated list of keys, each optionally
+        followed by `:weight`. RPM/TPM limits and circuit breaker settings
+        apply to each key.
+        """
+        entries = [entry.strip() for entry in settings.GEMINI_API_KEYS.split(",") if entry.strip()]
+        members = []
+        for position, entry in enumerate(entries or [settings.GEMINI_API_KEY], start=1):
+            api_key, _, weight = entry.partition(":")
+            members.append(
+                PoolMember(
+                    name=f"key{position}",
+                    api_key=api_key,
+                    weight=float(weight) if weight else 1.0,
+                    requests_per_minute=settings.GEMINI_RPM_LIMIT,
+                    tokens_per_minute=settings.GEMINI_TPM_LIMIT,
+                    circuit_breaker=CircuitBreaker(
+                        failure_threshold=settings.GEMINI_CIRCUIT_FAILURE_THRESHOLD,
+                        window=settings.GEMINI_CIRCUIT_WINDOW,
+                        min_calls=settings.GEMINI_CIRCUIT_MIN_CALLS,
+                        cooldown=settings.GEMINI_CIRCUIT_COOLDOWN_SECONDS,
+                    ),
+                )
+            )
+        return cls(members)
+
+    def _candidates(self) -> List[PoolMember]:
+        """Members whose circuit lets calls through, least loaded first."""
+        start = next(self._turn) % len(self.members)
+        rotated = self.members[start:] + self.members[:start]
+        candidates = [member for member in rotated if member.circuit_breaker.allows_call()]
+        return sorted(candidates, key=lambda member: member.load)
+
+    def has_available(self, exclude: Optional[PoolMember] = None) -> bool:
+        """Whether a member other than `exclude` is in rotation."""
+        return any(
+            member is not exclude and not member.benched_for() for member in self._candidates()
+        )
+
+    def try_acquire(self, tokens: int) -> Optional[PoolMember]:
+        """
+        Take quota from a member only if no wait is needed.
+
+        The member's circuit breaker is checked before its quota is taken, so
+        an open circuit costs no quota; the call must report its outcome to
+        the breaker.
+
+        Args:
+            tokens: Estimated tokens consumed by the call
+
+        Returns:
+            The member whose quota was taken, or None
+        """
+        for member in self._candidates():
+            if member.benched_for():
+                continue
+            try:
+                member.circuit_breaker.check()
+            except CircuitOpenError:
+                # Another call took the half-open probe in the meantime
+                continue
+            if not member.rate_limiter.try_acquire(tokens):
+                member.circuit_breaker.release()
+                continue
+            return member
+        return None
+
+    async def acquire(self, tokens: int) -> PoolMember:
+        """
+        Pick a member for a call and wait for its quota.
+
+        The circuit breaker of the chosen member is checked last, so a
+        half-open member gets exactly one probe call.
+
+        Args:
+            tokens: Estimated tokens consumed by the call
+
+        Returns:
+            The member to call
+
+        Raises:
+            CircuitOpenError: If the circuit of every member is open
+        """
+        while True:
+            candidates = self._candidates()
+            if not candidates:
+                raise CircuitOpenError(
+                    min(member.circuit_breaker.cooldown_remaining() for member in self.members)
+                )
+            member = self.try_acquire(tokens)
+            if member is not None:
+                return member
+            # Everyone is out of quota or benched: queue on the member back soonest
+            member = min(candidates, key=lambda m: (m.benched_for(), m.load))
+            member.waiting += 1
+            try:
+                if member.benched_for():
+                    await asyncio.sleep(member.benched_for())
+                    continue
+                await member.rate_limiter.acquire(tokens)
+            finally:
+                member.waiting -= 1
+            member.circuit_breaker.check()
+            return member
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Usage and health of every member."""
+        return [member.stats() for member in self.members]
@@ -0,0 +1,174 @@
+"""Local stand-in for the Gemini model, used for load tests and offline development."""
+
+import asyncio
+import json
+import random
+import re
+import zlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from app.models.categories import DEFAULT_CATEGORIES_CSV
+from app.services.category_registry import CategoryRegistry
+
+_SINGLE_TITLE = re.compile(r'TEXTO A CLASIFICAR:\n"""(.*?)"""', re.DOTALL)
+_BATCH_TITLE = re.compile(r'^(\d+)\. """(.*?)"""', re.MULTILINE | re.DOTALL)
+# Sentence only present in the compact prompt, which asks for no justifications
+_COMPACT_MARKER = "No incluyas justificaciones"
+_FILLER = "El título describe una intervención propia de esta categoría de servicio público"
+# Streamed answers: share of the latency before the first chunk, and chunk size
+_FIRST_CHUNK_SHARE = 0.2
+_STREAM_CHUNK_CHARS = 16
+
+
+class FakeResponse:
+    """Minimal `GenerateContentResponse` with text and usage metadata."""
+
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=0,
+            candidates_token_count=len(text) // 4,
+        )
+
+
+class FakeStreamResponse(FakeResponse):
+    """Streamed `FakeResponse`: the text arrives in chunks spread over `seconds`."""
+
+    def __init__(self, text: str, prompt_tokens: int, seconds: float):
+        super().__init__(text, prompt_tokens)
+        self.seconds = seconds
+
+    async def __aiter__(self):
+        chunks = [
+            self.text[start : start + _STREAM_CHUNK_CHARS]
+            for start in range(0, len(self.text), _STREAM_CHUNK_CHARS)
+        ]
+        for chunk in chunks:
+            await asyncio.sleep(self.seconds / len(chunks))
+            yield SimpleNamespace(text=chunk)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in replacement for `genai.GenerativeModel.generate_content_async`.
+
+    Answers every prompt with well-formed labels for the titles it contains,
+    after a log-normally distributed delay. A share of calls can fail with
+    upstream errors (alternating 503 and 429) or return malformed JSON, so
+    the retry, circuit breaker and parsing paths are exercised too. The
+    chosen category only depends on the title, so results are stable.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        justification_words: int = 25,
+        seed: Optional[int] = None,
+        categories: Optional[CategoryRegistry] = None,
+    ):
+        """
+        Initialize the fake model.
+
+        Args:
+            latency_ms: Median latency of a call
+            latency_sigma: Spread of the log-normal latency (0 for a fixed delay)
+            error_rate: Share of calls raising an upstream error
+            malformed_rate: Share of calls returning invalid JSON
+            justification_words: Approximate length of each justification
+            seed: Seed of the random generator, for reproducible runs
+            categories: Categories to answer with, followed across reloads
+                (the shipped CSV if omitted)
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.justification_words = justification_words
+        self._rng = random.Random(seed)
+        self.categories = categories or CategoryRegistry(DEFAULT_CATEGORIES_CSV)
+        self.calls = 0
+
+    def _latency(self) -> float:
+        """Seconds the next call takes."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_ms / 1000
+
+    def _labels(self, project_title: str, compact: bool = False) -> List[Dict[str, Any]]:
+        """Deterministic labels for a title."""
+        categories = list(self.categories.current.definitions.values())
+        category = categories[zlib.crc32(project_title.encode("utf-8")) % len(categories)]
+        label: Dict[str, Any] = {
+            "label": category["nombre"],
+            "id": category["id"],
+            "confianza": 0.9,
+        }
+        if not compact:
+            words = (_FILLER.split() * (self.justification_words // len(_FILLER.split()) + 1))[
+                : self.justification_words
+            ]
+            label["justificacion"] = " ".join(words) + "."
+        return [label]
+
+    def _answer(self, prompt: str) -> str:
+        """Build the JSON answer for a single-title or batch prompt."""
+        compact = _COMPACT_MARKER in prompt
+        batch = _BATCH_TITLE.findall(prompt.split("TÍTULOS A CLASIFICAR:", 1)[-1])
+        if "TÍTULOS A CLASIFICAR:" in prompt and batch:
+            payload: Dict[str, Any] = {
+                "resultados": [
+                    {"indice": int(position), "labels": self._labels(title, compact)}
+                    for position, title in batch
+                ]
+            }
+        else:
+            match = _SINGLE_TITLE.search(prompt)
+            payload = {"labels": self._labels(match.group(1) if match else prompt, compact)}
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+
+    async def generate_content_async(self, prompt: Any, **kwargs: Any) -> FakeResponse:
+        """
+        Answer a prompt after a simulated delay.
+
+        With `stream=True` the first chunk arrives after a fifth of the delay
+        and the rest of the answer over the remaining time.
+
+        Args:
+            prompt: Prompt text
+            kwargs: `stream`; other generation options are ignored
+
+        Returns:
+            Response with `text` and `usage_metadata` (iterable when streamed)
+
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: On simulated upstream errors
+        """
+        self.calls += 1
+        prompt = str(prompt)
+        roll = self._rng.random()
+        latency = self._latency()
+        stream = bool(kwargs.get("stream"))
+        await asyncio.sleep(latency * _FIRST_CHUNK_SHARE if stream else latency)
+
+        if roll < self.error_rate:
+            if self.calls % 2:
+                raise google_exceptions.ServiceUnavailable("The model is overloaded (fake)")
+            raise google_exceptions.ResourceExhausted("Quota exceeded (fake). Please retry in 1s.")
+        if roll < self.error_rate + self.malformed_rate:
+            answer = '{"labels": [{"label": "truncated'
+        else:
+            answer = self._answer(prompt)
+            config = kwargs.get("generation_config") or {}
+            if config.get("response_mime_type") != "application/json":
+                # Free-form answers come wrapped in markdown like the real model's
+                answer = f"```json\n{answer}\n```"
+        if stream:
+            return FakeStreamResponse(answer, len(prompt) // 4, latency * (1 - _FIRST_CHUNK_SHARE))
+        return FakeResponse(answer, len(prompt) // 4)
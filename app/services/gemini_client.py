@@ -0,0 +1,119 @@
+"""Gemini SDK loaded on first use."""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_genai: Any = None
+_lock = threading.Lock()
+
+# SDK releases whose GenerativeModel sends async calls through `_async_client`
+_SDK_VERSIONS_WITH_ASYNC_CLIENT = ("0.7.", "0.8.")
+_unsupported_sdk_logged = False
+
+
+def load_genai() -> Any:
+    """
+    Import and configure `google.generativeai` once.
+
+    The SDK (and the gRPC stack under it) takes most of a second to import,
+    so it is kept off the startup path and only loaded when a model is first
+    needed, or by the background warm-up.
+
+    Returns:
+        The configured `google.generativeai` module
+    """
+    global _genai
+    if _genai is not None:
+        return _genai
+
+    with _lock:
+        if _genai is None:
+            started_at = time.perf_counter()
+            import google.generativeai as genai
+
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            _genai = genai
+            logger.info(f"Gemini SDK loaded in {time.perf_counter() - started_at:.2f}s")
+    return _genai
+
+
+def _bind_api_key(model: Any, api_key: str) -> bool:
+    """
+    Make a `genai.GenerativeModel` call with `api_key` instead of GEMINI_API_KEY.
+
+    The SDK keeps a single global configuration and has no public way to
+    give a model its own key, so the model's async client is replaced with
+    one built from the public `google.ai.generativelanguage` API. That
+    relies on an SDK internal, hence the version check: with other SDK
+    releases the model is left alone and calls use GEMINI_API_KEY.
+
+    Args:
+        model: Model that has not made an async call yet
+        api_key: Key to call the model with
+
+    Returns:
+        Whether the key was bound
+    """
+    global _unsupported_sdk_logged
+    version = getattr(load_genai(), "__version__", "")
+    if not version.startswith(_SDK_VERSIONS_WITH_ASYNC_CLIENT) or not hasattr(
+        model, "_async_client"
+    ):
+        if not _unsupported_sdk_logged:
+            _unsupported_sdk_logged = True
+            logger.warning(
+                f"google-generativeai {version} is not supported by the credential pool; "
+                "every call uses GEMINI_API_KEY"
+            )
+        return False
+
+    from google.ai import generativelanguage as glm
+
+    model._async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+    return True
+
+
+class LazyGenerativeModel:
+    """
+    `genai.GenerativeModel` built on first use.
+
+    The first call loads the SDK in a worker thread, so the event loop keeps
+    serving other requests meanwhile.
+    """
+
+    def __init__(self, model_name: str, api_key: Optional[str] = None):
+        """
+        Initialize the wrapper without touching the SDK.
+
+        Args:
+            model_name: Gemini model name
+            api_key: Key to call the model with (defaults to GEMINI_API_KEY)
+        """
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model: Optional[Any] = None
+        self._key_bound = api_key is None
+
+    def load(self) -> Any:
+        """Build the underlying model client (blocking)."""
+        if self._model is None:
+            self._model = load_genai().GenerativeModel(self.model_name)
+        return self._model
+
+    async def generate_content_async(self, prompt: Any, **kwargs: Any) -> Any:
+        """Same as `genai.GenerativeModel.generate_content_async`."""
+        model = self._model
+        if model is None:
+            model = await asyncio.to_thread(self.load)
+        if self.api_key is not None and not self._key_bound:
+            # Created on the event loop, like the SDK does for its default client
+            _bind_api_key(model, self.api_key)
+            self._key_bound = True
+        return await model.generate_content_async(prompt, **kwargs)
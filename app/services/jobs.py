@@ -0,0 +1,261 @@
+"""Asynchronous classification jobs processed by background workers."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+
+
+class JobStore:
+    """
+    SQLite store of jobs and their per-title results.
+
+    Every title of a job is stored when the job is created and its result is
+    filled in as it is classified, so progress and partial results survive a
+    process restart.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the SQLite database.
+
+        Args:
+            db_path: Path of the SQLite file (":memory:" for a throwaway store)
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, total INTEGER NOT NULL, "
+            "processed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            "job_id TEXT NOT NULL, row INTEGER NOT NULL, title TEXT NOT NULL, result TEXT, "
+            "PRIMARY KEY (job_id, row))"
+        )
+
+    def create(self, job_id: str, titles: Sequence[Tuple[int, str]]) -> None:
+        """Insert a queued job and its titles."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, len(titles), now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, row, title) VALUES (?, ?, ?)",
+                ((job_id, row, title) for row, title in titles),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the progress of a job, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, total, processed, failed, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "total", "processed", "failed", "created_at", "updated_at")
+        return dict(zip(keys, row))
+
+    def unfinished(self) -> List[str]:
+        """Ids of jobs that are queued or were interrupted, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status != ? ORDER BY created_at", (JOB_COMPLETED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def pending(self, job_id: str, limit: int) -> List[Tuple[int, str]]:
+        """Titles of a job that have no result yet, in row order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT row, title FROM job_items WHERE job_id = ? AND result IS NULL "
+                "ORDER BY row LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+
+    def save_results(self, job_id: str, results: Sequence[Tuple[int, Dict[str, Any]]]) -> None:
+        """Store the results of some titles and update the job counters."""
+        failed = sum(1 for _, result in results if result.get("error"))
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE job_items SET result = ? WHERE job_id = ? AND row = ?",
+                ((json.dumps(result, ensure_ascii=False), job_id, row) for row, result in results),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, processed = processed + ?, failed = failed + ?, "
+                "updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, len(results), failed, time.time(), job_id),
+            )
+
+    def set_status(self, job_id: str, status: str) -> None:
+        """Change the status of a job."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (status, time.time(), job_id),
+            )
+
+    def results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Finished results of a job, in row order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row, title, result FROM job_items "
+                "WHERE job_id = ? AND result IS NOT NULL ORDER BY row LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+        return [{"row": row, "title": title, **json.loads(result)} for row, title, result in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """
+    Queue of classification jobs served by a pool of background workers.
+
+    Each worker processes one job at a time, classifying its pending titles
+    in chunks with `ClassifierService.classify_many` and storing every chunk
+    as soon as it finishes. At most `workers` jobs run at the same time; jobs
+    left unfinished by a previous process are queued again on `start`.
+    """
+
+    def __init__(self, service: Any, store: JobStore, workers: int = 2, chunk_size: int = 100):
+        """
+        Initialize the manager.
+
+        Args:
+            service: ClassifierService used to classify titles
+            store: Store holding jobs and results
+            workers: Number of jobs processed at the same time
+            chunk_size: Titles classified and stored per step
+        """
+        self.service = service
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    async def start(self) -> None:
+        """Start the workers and resume unfinished jobs."""
+        queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queue = queue
+        self._tasks = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+        unfinished = await asyncio.to_thread(self.store.unfinished)
+        for job_id in unfinished:
+            queue.put_nowait(job_id)
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} unfinished classification jobs")
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are resumed on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def submit(self, titles: Sequence[Tuple[int, str]]) -> Dict[str, Any]:
+        """
+        Create a job and queue it.
+
+        Args:
+            titles: Tuples of (row number, title) to classify
+
+        Returns:
+            Progress of the new job
+
+        Raises:
+            RuntimeError: If the workers are not running
+        """
+        if self._queue is None:
+            raise RuntimeError("Job workers are not running")
+
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.create, job_id, titles)
+        self._queue.put_nowait(job_id)
+        logger.info(f"Queued classification job {job_id} with {len(titles)} titles")
+        job = await self.get(job_id)
+        if job is None:
+            raise RuntimeError(f"Classification job {job_id} disappeared after it was created")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the progress of a job, or None if it does not exist."""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Return a page of the finished results of a job."""
+        return await asyncio.to_thread(self.store.results, job_id, offset, limit)
+
+    async def _worker(self, queue: "asyncio.Queue[str]") -> None:
+        """Process jobs from `queue` one at a time."""
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Classification job {job_id} stopped: {str(e)}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        """Classify the pending titles of a job chunk by chunk."""
+        logger.info(f"Starting classification job {job_id}")
+        while True:
+            items = await asyncio.to_thread(self.store.pending, job_id, self.chunk_size)
+            if not items:
+                break
+            titles = [title for _, title in items]
+            try:
+                results = await self.service.classify_many(titles)
+            except Exception as e:
+                logger.error(f"Job {job_id} chunk failed: {str(e)}")
+                results = [
+                    {
+                        "labels": [],
+                        "error": "No se pudo clasificar el título.",
+                        "detalle_error": str(e),
+                    }
+                    for _ in titles
+                ]
+            await asyncio.to_thread(
+                self.store.save_results,
+                job_id,
+                [(row, result) for (row, _), result in zip(items, results)],
+            )
+
+        await asyncio.to_thread(self.store.set_status, job_id, JOB_COMPLETED)
+        logger.info(f"Classification job {job_id} completed")
@@ -0,0 +1,239 @@
+"""Local repair of malformed model answers, so they need not be requested again."""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.schemas import ClassificationLabel, CompactClassificationLabel
+from app.services.text_utils import normalize_title
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _strip_fences(text: str) -> str:
+    """
+    Cut a JSON object out of a free-form answer.
+
+    Markdown fences and text around the object are dropped. The end of the
+    object may be missing (truncated answers).
+
+    Raises:
+        json.JSONDecodeError: If the answer contains no object at all
+    """
+    s = (text or "").strip()
+    if s.startswith("```"):
+        first_newline = s.find("\n")
+        s = s[first_newline + 1 :] if first_newline != -1 else ""
+        if s.rstrip().endswith("```"):
+            s = s.rstrip()[:-3]
+    start = s.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object in the response", s, 0)
+    end = s.rfind("}")
+    return s[start : end + 1] if end > start else s[start:]
+
+
+def _closes_string(s: str, position: int) -> bool:
+    """
+    Whether a quote ending just before `position` closes the string.
+
+    A closing quote is followed by `:`, `}`, `]`, the end of the text, or a
+    comma and then the start of another key or value. Any other quote is
+    part of the text (e.g. a quoted title inside a justification).
+    """
+    rest = s[position:].lstrip()
+    if not rest or rest[0] in ":}]":
+        return True
+    if rest[0] != ",":
+        return False
+    after_comma = rest[1:].lstrip()
+    return not after_comma or after_comma[0] in '"{['
+
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse a model answer, fixing the defects models commonly produce.
+
+    Fixed defects, in the order they are reported:
+        - "unescaped_quote": a `"` inside a string that does not end it
+        - "control_character": a raw line break inside a string
+        - "trailing_comma": a comma right before `}` or `]`
+        - "truncated": the answer stops mid-way; open strings and brackets
+          are closed, and an incomplete last element is dropped
+
+    Markdown fences and text around the object are ignored without counting
+    as a defect.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        The parsed JSON and the defects that were fixed (empty if none)
+
+    Raises:
+        json.JSONDecodeError: If the answer cannot be repaired
+    """
+    s = _strip_fences(text)
+    try:
+        return json.loads(s), []
+    except json.JSONDecodeError:
+        pass
+
+    repairs: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []
+    # Positions of commas outside strings: where a truncated answer can be cut
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = False
+    position = 0
+    while position < len(s):
+        char = s[position]
+        if in_string:
+            if char == "\\":
+                out.append(s[position : position + 2])
+                position += 2
+                continue
+            if char == '"':
+                if _closes_string(s, position + 1):
+                    in_string = False
+                    out.append(char)
+                else:
+                    out.append('\\"')
+                    repairs.append("unescaped_quote")
+            elif char in "\n\r":
+                out.append("\\n" if char == "\n" else "\\r")
+                repairs.append("control_character")
+            else:
+                out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in _CLOSERS:
+            stack.append(char)
+            out.append(char)
+        elif char in "}]":
+            last = len(out) - 1
+            while last >= 0 and out[last].isspace():
+                last -= 1
+            if last >= 0 and out[last] == ",":
+                del out[last]
+                cuts.pop()
+                repairs.append("trailing_comma")
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        else:
+            if char == ",":
+                cuts.append((len(out), list(stack)))
+            out.append(char)
+        position += 1
+
+    candidates = []
+    if not stack and not in_string:
+        candidates.append("".join(out))
+    else:
+        repairs.append("truncated")
+        body = "".join(out) + ('"' if in_string else "")
+        candidates.append(body + "".join(_CLOSERS[opener] for opener in reversed(stack)))
+        # Drop the incomplete last element, one comma at a time
+        for cut, open_brackets in reversed(cuts):
+            candidates.append(
+                "".join(out[:cut]) + "".join(_CLOSERS[opener] for opener in reversed(open_brackets))
+            )
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate), list(dict.fromkeys(repairs))
+        except json.JSONDecodeError:
+            continue
+    raise json.JSONDecodeError("The response could not be repaired", s, 0)
+
+
+def repair_labels(
+    labels: Any, definitions: Dict[str, dict], compact: bool = False
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Validate the labels of an answer one by one, keeping the usable ones.
+
+    Labels that do not match `ClassificationLabel` (`CompactClassificationLabel`
+    for compact answers, whose justification is left empty) are dropped
+    ("invalid_label").
+    A label whose name is a known category but whose id is not that
+    category's gets the right id ("id_mismatch"): the name is copied from
+    the definitions, while ids are easy to get off by one. A label with an
+    unknown name but a known id gets the name of that id ("name_mismatch").
+    NO_CLASIFICADO is checked the same way, as the name of id 0.
+    Labels with an unknown name and id are dropped ("unknown_category"), and
+    so are repeated categories ("duplicate_label").
+
+    Args:
+        labels: The "labels" list of the answer
+        definitions: Category definitions keyed by name
+        compact: Whether the answer was asked for without justifications
+
+    Returns:
+        The usable labels and the defects that were fixed
+    """
+    label_type = CompactClassificationLabel if compact else ClassificationLabel
+    # NO_CLASIFICADO is checked like a category, with id 0
+    names_by_id = {0: "NO_CLASIFICADO"}
+    names_by_id.update({category["id"]: name for name, category in definitions.items()})
+    ids_by_name = {normalize_title(name): category_id for category_id, name in names_by_id.items()}
+    repairs: List[str] = []
+    usable: List[Dict] = []
+    seen = set()
+    for raw_label in labels if isinstance(labels, list) else []:
+        try:
+            label = label_type.model_validate(raw_label).model_dump()
+        except ValidationError:
+            repairs.append("invalid_label")
+            continue
+        if compact:
+            label["justificacion"] = ""
+        named_id = ids_by_name.get(normalize_title(label["label"]))
+        if named_id is not None and named_id != label["id"]:
+            label["id"] = named_id
+            repairs.append("id_mismatch")
+        elif named_id is None and label["id"] not in names_by_id:
+            repairs.append("unknown_category")
+            continue
+        elif named_id is None:
+            label["label"] = names_by_id[label["id"]]
+            repairs.append("name_mismatch")
+        if label["id"] in seen:
+            repairs.append("duplicate_label")
+            continue
+        seen.add(label["id"])
+        usable.append(label)
+    return usable, list(dict.fromkeys(repairs))
+
+
+def repair_classification(
+    text: str, definitions: Dict[str, dict], compact: bool = False
+) -> Optional[Tuple[List[Dict], List[str]]]:
+    """
+    Recover the labels of a single-title answer that failed to parse.
+
+    Args:
+        text: Raw response text
+        definitions: Category definitions keyed by name
+        compact: Whether the answer was asked for without justifications
+
+    Returns:
+        The usable labels and the defects that were fixed, or None if nothing
+        usable could be recovered
+    """
+    try:
+        payload, repairs = repair_json(text)
+    except json.JSONDecodeError:
+        return None
+    raw_labels = payload.get("labels") if isinstance(payload, dict) else None
+    if not isinstance(raw_labels, list):
+        return None
+    labels, label_repairs = repair_labels(raw_labels, definitions, compact)
+    if raw_labels and not labels:
+        return None
+    return labels, list(dict.fromkeys(repairs + label_repairs))
@@ -0,0 +1,191 @@
+"""Incremental parsing of a single-title answer while the model is still writing it."""
+
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Fields that make a label usable before its justification is written
+_LABEL_FIELDS = ("label", "id", "confianza")
+_SCALAR_END = set(",:}] \t\r\n")
+
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+
+class LabelStreamParser:
+    """
+    Turn chunks of a streamed `{"labels": [...]}` answer into events.
+
+    Events are:
+        - ("label", {"index", "label", "id", "confianza"}) as soon as those
+          three fields of a label are complete
+        - ("justificacion", {"index", "text"}) with every new piece of a
+          label's justification
+
+    `index` is the 0-based position of the label in the answer. The parser
+    only previews the answer: anything unexpected (text around the JSON,
+    markdown fences, malformed JSON) is skipped or stops the events, and the
+    full answer still has to be parsed once complete.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a parser at the start of an answer."""
+        # One frame per open object or array: type, current key and label index
+        self._stack: List[Dict[str, Any]] = []
+        self._string: Optional[List[str]] = None
+        self._string_is_key = False
+        self._escaped = False
+        self._scalar: Optional[List[str]] = None
+        self._labels: Dict[int, Dict[str, Any]] = {}
+        self._announced: Set[int] = set()
+        self._justification_sent = 0
+        self.broken = False
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        Parse the next piece of the answer.
+
+        Args:
+            chunk: Text received since the previous call
+
+        Returns:
+            Events completed by this piece, in order
+        """
+        events: List[StreamEvent] = []
+        for char in chunk:
+            if self.broken:
+                break
+            self._step(char, events)
+        if self._string is not None and self._in_justification():
+            self._send_justification(events, final=False)
+        return events
+
+    def _label_index(self) -> Optional[int]:
+        """Index of the label object being parsed, if the parser is inside one."""
+        if len(self._stack) != 3:
+            return None
+        root, labels, label = self._stack
+        if root["type"] != "{" or root["key"] != "labels" or labels["type"] != "[":
+            return None
+        return label["index"] if label["type"] == "{" else None
+
+    def _in_justification(self) -> bool:
+        return (
+            not self._string_is_key
+            and self._label_index() is not None
+            and self._stack[-1]["key"] == "justificacion"
+        )
+
+    def _send_justification(self, events: List[StreamEvent], final: bool) -> None:
+        """Emit the part of the justification string not sent yet."""
+        raw = "".join(self._string or [])
+        if not final:
+            # Leave out an escape sequence that is still incomplete
+            backslash = raw.rfind("\\")
+            if backslash != -1 and (
+                len(raw) - backslash < 2 or (raw[backslash + 1] == "u" and len(raw) - backslash < 6)
+            ):
+                raw = raw[:backslash]
+        try:
+            text = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return
+        if len(text) > self._justification_sent:
+            events.append(
+                (
+                    "justificacion",
+                    {"index": self._label_index(), "text": text[self._justification_sent :]},
+                )
+            )
+            self._justification_sent = len(text)
+
+    def _step(self, char: str, events: List[StreamEvent]) -> None:
+        if self._string is not None:
+            if self._escaped:
+                self._escaped = False
+                self._string.append(char)
+            elif char == "\\":
+                self._escaped = True
+                self._string.append(char)
+            elif char == '"':
+                self._end_string(events)
+            else:
+                self._string.append(char)
+            return
+
+        if self._scalar is not None:
+            if char not in _SCALAR_END:
+                self._scalar.append(char)
+                return
+            try:
+                value = json.loads("".join(self._scalar))
+            except json.JSONDecodeError:
+                self.broken = True
+                return
+            self._scalar = None
+            self._set_value(value, events)
+
+        if char.isspace():
+            return
+        if not self._stack:
+            # Skip anything before the answer object (e.g. a markdown fence)
+            if char == "{":
+                self._stack.append({"type": "{", "key": None, "index": None})
+            return
+
+        top = self._stack[-1]
+        if char == '"':
+            self._string = []
+            self._string_is_key = top["type"] == "{" and top["key"] is None
+            self._justification_sent = 0
+        elif char in "{[":
+            index = None
+            if top["type"] == "[":
+                top["count"] = top.get("count", 0) + 1
+                index = top["count"] - 1
+            self._stack.append({"type": char, "key": None, "index": index})
+            label_index = self._label_index()
+            if label_index is not None:
+                self._labels[label_index] = {}
+        elif char in "}]":
+            index = self._label_index()
+            if index is not None:
+                self._announce(index, events)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["key"] = None
+        elif char == ",":
+            top["key"] = None
+        elif char == ":":
+            pass
+        else:
+            self._scalar = [char]
+
+    def _end_string(self, events: List[StreamEvent]) -> None:
+        if self._string is None:
+            return
+        if self._in_justification():
+            self._send_justification(events, final=True)
+        try:
+            value = json.loads('"' + "".join(self._string) + '"')
+        except json.JSONDecodeError:
+            self.broken = True
+            return
+        self._string = None
+        if self._string_is_key:
+            self._stack[-1]["key"] = value
+        else:
+            self._set_value(value, events)
+
+    def _set_value(self, value: Any, events: List[StreamEvent]) -> None:
+        """Record a finished scalar or string value of the current object."""
+        index = self._label_index()
+        if index is not None and self._stack[-1]["key"] in _LABEL_FIELDS:
+            self._labels[index][self._stack[-1]["key"]] = value
+            self._announce(index, events)
+
+    def _announce(self, index: int, events: List[StreamEvent]) -> None:
+        """Emit a label once its fields are complete, only once."""
+        label = self._labels[index]
+        if index in self._announced or not all(field in label for field in _LABEL_FIELDS):
+            return
+        self._announced.add(index)
+        events.append(("label", {"index": index, **{f: label[f] for f in _LABEL_FIELDS}}))
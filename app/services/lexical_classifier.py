@@ -0,0 +1,186 @@
+"""Local lexical pre-classifier built from the category definitions."""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from app.services.text_utils import normalize_title, strip_location
+
+# Spanish function words and generic investment wording that say nothing
+# about which service a project belongs to
+_STOPWORDS = frozenset(
+    """
+    a al ante con como de del e el en entre etc la las lo los o para por que se sin
+    su sus u un una uno y mediante traves hasta desde sobre otro otros otras
+    mejoramiento ampliacion creacion construccion instalacion rehabilitacion
+    recuperacion renovacion reparacion adquisicion implementacion optimizacion
+    servicio servicios proyecto sistema incluye comprende siguiente siguientes
+    menos ninguno ejemplo ejemplos limitativo
+    """.split()
+)
+
+# Terms found in a category name weigh more than terms only found in its definition
+_NAME_WEIGHT = 1.0
+_DEFINITION_WEIGHT = 0.5
+# Categories matched only through their definition are never treated as certain
+_DEFINITION_ONLY_MAX_SUPPORT = 0.6
+
+
+def _stem(word: str) -> str:
+    """Very light Spanish plural stemming ("veredas" -> "vereda", "redes" -> "red")."""
+    if len(word) > 4 and word.endswith("es") and word[-3] not in "aeiou":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into stemmed content tokens.
+
+    Args:
+        text: Text to tokenize (normalized or raw)
+
+    Returns:
+        Tokens without stopwords or bare numbers
+    """
+    words = re.findall(r"[a-z0-9]+", normalize_title(text))
+    return [
+        _stem(word)
+        for word in words
+        if word not in _STOPWORDS and len(word) > 1 and not word.isdigit()
+    ]
+
+
+def _terms(tokens: List[str]) -> List[str]:
+    """Unigrams plus bigrams of consecutive tokens."""
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+def category_vocabulary(categories: Dict[str, dict]) -> Set[str]:
+    """
+    Collect every content token used by the category names and definitions.
+
+    Args:
+        categories: Category definitions keyed by name
+
+    Returns:
+        Set of stemmed tokens
+    """
+    vocabulary: Set[str] = set()
+    for category in categories.values():
+        vocabulary.update(tokenize(category["nombre"]))
+        vocabulary.update(tokenize(category["definicion"]))
+    return vocabulary
+
+
+@dataclass(frozen=True)
+class LexicalPrediction:
+    """Labels found by the lexical classifier and how certain it is."""
+
+    labels: List[Dict[str, Any]]
+    confidence: float
+
+
+class LexicalClassifier:
+    """
+    Keyword index over the category names and definitions.
+
+    Each term (stemmed unigram or bigram) is weighted by its inverse category
+    frequency, so words unique to one category ("alcantarillado", "primaria")
+    are decisive while shared words ("agua", "educacion") are not. A title is
+    only considered certain when its informative words are explained by the
+    categories it matches; anything else is left to the model.
+    """
+
+    def __init__(self, categories: Dict[str, dict]):
+        """
+        Build the index.
+
+        Args:
+            categories: Category definitions keyed by name
+        """
+        self._categories = list(categories.values())
+        self._name_terms: List[Set[str]] = []
+        self._all_terms: List[Set[str]] = []
+        document_frequency: Dict[str, int] = {}
+
+        for category in self._categories:
+            name_terms = set(_terms(tokenize(category["nombre"])))
+            all_terms = name_terms | set(_terms(tokenize(category["definicion"])))
+            self._name_terms.append(name_terms)
+            self._all_terms.append(all_terms)
+            for term in all_terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        total = len(self._categories)
+        self._idf = {term: math.log(total / df) for term, df in document_frequency.items()}
+        self._unknown_weight = math.log(total) if total > 1 else 1.0
+        # A category needs at least one term shared by at most two categories
+        self._decisive_idf = math.log(total / 2) if total > 2 else 0.0
+
+    def predict(self, project_title: str) -> Optional[LexicalPrediction]:
+        """
+        Score a project title against every category.
+
+        Args:
+            project_title: The project title to classify
+
+        Returns:
+            Prediction with per-label confidences, or None if nothing matched
+        """
+        tokens = tokenize(strip_location(normalize_title(project_title)))
+        if not tokens:
+            return None
+        terms = _terms(tokens)
+
+        candidates = []
+        for index, all_terms in enumerate(self._all_terms):
+            matched = [term for term in terms if term in all_terms]
+            if not any(self._idf[term] >= self._decisive_idf for term in matched):
+                continue
+            score = sum(
+                self._idf[term]
+                * (_NAME_WEIGHT if term in self._name_terms[index] else _DEFINITION_WEIGHT)
+                for term in matched
+            )
+            support = 1.0 - math.exp(-score)
+            if not any(term in self._name_terms[index] for term in matched):
+                support = min(support, _DEFINITION_ONLY_MAX_SUPPORT)
+            candidates.append((index, support, matched))
+
+        if not candidates:
+            return None
+
+        # Share of the title's informative words explained by the matched categories
+        explained_terms = set().union(*(set(matched) for _, _, matched in candidates))
+        total_weight = sum(self._idf.get(token, self._unknown_weight) for token in tokens)
+        explained_weight = sum(
+            self._idf.get(token, self._unknown_weight)
+            for token in tokens
+            if token in explained_terms
+        )
+        explained = explained_weight / total_weight if total_weight else 0.0
+
+        labels = []
+        for index, support, matched in sorted(candidates, key=lambda c: -c[1]):
+            category = self._categories[index]
+            keywords = ", ".join(term for term in matched if " " not in term)
+            labels.append(
+                {
+                    "label": category["nombre"],
+                    "id": category["id"],
+                    "confianza": round(support * explained, 2),
+                    "justificacion": (
+                        "Clasificación léxica: el título contiene términos propios de la "
+                        f"categoría ({keywords})."
+                    ),
+                }
+            )
+
+        return LexicalPrediction(
+            labels=labels,
+            confidence=min(label["confianza"] for label in labels),
+        )
@@ -0,0 +1,301 @@
+"""Prompt templates for the Gemini classifier."""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Output format asking for a justification per label
+OUTPUT_FORMAT = (
+    """FORMATO DE RESPUESTA (OBLIGATORIO):
+Responde ÚNICAMENTE con JSON válido, sin texto adicional, sin explicaciones, sin backticks.
+Ejemplo de formato:
+
+{
+  "labels": [
+    {
+      "label": "NOMBRE_DE_CATEGORIA_1",
+      "id": 1,
+      "confianza": 0.95,
+      "justificacion": "Texto de la justificación"
+    },
+    {
+      "label": "NOMBRE_DE_CATEGORIA_2",
+      "id": 3,
+      "confianza": 0.98,
+      "justificacion": "Texto de la justificación"
+    }
+  ]
+}
+
+donde:
+- "labels" es una lista de objetos.
+- "label" es el nombre de la categoría seleccionada.
+"""
+    '-"id": es el identificador numérico único asignado a cada categoría. Debes '
+    "devolver exactamente el id asociado a la categoría, según la lista de categorías"
+    " proporcionada en el prompt.\n"
+    '- "confianza": representa el nivel de certeza del modelo sobre la asignación de '
+    "una categoría. Debe ser un valor numérico entre 0 y 1, donde:\n"
+    "1.0 indica certeza máxima basada en una alta coincidencia semántica con la "
+    "definición de la categoría,\n"
+    """0.7 a 0.9 indica coincidencia fuerte pero no absoluta,
+0.4 a 0.6 indica coincidencia débil o parcialmente relacionada,
+< 0.4 indica baja certeza; la categoría probablemente no aplica.
+"""
+    '- "justificacion": explica por qué el proyecto fue clasificado en esa categoria '
+    "usando unicamente la DEFINICIÓN de la categoria. máximo 200 palabras.\n"
+    """
+Si el título del proyecto es ambiguo o no coincide con ninguna definición, debes devolver:
+
+{
+  "labels": [
+    {
+      "label": "NO_CLASIFICADO",
+      "id": 0,
+      "confianza": 0.0,
+      "justificacion": "El texto no es suficiente o no coincide con ninguna categoría."
+    }
+  ]
+}
+
+"""
+)
+
+# Output format with ids and confidences only; far fewer output tokens
+COMPACT_OUTPUT_FORMAT = (
+    """FORMATO DE RESPUESTA (OBLIGATORIO):
+Responde ÚNICAMENTE con JSON válido, sin texto adicional, sin explicaciones, sin backticks.
+Ejemplo de formato:
+
+{
+  "labels": [
+    {"label": "NOMBRE_DE_CATEGORIA_1", "id": 1, "confianza": 0.95},
+    {"label": "NOMBRE_DE_CATEGORIA_2", "id": 3, "confianza": 0.98}
+  ]
+}
+
+donde:
+- "labels" es una lista de objetos.
+- "label" es el nombre de la categoría seleccionada.
+- "id" es el identificador numérico de la categoría según la lista de categorías proporcionada.
+"""
+    '- "confianza" es la certeza de la asignación entre 0 y 1: 1.0 certeza máxima, '
+    "0.7 a 0.9 coincidencia fuerte, 0.4 a 0.6 coincidencia débil, < 0.4 la categoría "
+    "probablemente no aplica.\n"
+    """- No incluyas justificaciones ni ningún otro campo.
+
+Si el título del proyecto es ambiguo o no coincide con ninguna definición, debes devolver:
+
+{
+  "labels": [
+    {"label": "NO_CLASIFICADO", "id": 0, "confianza": 0.0}
+  ]
+}
+
+"""
+)
+
+# Output format of a multi-title prompt, with a justification per label
+BATCH_OUTPUT_FORMAT = (
+    """FORMATO DE RESPUESTA (OBLIGATORIO):
+Recibirás varios títulos numerados. Clasifica cada título por separado aplicando
+las reglas anteriores y responde ÚNICAMENTE con JSON válido, sin texto adicional,
+sin explicaciones, sin backticks. Ejemplo de formato:
+
+{
+  "resultados": [
+    {
+      "indice": 1,
+      "labels": [
+        {
+          "label": "NOMBRE_DE_CATEGORIA_1",
+          "id": 1,
+          "confianza": 0.95,
+          "justificacion": "Texto de la justificación"
+        }
+      ]
+    },
+    {
+      "indice": 2,
+      "labels": [
+        {
+          "label": "NO_CLASIFICADO",
+          "id": 0,
+          "confianza": 0.0,
+          "justificacion": "El texto no es suficiente o no coincide con ninguna categoría."
+        }
+      ]
+    }
+  ]
+}
+
+donde:
+- "indice" es el número del título en la lista.
+- "labels" es la lista de categorías asignadas a ese título.
+- "label" es el nombre de la categoría seleccionada.
+- "id" es el identificador numérico de la categoría según la lista de categorías proporcionada.
+"""
+    '- "confianza" es la certeza de la asignación entre 0 y 1: 1.0 certeza máxima, '
+    "0.7 a 0.9 coincidencia fuerte, 0.4 a 0.6 coincidencia débil, < 0.4 la categoría "
+    "probablemente no aplica.\n"
+    '- "justificacion" explica por qué el título fue clasificado en esa categoría '
+    "usando únicamente la DEFINICIÓN de la categoría. máximo 200 palabras.\n"
+    "- Si un título es ambiguo o no coincide con ninguna definición, su única "
+    "etiqueta es NO_CLASIFICADO con id 0, como en el ejemplo.\n"
+    """- Debes devolver un elemento en "resultados" por cada título, en el mismo orden.
+
+"""
+)
+
+# Multi-title output format with ids and confidences only
+COMPACT_BATCH_OUTPUT_FORMAT = (
+    """FORMATO DE RESPUESTA (OBLIGATORIO):
+Recibirás varios títulos numerados. Clasifica cada título por separado aplicando
+las reglas anteriores y responde ÚNICAMENTE con JSON válido, sin texto adicional,
+sin explicaciones, sin backticks. Ejemplo de formato:
+
+{
+  "resultados": [
+    {"indice": 1, "labels": [{"label": "NOMBRE_DE_CATEGORIA_1", "id": 1, "confianza": 0.95}]},
+    {"indice": 2, "labels": [{"label": "NO_CLASIFICADO", "id": 0, "confianza": 0.0}]}
+  ]
+}
+
+donde:
+- "indice" es el número del título en la lista.
+- "labels" es la lista de categorías asignadas a ese título.
+- "label" es el nombre de la categoría seleccionada.
+- "id" es el identificador numérico de la categoría según la lista de categorías proporcionada.
+"""
+    '- "confianza" es la certeza de la asignación entre 0 y 1: 1.0 certeza máxima, '
+    "0.7 a 0.9 coincidencia fuerte, 0.4 a 0.6 coincidencia débil, < 0.4 la categoría "
+    "probablemente no aplica.\n"
+    """- No incluyas justificaciones ni ningún otro campo.
+"""
+    "- Si un título es ambiguo o no coincide con ninguna definición, su única "
+    "etiqueta es NO_CLASIFICADO con id 0, como en el ejemplo.\n"
+    """- Debes devolver un elemento en "resultados" por cada título, en el mismo orden.
+
+"""
+)
+
+# Appended to the prompt when an answer could not be parsed or repaired
+INVALID_OUTPUT_REMINDER = """
+
+Tu respuesta anterior no era JSON válido con el formato indicado. Responde de nuevo
+ÚNICAMENTE con el JSON completo, sin texto adicional y escapando las comillas dentro
+de los textos.
+"""
+
+
+def build_prompt_prefix(
+    categories: Dict[str, dict], compact: bool = False, batch: bool = False
+) -> str:
+    """
+    Build the static part of the classification prompt.
+
+    Single-title and multi-title prompts only differ in the output format,
+    which comes last so both start with the same instructions and categories.
+
+    Args:
+        categories: Category definitions keyed by name
+        compact: Ask for ids and confidences only, without justifications
+        batch: Ask for one result per numbered title
+
+    Returns:
+        Instructions with the category block, rules and output format
+    """
+    if batch:
+        output_format = COMPACT_BATCH_OUTPUT_FORMAT if compact else BATCH_OUTPUT_FORMAT
+    else:
+        output_format = COMPACT_OUTPUT_FORMAT if compact else OUTPUT_FORMAT
+    category_text_parts = []
+    for name, category_info in categories.items():
+        category_id = category_info["id"]
+        definition = category_info["definicion"]
+        category_text_parts.append(
+            f"- ID: {category_id}\n  NOMBRE: {name}\n  DEFINICION: {definition.strip()}\n"
+        )
+    categories_text = "\n".join(category_text_parts)
+
+    prompt = (
+        f"""
+Eres un modelo de lenguaje experto en clasificación de títulos de proyectos públicos
+según brechas de infraestructura y servicios definidas por el SNPMGI del Perú.
+
+Tu única tarea es leer el título del proyecto y asignarle UNA O VARIAS categorías
+de servicios publicos de la lista definida abajo.
+
+CATEGORÍAS DISPONIBLES:
+{categories_text}
+
+REGLAS ESTRICTAS:
+- Analiza el significado del título del proyecto, no solo palabras sueltas.
+- Asigna múltiples categorías solo si el título realmente cubre más de una brecha.
+"""
+        "- No inventes información adicional que no esté presente o inferida "
+        "razonablemente del título del proyecto.\n"
+        f"""
+{output_format}"""
+    )
+    return prompt
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    Precompiled classification prompt.
+
+    The static prefix (instructions and category block) is built once and
+    always comes first, so every prompt starts with the same bytes and the
+    provider can reuse it through context caching. Only the suffix with the
+    title(s) changes between requests. Multi-title prompts have a prefix of
+    their own, with the output format of a batch.
+    """
+
+    prefix: str
+    batch_prefix: str
+    fingerprint: str = field(init=False)
+
+    def __post_init__(self):
+        """Compute the fingerprint of the static prefix."""
+        digest = hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()
+        object.__setattr__(self, "fingerprint", digest)
+
+    def render_suffix(self, project_title: str) -> str:
+        """Build the dynamic part of a single-title prompt."""
+        project_title = str(project_title).strip()
+        return f'TEXTO A CLASIFICAR:\n"""{project_title}"""\n'
+
+    def render_batch_suffix(self, project_titles: List[str]) -> str:
+        """Build the dynamic part of a multi-title prompt."""
+        titles_text = "\n".join(
+            f'{position}. """{str(title).strip()}"""'
+            for position, title in enumerate(project_titles, start=1)
+        )
+        return f"TÍTULOS A CLASIFICAR:\n{titles_text}\n"
+
+    def render(self, project_title: str) -> str:
+        """Build the full prompt for one title."""
+        return self.prefix + self.render_suffix(project_title)
+
+    def render_batch(self, project_titles: List[str]) -> str:
+        """Build the full prompt for several titles."""
+        return self.batch_prefix + self.render_batch_suffix(project_titles)
+
+
+def compile_prompt_template(categories: Dict[str, dict], compact: bool = False) -> PromptTemplate:
+    """
+    Compile the prompt template for a set of categories.
+
+    Args:
+        categories: Category definitions keyed by name
+        compact: Compile the variant without justifications
+
+    Returns:
+        Immutable prompt template
+    """
+    return PromptTemplate(
+        prefix=build_prompt_prefix(categories, compact),
+        batch_prefix=build_prompt_prefix(categories, compact, batch=True),
+    )
@@ -0,0 +1,441 @@
+"""Client-side rate limiting, backoff, circuit breaking, deadlines and hedging of upstream calls."""
+
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# HTTP statuses worth retrying: throttling, timeouts and server-side failures
+_RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Request errors that will fail the same way again; they say nothing about upstream health
+_REQUEST_ERROR_STATUSES = {400, 404, 409, 413, 422}
+
+_RETRY_IN = re.compile(r"retry in ([0-9.]+)\s*s", re.IGNORECASE)
+_RETRY_DELAY_SECONDS = re.compile(r"retry_delay\s*\{\s*seconds:\s*([0-9]+)")
+
+
+@dataclass(frozen=True)
+class UpstreamFailure:
+    """How an upstream error should be handled."""
+
+    cause: str
+    retryable: bool
+    retry_after: Optional[float] = None
+
+    @property
+    def counts_against_upstream(self) -> bool:
+        """Whether the error says something about upstream health."""
+        return self.cause != "invalid_request"
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a google.api_core error (or anything with a `code`)."""
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_hint(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from RetryInfo details or the message."""
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return float(delay.seconds) + getattr(delay, "nanos", 0) / 1e9
+
+    message = str(exc)
+    match = _RETRY_IN.search(message) or _RETRY_DELAY_SECONDS.search(message)
+    return float(match.group(1)) if match else None
+
+
+def classify_failure(exc: BaseException) -> UpstreamFailure:
+    """
+    Decide whether an upstream error is worth retrying.
+
+    Args:
+        exc: Exception raised by the upstream call
+
+    Returns:
+        Cause label, retryability and the server's retry hint if any
+    """
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return UpstreamFailure("timeout", True)
+    if isinstance(exc, ConnectionError):
+        return UpstreamFailure("connection", True)
+
+    code = _status_code(exc)
+    if code == 429:
+        return UpstreamFailure("rate_limited", True, _retry_hint(exc))
+    if code in (401, 403):
+        return UpstreamFailure("auth", False)
+    if code in _REQUEST_ERROR_STATUSES:
+        return UpstreamFailure("invalid_request", False)
+    if code in _RETRYABLE_STATUSES:
+        return UpstreamFailure("server_error", True, _retry_hint(exc))
+    return UpstreamFailure("unknown", True)
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, retry_after: Optional[float] = None
+) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Number of the attempt that just failed (1-based)
+        base: Delay ceiling of the first retry
+        cap: Maximum delay ceiling
+        retry_after: Server retry hint; the delay is never shorter than it
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute` tokens per minute.
+
+    Callers reserve tokens up front and sleep until the bucket has refilled
+    enough, so waiters are served in arrival order without a lock. The bucket
+    never holds more than one minute of tokens.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Tokens granted per minute
+        """
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens from the bucket.
+
+        Args:
+            amount: Tokens to take (clamped to the capacity)
+
+        Returns:
+            Seconds the caller must wait before using them
+        """
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+        return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` tokens are available."""
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def available(self, amount: float) -> bool:
+        """Whether `amount` tokens could be taken without waiting."""
+        self._refill()
+        return self._tokens >= min(amount, self.capacity)
+
+    def drain(self, seconds: float) -> None:
+        """Empty the bucket so new callers wait at least `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self._rate)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute quota kept on the client side.
+
+    When the server still answers with a quota error, `pause` drains both
+    buckets for the hinted time, so the whole process backs off together
+    instead of every caller retrying on its own schedule.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request quota (0 disables the limit)
+            tokens_per_minute: Token quota (0 disables the limit)
+        """
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait for one request and `tokens` tokens of quota.
+
+        Args:
+            tokens: Estimated tokens consumed by the request
+        """
+        wait = 0.0
+        if self._requests is not None:
+            wait = self._requests.reserve(1)
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.reserve(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, tokens: int) -> bool:
+        """
+        Take one request and `tokens` tokens of quota only if no wait is needed.
+
+        Args:
+            tokens: Estimated tokens consumed by the request
+
+        Returns:
+            True if the quota was taken
+        """
+        buckets: List[Tuple[TokenBucket, int]] = []
+        if self._requests is not None:
+            buckets.append((self._requests, 1))
+        if self._tokens is not None:
+            buckets.append((self._tokens, tokens))
+        if not all(bucket.available(amount) for bucket, amount in buckets):
+            return False
+        for bucket, amount in buckets:
+            bucket.reserve(amount)
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Hold every new request for `seconds`."""
+        for bucket in (self._requests, self._tokens):
+            if bucket is not None:
+                bucket.drain(seconds)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Seconds until the next upstream call is allowed
+        """
+        super().__init__(f"Upstream circuit open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stop calling upstream while its recent error rate is too high.
+
+    The outcome of the last `window` calls is tracked. Once at least
+    `min_calls` were made and the share of failures reaches
+    `failure_threshold`, the circuit opens and calls fail immediately for
+    `cooldown` seconds. After that one probe call is let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 30.0,
+    ):
+        """
+        Initialize a closed circuit.
+
+        Args:
+            failure_threshold: Failure share that opens the circuit
+            window: Number of recent calls considered
+            min_calls: Calls needed before the circuit can open
+            cooldown: Seconds the circuit stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allows_call(self) -> bool:
+        """Whether `check` would let a call through right now."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def cooldown_remaining(self) -> float:
+        """Seconds until a call may be let through again (at least 1 while open)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(self.cooldown - (time.monotonic() - self._opened_at), 1.0)
+
+    def check(self) -> None:
+        """
+        Allow a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or a probe is already running
+        """
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        raise CircuitOpenError(self.cooldown_remaining())
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        if self._opened_at is not None:
+            self._opened_at = None
+            self._probing = False
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if needed."""
+        if self._opened_at is not None:
+            # A failed probe keeps the circuit open for another cooldown
+            self._opened_at = time.monotonic()
+            self._probing = False
+            return
+
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+
+    def release(self) -> None:
+        """Give the probe slot back when the call said nothing about upstream health."""
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and failure share."""
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "recent_failure_rate": self._outcomes.count(False) / calls if calls else 0.0,
+            "times_opened": self.times_opened,
+        }
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the time budget of the current request runs out."""
+
+
+# Monotonic time by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the upstream work done inside the block.
+
+    The deadline follows the context into tasks started from the block. A
+    nested deadline can only shorten the one already set.
+
+    Args:
+        seconds: Time budget, or None for no deadline
+    """
+    if seconds is None:
+        yield
+        return
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+class HedgePolicy:
+    """
+    Decide when to send a backup copy of a slow upstream call.
+
+    Latencies of recent calls are tracked; a call still running after the
+    chosen percentile of them gets a second copy, and whichever answers
+    first wins. At most `max_rate` of recent calls are hedged, so a general
+    slowdown cannot double the upstream load.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        max_rate: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            percentile: Latency percentile after which to hedge (0 disables hedging)
+            max_rate: Maximum share of recent calls that may be hedged
+            min_samples: Latencies needed before hedging starts
+            window: Number of recent calls considered
+        """
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._hedged: Deque[bool] = deque(maxlen=window)
+
+    def delay(self) -> Optional[float]:
+        """
+        Seconds to wait before hedging the next call.
+
+        Returns:
+            The latency percentile, or None if the call must not be hedged
+        """
+        if self.percentile <= 0 or len(self._latencies) < self.min_samples:
+            return None
+        if self._hedged.count(True) >= self.max_rate * len(self._hedged):
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(int(self.percentile * len(latencies)), len(latencies) - 1)]
+
+    def record(self, seconds: float, hedged: bool) -> None:
+        """
+        Record a finished call.
+
+        Args:
+            seconds: Time the first copy had been running when the call finished
+            hedged: Whether a backup copy was sent
+        """
+        self._latencies.append(seconds)
+        self._hedged.append(hedged)
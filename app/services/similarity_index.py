@@ -0,0 +1,259 @@
+"""Near-duplicate index of previously classified titles."""
+
+import json
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.lexical_classifier import tokenize
+from app.services.text_utils import normalize_title, strip_location
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """Contiguous vectors of the entries sharing one keyword signature."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((16, dim), dtype=np.float32)
+        self.entry_ids: List[int] = []
+
+    def append(self, vector: np.ndarray, entry_id: int) -> int:
+        """Add a vector and return its row."""
+        row = len(self.entry_ids)
+        if row == len(self.vectors):
+            grown = np.zeros((row * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:row] = self.vectors
+            self.vectors = grown
+        self.vectors[row] = vector
+        self.entry_ids.append(entry_id)
+        return row
+
+    def remove(self, row: int) -> Optional[int]:
+        """Remove a row by moving the last one into it; return the moved entry id."""
+        last = len(self.entry_ids) - 1
+        moved_id = None
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            moved_id = self.entry_ids[last]
+            self.entry_ids[row] = moved_id
+        self.entry_ids.pop()
+        return moved_id
+
+
+class _Entry:
+    """A stored title and where its vector lives."""
+
+    __slots__ = ("signature", "row", "title", "result")
+
+    def __init__(self, signature: int, row: int, title: str, result: str):
+        self.signature = signature
+        self.row = row
+        self.title = title
+        self.result = result
+
+
+class SimilarityIndex:
+    """
+    Hashed character trigram vectors of classified titles.
+
+    Titles are reduced to their content words (location, stopwords and numbers
+    removed), hashed into a fixed number of dimensions and L2-normalized, so a
+    query is one matrix-vector product. Every entry also has a signature of the
+    category keywords it contains: a neighbour is only reused when both titles
+    mention exactly the same category keywords, which keeps "educacion
+    primaria" from matching "educacion secundaria". Vectors are stored in one
+    contiguous bucket per signature, so a query only scans its own bucket.
+
+    Entries are kept in insertion order and the oldest ones are evicted once
+    the memory budget is reached.
+    """
+
+    def __init__(self, vocabulary: Set[str], dim: int = 256, max_bytes: int = 128 * 1024**2):
+        """
+        Initialize an empty index.
+
+        Args:
+            vocabulary: Category keywords used for the signature guard
+            dim: Number of hashed dimensions per vector
+            max_bytes: Memory budget for vectors and stored results
+        """
+        self.vocabulary = vocabulary
+        self.dim = dim
+        self.max_bytes = max_bytes
+
+        self._buckets: Dict[int, _Bucket] = {}
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self._result_bytes = 0
+
+    def __len__(self) -> int:
+        """Number of stored titles."""
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the stored entries."""
+        return len(self._entries) * self.dim * 4 + self._result_bytes
+
+    def _features(self, project_title: str) -> Tuple[np.ndarray, int]:
+        """Build the normalized vector and keyword signature of a title."""
+        tokens = tokenize(strip_location(normalize_title(project_title)))
+        keywords = " ".join(sorted(set(tokens) & self.vocabulary))
+        signature = zlib.crc32(keywords.encode("utf-8"))
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {' '.join(tokens)} "
+        for i in range(len(padded) - 2):
+            digest = zlib.crc32(padded[i : i + 3].encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector, signature
+
+    def add(self, project_title: str, result: Dict[str, Any]) -> None:
+        """
+        Store the classification of a title.
+
+        Args:
+            project_title: The classified project title
+            result: Classification result to reuse for similar titles
+        """
+        vector, signature = self._features(project_title)
+        self._insert(vector, signature, project_title, json.dumps(result, ensure_ascii=False))
+
+    def _insert(self, vector: np.ndarray, signature: int, title: str, result: str) -> None:
+        """Append an entry, evicting the oldest ones to stay within budget."""
+        entry_bytes = self.dim * 4 + len(result)
+        while self._entries and self.memory_bytes + entry_bytes > self.max_bytes:
+            self._evict_oldest()
+        if entry_bytes > self.max_bytes:
+            return
+
+        bucket = self._buckets.get(signature)
+        if bucket is None:
+            bucket = self._buckets[signature] = _Bucket(self.dim)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        row = bucket.append(vector, entry_id)
+        self._entries[entry_id] = _Entry(signature, row, title, result)
+        self._result_bytes += len(result)
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest entry."""
+        _, entry = self._entries.popitem(last=False)
+        self._result_bytes -= len(entry.result)
+
+        bucket = self._buckets[entry.signature]
+        moved_id = bucket.remove(entry.row)
+        if moved_id is not None:
+            self._entries[moved_id].row = entry.row
+        if not bucket.entry_ids:
+            del self._buckets[entry.signature]
+
+    def query(self, project_title: str, threshold: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """
+        Find the most similar stored title.
+
+        Args:
+            project_title: The project title to look up
+            threshold: Minimum cosine similarity to accept a neighbour
+
+        Returns:
+            Similarity and stored result of the nearest neighbour with the same
+            category keywords, or None if there is none above the threshold
+        """
+        vector, signature = self._features(project_title)
+        bucket = self._buckets.get(signature)
+        if bucket is None:
+            return None
+
+        similarities = bucket.vectors[: len(bucket.entry_ids)] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+
+        entry = self._entries[bucket.entry_ids[best]]
+        return float(similarities[best]), json.loads(entry.result)
+
+    def save(self, path: str, scope: str = "") -> None:
+        """
+        Persist the index next to `path` (`.npz` vectors and `.jsonl` entries).
+
+        Args:
+            path: Base path of the files, without extension
+            scope: What the stored results depend on (e.g. models and
+                categories); `load` ignores files saved under another scope
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        entries = list(self._entries.values())
+        vectors = np.zeros((len(entries), self.dim), dtype=np.float32)
+        for i, entry in enumerate(entries):
+            vectors[i] = self._buckets[entry.signature].vectors[entry.row]
+        signatures = np.array([entry.signature for entry in entries], dtype=np.int64)
+
+        with open(f"{path}.npz.tmp", "wb") as f:
+            np.savez(f, vectors=vectors, signatures=signatures, scope=np.array(scope))
+        with open(f"{path}.jsonl.tmp", "w", encoding="utf-8") as f:
+            for entry in entries:
+                line = {"title": entry.title, "result": json.loads(entry.result)}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        os.replace(f"{path}.npz.tmp", f"{path}.npz")
+        os.replace(f"{path}.jsonl.tmp", f"{path}.jsonl")
+        logger.info(f"Similarity index saved with {len(entries)} titles")
+
+    def load(self, path: str, scope: str = "") -> None:
+        """
+        Load entries saved by `save`, if the files exist.
+
+        Files saved under a different scope or with a different number of
+        dimensions are ignored.
+
+        Args:
+            path: Base path of the files, without extension
+            scope: Scope the entries must have been saved under
+        """
+        if not (os.path.exists(f"{path}.npz") and os.path.exists(f"{path}.jsonl")):
+            return
+
+        arrays = np.load(f"{path}.npz")
+        vectors, signatures = arrays["vectors"], arrays["signatures"]
+        saved_scope = str(arrays["scope"]) if "scope" in arrays.files else ""
+        if saved_scope != scope:
+            logger.warning("Ignoring similarity index saved for other models or categories")
+            return
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            logger.warning(f"Ignoring similarity index with dimension {vectors.shape[-1]}")
+            return
+
+        with open(f"{path}.jsonl", "r", encoding="utf-8") as f:
+            for vector, signature, line in zip(vectors, signatures, f):
+                entry = json.loads(line)
+                result = json.dumps(entry["result"], ensure_ascii=False)
+                self._insert(vector, int(signature), entry["title"], result)
+        logger.info(f"Similarity index loaded with {len(self._entries)} titles")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size statistics.
+
+        Returns:
+            Dictionary with entry counts and memory usage
+        """
+        return {
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "memory_bytes": self.memory_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,67 @@
+"""Coalescing of identical in-flight calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers that arrive while a call for the same key is running wait for that
+    call instead of starting their own, and all of them receive its result or
+    its exception. A caller being cancelled does not cancel the shared call
+    unless it was the last one waiting for it.
+    """
+
+    def __init__(self):
+        """Initialize the in-flight registry."""
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `func` for `key`, or join the call already running for it.
+
+        Args:
+            key: Identifies equivalent calls
+            func: Coroutine factory that performs the call
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        """Drop a finished call so the next caller starts a fresh one."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,57 @@
+"""Gemini structured-output configuration derived from the Pydantic schemas."""
+
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+# Schema keywords understood by Gemini's response_schema
+_SUPPORTED_KEYS = ("type", "description", "enum", "nullable")
+
+
+def _convert(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a JSON schema node to the OpenAPI subset Gemini accepts."""
+    if "$ref" in schema:
+        schema = definitions[schema["$ref"].rsplit("/", 1)[-1]]
+
+    converted = {key: schema[key] for key in _SUPPORTED_KEYS if key in schema}
+    if "properties" in schema:
+        converted["properties"] = {
+            name: _convert(node, definitions) for name, node in schema["properties"].items()
+        }
+        # Gemini may leave out optional properties; the model output needs all of them
+        converted["required"] = list(schema["properties"])
+    if "items" in schema:
+        converted["items"] = _convert(schema["items"], definitions)
+    return converted
+
+
+def gemini_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Build a Gemini response schema from a Pydantic model.
+
+    Args:
+        model: Pydantic model describing the expected JSON output
+
+    Returns:
+        Schema dictionary for `GenerationConfig.response_schema`
+    """
+    schema = model.model_json_schema()
+    return _convert(schema, schema.get("$defs", {}))
+
+
+def json_generation_config(model: Type[BaseModel], **options: Any) -> Dict[str, Any]:
+    """
+    Build a generation config that constrains the output to a Pydantic model.
+
+    Args:
+        model: Pydantic model describing the expected JSON output
+        options: Extra generation options (e.g. max_output_tokens)
+
+    Returns:
+        Generation config dictionary for `generate_content_async`
+    """
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": gemini_schema(model),
+        **options,
+    }
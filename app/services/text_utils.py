@@ -0,0 +1,59 @@
+"""Text normalization helpers shared by the classification services."""
+
+import re
+import unicodedata
+
+
+def strip_accents(text: str) -> str:
+    """
+    Remove diacritics from a text.
+
+    Args:
+        text: Text to clean
+
+    Returns:
+        Text without accents (e.g. "educación" -> "educacion")
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a project title so equivalent titles compare equal.
+
+    Case, accents and repeated whitespace are ignored.
+
+    Args:
+        title: Project title to normalize
+
+    Returns:
+        Normalized title
+    """
+    return " ".join(strip_accents(str(title)).casefold().split())
+
+
+# Words that introduce the location part of a title ("... en el distrito de X")
+_LOCATION_MARKERS = re.compile(
+    r"\b(distrito|provincia|departamento|region|localidad|centro poblado|ccpp|caserio"
+    r"|comunidad campesina|comunidad nativa|anexo|asentamiento humano|urbanizacion)\b"
+)
+
+
+def strip_location(normalized_title: str) -> str:
+    """
+    Drop the location part of a normalized title.
+
+    Titles usually end with the place where the investment happens, which says
+    nothing about the service being provided.
+
+    Args:
+        normalized_title: Title already passed through `normalize_title`
+
+    Returns:
+        Title up to the first location marker
+    """
+    match = _LOCATION_MARKERS.search(normalized_title)
+    if match is None:
+        return normalized_title
+    return normalized_title[: match.start()].strip()
@@ -0,0 +1,111 @@
+"""Streaming readers for files of project titles (CSV, JSONL or plain text)."""
+
+import csv
+import json
+import os
+from typing import Iterable, Iterator, Optional, Tuple
+
+SUPPORTED_FORMATS = ("csv", "jsonl", "txt")
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the format of a titles file from its extension.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        One of SUPPORTED_FORMATS (plain text if the extension is unknown)
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    return "txt"
+
+
+def iter_titles(lines: Iterable[str], fmt: str, column: str = "title") -> Iterator[Tuple[int, str]]:
+    """
+    Read titles from lines of text without loading them all in memory.
+
+    Args:
+        lines: Lines of the input (a file object or any iterable of strings)
+        fmt: Input format, one of SUPPORTED_FORMATS
+        column: CSV column or JSON key holding the title
+
+    Yields:
+        Tuples of (1-based row number, title)
+
+    Raises:
+        ValueError: If the format is unknown, a JSONL line is invalid or the
+            title column is missing
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is not None and column not in reader.fieldnames:
+            raise ValueError(
+                f"Column '{column}' not found; available columns: {', '.join(reader.fieldnames)}"
+            )
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, (row.get(column) or "").strip()
+
+    elif fmt == "jsonl":
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on row {row_number}: {str(e)}")
+            value = record.get(column) if isinstance(record, dict) else record
+            if value is None:
+                raise ValueError(f"Key '{column}' not found on row {row_number}")
+            yield row_number, str(value).strip()
+
+    elif fmt == "txt":
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            yield row_number, line.strip()
+
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'; expected one of {SUPPORTED_FORMATS}")
+
+
+def iter_titles_from_file(
+    path: str, column: str = "title", fmt: Optional[str] = None
+) -> Iterator[Tuple[int, str]]:
+    """
+    Stream titles from a file.
+
+    Args:
+        path: Path of the input file
+        column: CSV column or JSON key holding the title
+        fmt: Input format (detected from the extension if omitted)
+
+    Yields:
+        Tuples of (1-based row number, title)
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from iter_titles(f, fmt or detect_format(path), column)
+
+
+def count_titles(path: str, column: str = "title", fmt: Optional[str] = None) -> int:
+    """
+    Count the titles of a file with a streaming pass.
+
+    Args:
+        path: Path of the input file
+        column: CSV column or JSON key holding the title
+        fmt: Input format (detected from the extension if omitted)
+
+    Returns:
+        Number of rows
+    """
+    return sum(1 for _ in iter_titles_from_file(path, column, fmt))
@@ -0,0 +1,142 @@
+"""
+Benchmark the logging cost of a classification request.
+
+Emits the log records of a typical `/api/v1/classify` request (request
+received, upstream attempt, success, completion and access line) many times
+and measures the time spent on the calling thread, i.e. on the event loop,
+per request. Compares the previous setup (synchronous stream handler,
+eagerly formatted f-strings) with the queued JSON setup, with and without
+sampling. Logs are written to a temporary file, once as fast as the disk
+allows and once through a sink whose writes block for a while, like stdout
+piped to a busy log collector. Prints a JSON report.
+
+Usage:
+    python -m benchmarks.bench_logging --requests 20000 --sink-latency-us 100
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, TextIO
+
+from app.core import logging_config
+from app.core.config import settings
+
+_TITLE = "Mejoramiento y ampliación del servicio de agua potable en el centro poblado San Juan"
+
+
+class _SlowStream:
+    """File whose writes block for a fixed time, like a congested pipe."""
+
+    def __init__(self, stream: TextIO, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def _eager_request(logger: logging.Logger) -> None:
+    """Records of one request as they were logged before (f-strings)."""
+    logger.info(f"Received classification request for title: {_TITLE[:50]}...")
+    logger.info(f"Classification attempt {1}/{settings.GEMINI_MAX_RETRIES}")
+    logger.info("Classification successful")
+    logger.info(f"Classification completed with {1} labels")
+    logger.info(f"POST /api/v1/classify {200} {12.345:.1f}ms")
+
+
+def _lazy_request(logger: logging.Logger) -> None:
+    """Records of one request as they are logged now (lazy, structured)."""
+    with logging_config.request_context():
+        logger.info("Received classification request for title: %.50s...", _TITLE)
+        logger.info("Classification attempt %d/%d", 1, settings.GEMINI_MAX_RETRIES)
+        logger.info("Classification successful")
+        logger.info("Classification completed with %d labels", 1)
+        logger.info(
+            "%s %s %d %.1fms",
+            "POST",
+            "/api/v1/classify",
+            200,
+            12.345,
+            extra={"method": "POST", "path": "/api/v1/classify", "status": 200},
+        )
+
+
+def _measure(requests: int, emit: Callable[[logging.Logger], None]) -> Dict[str, Any]:
+    """Time `requests` emissions on this thread, then until everything is written."""
+    logger = logging.getLogger("app.bench")
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        emit(logger)
+    caller_seconds = time.perf_counter() - started_at
+    logging_config.stop_logging()
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    return {
+        "caller_us_per_request": round(caller_seconds / requests * 1e6, 2),
+        "total_us_per_request": round((time.perf_counter() - started_at) / requests * 1e6, 2),
+    }
+
+
+def _run_sync(requests: int, path: str, latency: float) -> Dict[str, Any]:
+    """Previous setup: text records written synchronously by the caller."""
+    root = logging.getLogger()
+    with open(path, "w") as stream:
+        handler = logging.StreamHandler(_SlowStream(stream, latency) if latency else stream)
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+        root.handlers = [handler]
+        result = _measure(requests, _eager_request)
+    root.handlers = []
+    return result
+
+
+def _run_queued(requests: int, path: str, latency: float, sample_rate: float) -> Dict[str, Any]:
+    """Current setup: JSON records formatted and written by the listener thread."""
+    settings.LOG_FORMAT = "json"
+    settings.LOG_SAMPLE_RATE = sample_rate
+    with open(path, "w") as stream:
+        logging_config.setup_logging(_SlowStream(stream, latency) if latency else stream)
+        result = _measure(requests, _lazy_request)
+    logging.getLogger().handlers = []
+    return result
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--sink-latency-us", type=float, default=100.0, help="Per write")
+    args = parser.parse_args()
+
+    settings.LOG_LEVEL = "INFO"
+    logging.getLogger().setLevel(logging.INFO)
+    report: Dict[str, Any] = {
+        "benchmark": "logging",
+        "requests": args.requests,
+        "records_per_request": 5,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.log")
+        for sink, latency in (("fast_sink", 0.0), ("slow_sink", args.sink_latency_us / 1e6)):
+            report[sink] = {
+                "sync_text_eager": _run_sync(args.requests, path, latency),
+                "queued_json_lazy": _run_queued(args.requests, path, latency, 1.0),
+                f"queued_json_lazy_sampled_{args.sample_rate}": _run_queued(
+                    args.requests, path, latency, args.sample_rate
+                ),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
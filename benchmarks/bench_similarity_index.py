@@ -0,0 +1,110 @@
+"""
+Benchmark the near-duplicate title index.
+
+Fills a SimilarityIndex with synthetic project titles and measures insert
+throughput, query latency and memory. Prints a JSON report.
+
+Usage:
+    python -m benchmarks.bench_similarity_index --entries 100000 --queries 1000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.services.lexical_classifier import category_vocabulary
+from app.services.similarity_index import SimilarityIndex
+
+_ACTIONS = ["Mejoramiento", "Ampliación", "Creación", "Recuperación", "Mejoramiento y ampliación"]
+_SERVICES = [
+    "del servicio de agua potable",
+    "del servicio de alcantarillado",
+    "del servicio de agua potable y alcantarillado",
+    "del servicio de educación inicial",
+    "del servicio de educación primaria",
+    "del servicio de educación secundaria",
+    "de pistas y veredas",
+    "del servicio de movilidad urbana",
+    "del parque zonal",
+    "de la planta de tratamiento de aguas residuales",
+]
+_PLACES = ["San Juan", "Santa Rosa", "Pampas", "Ate", "Lince", "Huancayo", "Pucará", "Chilca"]
+_RESULT = {
+    "labels": [
+        {
+            "label": "servicio de agua potable mediante red publica o pileta publica",
+            "id": 2,
+            "confianza": 0.95,
+            "justificacion": "El título menciona explícitamente el servicio de agua potable.",
+        }
+    ]
+}
+
+
+def _title(rng: random.Random, n: int) -> str:
+    """Build a synthetic project title."""
+    return (
+        f"{rng.choice(_ACTIONS)} {rng.choice(_SERVICES)} en el sector {n} "
+        f"de la localidad de {rng.choice(_PLACES)} {n % 977}, "
+        f"distrito de {rng.choice(_PLACES)}"
+    )
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--max-mb", type=int, default=256)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = SimilarityIndex(
+        vocabulary=category_vocabulary(DEFINICIONES_DE_CATEGORIAS),
+        dim=args.dim,
+        max_bytes=args.max_mb * 1024**2,
+    )
+
+    started = time.perf_counter()
+    for n in range(args.entries):
+        index.add(_title(rng, n), _RESULT)
+    insert_seconds = time.perf_counter() - started
+
+    latencies_ms = []
+    hits = 0
+    for n in range(args.queries):
+        title = _title(rng, args.entries + n)
+        started = time.perf_counter()
+        match = index.query(title, args.threshold)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+        hits += match is not None
+
+    report = {
+        "benchmark": "similarity_index",
+        "entries": len(index),
+        "dim": args.dim,
+        "memory_mb": round(index.memory_bytes / 1024**2, 1),
+        "inserts_per_second": round(args.entries / insert_seconds),
+        "query_ms": {
+            "mean": round(statistics.mean(latencies_ms), 3),
+            "p50": round(_percentile(latencies_ms, 0.50), 3),
+            "p95": round(_percentile(latencies_ms, 0.95), 3),
+            "p99": round(_percentile(latencies_ms, 0.99), 3),
+        },
+        "hit_ratio": round(hits / args.queries, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the cold start of the service.
+
+Starts `uvicorn app.main:app` in a fresh process several times and measures
+how long it takes until `/health` answers, plus the import time of
+`app.main` on its own. Prints a JSON report.
+
+Usage:
+    python -m benchmarks.cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+_IMPORT_PROBE = (
+    "import time; started_at = time.perf_counter(); import app.main, sys; "
+    "print(time.perf_counter() - started_at, 'google.generativeai' in sys.modules)"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _environment() -> Dict[str, str]:
+    """Environment of the measured processes; no real API key is needed."""
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "cold-start-benchmark")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def measure_import() -> Dict[str, Any]:
+    """Seconds to import app.main, and whether the Gemini SDK was imported."""
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE],
+        env=_environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return {"seconds": float(output[0]), "gemini_sdk_imported": output[1] == "True"}
+
+
+def measure_time_to_healthy(timeout: float) -> float:
+    """
+    Start the server and wait for its first healthy response.
+
+    Args:
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        Seconds from process start to the first 200 from /health
+
+    Raises:
+        TimeoutError: If /health does not answer in time
+    """
+    port = _free_port()
+    started_at = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=_environment(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started_at < timeout:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+                if response.status_code == 200:
+                    return time.perf_counter() - started_at
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    healthy: List[float] = [measure_time_to_healthy(args.timeout) for _ in range(args.runs)]
+
+    report = {
+        "benchmark": "cold_start",
+        "runs": args.runs,
+        "import_app_main_s": round(statistics.median(i["seconds"] for i in imports), 3),
+        "gemini_sdk_imported_at_startup": any(i["gemini_sdk_imported"] for i in imports),
+        "time_to_healthy_s": {
+            "median": round(statistics.median(healthy), 3),
+            "max": round(max(healthy), 3),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Load test of POST /api/v1/classify.
+
+Drives the endpoint at increasing concurrency, either in-process (through the
+ASGI app with the fake Gemini backend, no API key needed) or over HTTP
+against a running server, and reports throughput, latency percentiles and
+event-loop lag per concurrency level. Prints a JSON report.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 8 32 128 --requests 500
+    python -m benchmarks.load_test --url http://localhost:8080 --concurrency 4 16
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_similarity_index import _percentile, _title
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def _run(self) -> None:
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - started_at - self.interval, 0.0))
+
+    def __enter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._task.cancel()
+
+
+async def run_level(
+    client: httpx.AsyncClient, titles: List[str], concurrency: int, detail: str = "full"
+) -> Dict[str, Any]:
+    """
+    Send every title with a fixed number of concurrent clients.
+
+    Args:
+        client: HTTP client bound to the service
+        titles: Titles to classify (one request each)
+        concurrency: Number of requests in flight at any time
+        detail: "full" or "compact" (no justifications)
+
+    Returns:
+        Throughput, latency percentiles, errors, requests shed by admission
+        control and event-loop lag
+    """
+    pending = iter(titles)
+    latencies: List[float] = []
+    errors = 0
+    rejected = 0
+
+    async def worker() -> None:
+        nonlocal errors, rejected
+        for title in pending:
+            started_at = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/v1/classify", json={"title": title, "detail": detail}
+                )
+                failed = response.status_code != 200 or bool(response.json().get("error"))
+                rejected += response.status_code in (429, 503)
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started_at)
+            errors += failed
+
+    with LoopLagMonitor() as monitor:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    lags = monitor.lags or [0.0]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rejected": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+        },
+        "loop_lag_ms": {
+            "p99": round(_percentile(lags, 0.99) * 1000, 2),
+            "max": round(max(lags) * 1000, 2),
+        },
+    }
+
+
+async def _in_process_client(
+    args: argparse.Namespace, stack: contextlib.AsyncExitStack
+) -> httpx.AsyncClient:
+    """Client calling the ASGI app directly, with the fake backend swapped in."""
+    from app.main import app
+    from app.services.fake_model import FakeGenerativeModel
+    from app.services.resilience import RateLimiter
+
+    # ASGITransport does not run the lifespan that builds the service
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    service = app.state.classifier_service
+    service.model = FakeGenerativeModel(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        categories=service.categories,
+    )
+    for member in service.pool.members:
+        member.rate_limiter = RateLimiter(0, 0)
+    if not args.keep_shortcuts:
+        # Measure the full model path instead of local answers
+        service.lexical_classifier = None
+        service.similarity_index = None
+        service.cache = None
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every concurrency level and build the report."""
+    rng = random.Random(args.seed)
+    levels = []
+    async with contextlib.AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=120)
+        else:
+            client = await _in_process_client(args, stack)
+        await stack.enter_async_context(client)
+        for level, concurrency in enumerate(args.concurrency):
+            # Fresh titles per level so no level is served by earlier results
+            offset = level * args.requests
+            titles = [_title(rng, offset + n) for n in range(args.requests)]
+            levels.append(await run_level(client, titles, concurrency, args.detail))
+
+    return {
+        "benchmark": "load_test",
+        "target": args.url or "in-process",
+        "detail": args.detail,
+        "fake_backend": (
+            None
+            if args.url
+            else {
+                "latency_ms": args.latency_ms,
+                "latency_sigma": args.latency_sigma,
+                "error_rate": args.error_rate,
+                "malformed_rate": args.malformed_rate,
+                "shortcuts": args.keep_shortcuts,
+            }
+        ),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Base URL of a running service (default: in-process)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per level")
+    parser.add_argument("--detail", choices=("full", "compact"), default="full")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake model median")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Fake model spread")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--keep-shortcuts", action="store_true", help="Keep cache/lexical/index")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
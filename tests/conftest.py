@@ -8,13 +8,17 @@ from fastapi.testclient import TestClient
 os.environ["GEMINI_API_KEY"] = "test-api-key"
 os.environ["ENVIRONMENT"] = "testing"
 os.environ["LOG_LEVEL"] = "DEBUG"
+os.environ["CACHE_DB_PATH"] = ""
+os.environ["SIMILARITY_INDEX_PATH"] = ""
+os.environ["JOBS_DB_PATH"] = ""
 
 
 @pytest.fixture
 def client():
-    """Create a test client."""
+    """Create a test client running the application lifespan."""
     from app.main import app
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -30,8 +34,61 @@ def mock_classification_response():
         "labels": [
             {
                 "label": "servicio de agua potable mediante red publica o pileta publica",
+                "id": 2,
                 "confianza": 0.95,
                 "justificacion": "El título menciona explícitamente 'servicio de agua potable'.",
             }
         ]
     }
+
+
+class StubResponse:
+    """Minimal stand-in for a Gemini response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Async stub for `genai.GenerativeModel` that records every call.
+
+    `text` is either the fixed response text or a callable that builds the
+    response text from the prompt.
+    """
+
+    def __init__(self, text='{"labels": []}', delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.prompts = []
+        self.generation_configs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        import asyncio
+
+        self.calls += 1
+        self.prompts.append(prompt)
+        self.generation_configs.append(kwargs.get("generation_config"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return StubResponse(self.text(prompt) if callable(self.text) else self.text)
+
+
+@pytest.fixture
+def classifier_service():
+    """Classifier service wired to a stub model instead of Gemini."""
+    from app.services.classifier_service import ClassifierService
+
+    service = ClassifierService()
+    service.model = StubModel()
+    # Tests exercise the model path unless they enable the local shortcuts
+    service.lexical_classifier = None
+    service.similarity_index = None
+    return service
@@ -0,0 +1,94 @@
+"""Test admission control of classification requests."""
+
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+async def _hold(admission, lane, release, served):
+    async with admission.admit(lane):
+        served.append(lane)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_are_served_before_bulk():
+    """Queued interactive requests take freed slots ahead of bulk ones."""
+    admission = AdmissionController(max_concurrency=1, max_wait={"interactive": 5, "bulk": 5})
+    release = asyncio.Event()
+    served = []
+
+    running = asyncio.create_task(_hold(admission, "bulk", release, served))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(_hold(admission, "bulk", release, served))]
+    await asyncio.sleep(0)
+    queued.append(asyncio.create_task(_hold(admission, "interactive", release, served)))
+    await asyncio.sleep(0)
+    assert admission.stats()["queued"] == {"interactive": 1, "bulk": 1}
+
+    release.set()
+    await asyncio.gather(running, *queued)
+    assert served == ["bulk", "interactive", "bulk"]
+    assert admission.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reserved_slots_are_kept_for_interactive_requests():
+    """Bulk requests cannot take the slots reserved for interactive ones."""
+    admission = AdmissionController(
+        max_concurrency=2, max_wait={"bulk": 0.05}, interactive_reserved=1
+    )
+    release = asyncio.Event()
+    served = []
+
+    bulk = asyncio.create_task(_hold(admission, "bulk", release, served))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected):
+        async with admission.admit("bulk"):
+            pass
+    async with admission.admit("interactive"):
+        pass
+
+    release.set()
+    await bulk
+
+
+@pytest.mark.asyncio
+async def test_requests_expected_to_wait_too_long_are_rejected():
+    """A full lane rejects new requests at once, with a retry hint."""
+    admission = AdmissionController(
+        max_concurrency=1, max_queue=1, max_wait={"interactive": 0.05, "bulk": 0.05}
+    )
+    release = asyncio.Event()
+    running = asyncio.create_task(_hold(admission, "bulk", release, []))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with admission.admit("interactive"):
+            pass
+    assert rejected.value.retry_after >= 1
+    assert admission.stats()["queued"] == {"interactive": 0, "bulk": 0}
+    assert admission.stats()["rejected"]["interactive"] == 1
+
+    release.set()
+    await running
+
+
+def test_classify_returns_429_when_bulk_lane_is_overloaded(client, monkeypatch):
+    """Rejected bulk requests get 429 and a Retry-After header."""
+    from app.main import app
+
+    async def overloaded(lane):
+        raise AdmissionRejected(lane, "queue_wait", 3.2)
+
+    monkeypatch.setattr(app.state.admission, "_acquire", overloaded)
+    response = client.post(
+        "/api/v1/classify", json={"title": "Agua potable"}, headers={"X-Priority": "bulk"}
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "4"
+
+    response = client.post("/api/v1/classify", json={"title": "Agua potable"})
+    assert response.status_code == 503
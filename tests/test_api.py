@@ -71,3 +71,42 @@ def test_classify_endpoint_structure(client, sample_project_title):
     data = response.json()
     assert "labels" in data
     assert isinstance(data["labels"], list)
+
+
+def test_classify_batch_endpoint_validation(client):
+    """Test batch classification endpoint validation."""
+    response = client.post("/api/v1/classify/batch", json={"titles": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post("/api/v1/classify/batch", json={"titles": ["ok", "   "]})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_classify_rejects_invalid_request_timeout(client):
+    """The X-Request-Timeout header must be a positive number of seconds."""
+    response = client.post(
+        "/api/v1/classify", json={"title": "Agua potable"}, headers={"X-Request-Timeout": "0"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_startup_does_not_import_the_gemini_sdk():
+    """The app imports and starts without loading google.generativeai."""
+    import os
+    import subprocess
+    import sys
+
+    probe = (
+        "import sys\n"
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "with TestClient(app) as client:\n"
+        "    assert client.get('/health').status_code == 200\n"
+        "    print('google.generativeai' in sys.modules)\n"
+    )
+    env = {**os.environ, "WARM_UP_ENABLED": "false", "LOG_LEVEL": "WARNING"}
+    output = subprocess.run(
+        [sys.executable, "-c", probe], env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip().splitlines()[-1] == "False"
@@ -0,0 +1,93 @@
+"""Test the offline bulk classification command."""
+
+import json
+
+import pytest
+
+from app.bulk import run_bulk
+from tests.conftest import StubModel
+
+LABELS = {"labels": [{"label": "x", "id": 2, "confianza": 0.9, "justificacion": "y"}]}
+
+
+def _write_csv(path, titles):
+    path.write_text("id,titulo\n" + "".join(f'{i},"{t}"\n' for i, t in enumerate(titles)))
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_bulk_run_deduplicates_and_writes_every_row(classifier_service, tmp_path):
+    """Each row gets a result, and repeated titles are classified once."""
+    classifier_service.cache = None
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    source = tmp_path / "titles.csv"
+    output = tmp_path / "results.jsonl"
+    _write_csv(source, ["Agua potable", "Pistas", "agua  POTABLE", "Parque", "Agua potable"])
+
+    stats = await run_bulk(
+        classifier_service, str(source), str(output), column="titulo", concurrency=2
+    )
+
+    records = _read_jsonl(output)
+    assert sorted(r["row"] for r in records) == [1, 2, 3, 4, 5]
+    assert all(r["labels"][0]["id"] == 2 for r in records)
+    assert classifier_service.model.calls == 3
+    assert stats.processed == 5
+    assert stats.errors == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_run_resumes_after_interruption(classifier_service, tmp_path):
+    """Rows already written successfully are skipped; failed rows are retried."""
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    source = tmp_path / "titles.txt"
+    output = tmp_path / "results.jsonl"
+    source.write_text("Agua potable\nPistas\nParque\n")
+    output.write_text(
+        json.dumps({"row": 1, "title": "Agua potable", **LABELS})
+        + "\n"
+        + json.dumps({"row": 2, "title": "Pistas", "labels": [], "error": "boom"})
+        + "\n"
+    )
+
+    stats = await run_bulk(classifier_service, str(source), str(output))
+
+    assert stats.skipped == 1
+    assert stats.processed == 2
+    assert classifier_service.model.calls == 2
+    assert [r["row"] for r in _read_jsonl(output)] == [1, 2, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_bulk_run_resumes_after_a_half_written_record(classifier_service, tmp_path):
+    """A last record cut off by a crash is dropped and its row classified again."""
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    source = tmp_path / "titles.txt"
+    output = tmp_path / "results.jsonl"
+    source.write_text("Agua potable\nPistas\n")
+    record = json.dumps({"row": 1, "title": "Agua potable", **LABELS}) + "\n"
+    output.write_text(record + record[:25])
+
+    stats = await run_bulk(classifier_service, str(source), str(output))
+
+    assert stats.skipped == 1
+    assert stats.processed == 1
+    assert [r["row"] for r in _read_jsonl(output)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_bulk_run_writes_csv(classifier_service, tmp_path):
+    """Results can be written as CSV."""
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    source = tmp_path / "titles.jsonl"
+    output = tmp_path / "results.csv"
+    source.write_text('{"title": "Agua potable"}\n{"title": "Pistas"}\n')
+
+    await run_bulk(classifier_service, str(source), str(output), output_format="csv")
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == "row,title,ids,labels,confianzas,source,error"
+    assert len(lines) == 3
@@ -0,0 +1,63 @@
+"""Test the two-tier classification cache."""
+
+import pytest
+
+from app.services.cache import ClassificationCache, make_cache_key
+
+RESULT = {"labels": [{"label": "x", "id": 2, "confianza": 0.9, "justificacion": "y"}]}
+
+
+def test_cache_key_ignores_case_accents_and_spacing():
+    """Equivalent titles share a key; the scope changes it."""
+    key = make_cache_key("Creación  del servicio", "model", "hash")
+    assert key == make_cache_key("creacion del SERVICIO ", "model", "hash")
+    assert key != make_cache_key("creacion del servicio", "other-model", "hash")
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """The memory tier is bounded and counts evictions."""
+    cache = ClassificationCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", RESULT)
+    await cache.set("b", RESULT)
+    await cache.get("a")
+    await cache.set("c", RESULT)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == RESULT
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_never_stores_errors():
+    """Error payloads are not cached."""
+    cache = ClassificationCache(max_entries=10, ttl_seconds=60)
+    await cache.set("a", {"labels": [], "error": "boom"})
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(tmp_path):
+    """Entries written to disk are found by a new cache instance."""
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = ClassificationCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    await cache.set("a", RESULT)
+    cache.close()
+
+    restarted = ClassificationCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    assert await restarted.get("a") == RESULT
+    assert restarted.stats()["disk_hits"] == 1
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_entries():
+    """Expired entries are treated as misses."""
+    cache = ClassificationCache(max_entries=10, ttl_seconds=-1)
+    await cache.set("a", RESULT)
+    assert await cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
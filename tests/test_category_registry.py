@@ -0,0 +1,94 @@
+"""Test the versioned category registry and its hot reload."""
+
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi import status
+
+from app.models.categories import DEFAULT_CATEGORIES_CSV
+from app.services.category_registry import CategoryRegistry
+
+CSV = "id,nombre,definicion\n1,agua,Servicio de agua potable\n2,pistas,Pistas y veredas\n"
+
+
+def _write(path, content, mtime):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_reload_swaps_in_a_new_version(tmp_path):
+    """A changed file produces a new set; unchanged or invalid files do not."""
+    path = tmp_path / "categorias.csv"
+    _write(path, CSV, 1_000)
+    registry = CategoryRegistry(str(path))
+    first = registry.current
+    changes = []
+    registry.on_change(changes.append)
+
+    assert first.id_to_name == {1: "agua", 2: "pistas"}
+    assert first.name_to_id["pistas"] == 2
+    assert registry.reload() is False
+
+    _write(path, CSV + "3,parques,Parques zonales\n", 2_000)
+    assert registry.reload() is True
+    assert registry.current.version != first.version
+    assert registry.current.id_to_name[3] == "parques"
+    assert "parques" in registry.current.prompt_template.prefix
+    assert changes == [registry.current]
+
+    second = registry.current
+    _write(path, "id,nombre,definicion\n1,agua,x\n1,otra,y\n", 3_000)
+    assert registry.reload() is False
+    assert registry.current is second
+
+
+@pytest.mark.asyncio
+async def test_results_carry_the_categories_version(classifier_service, tmp_path):
+    """Results are tagged and cache keys change with the categories."""
+    path = tmp_path / "categorias.csv"
+    with open(DEFAULT_CATEGORIES_CSV, encoding="utf-8-sig") as f:
+        _write(path, f.read(), 1_000)
+    classifier_service.categories = CategoryRegistry(str(path))
+    version = classifier_service.categories.current.version
+
+    result = await classifier_service.classify("Agua potable")
+    key = classifier_service._cache_key("Agua potable")
+
+    assert result["categories_version"] == version
+    _write(path, "id,nombre,definicion\n1,agua,Servicio de agua potable\n", 2_000)
+    classifier_service.categories.reload()
+    assert classifier_service._cache_key("Agua potable") != key
+
+
+def test_categories_endpoint_supports_etags(client):
+    """The pre-serialized payload is revalidated with If-None-Match."""
+    response = client.get("/api/v1/categories")
+    etag = response.headers["etag"]
+
+    assert response.json()["version"] == etag.strip('"')
+    response = client.get("/api/v1/categories", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_watch_notifies_listeners_on_the_event_loop(tmp_path):
+    """Only the file is read in a worker thread; listeners run on the loop."""
+    path = tmp_path / "categorias.csv"
+    _write(path, CSV, 1_000)
+    registry = CategoryRegistry(str(path))
+    threads = []
+    registry.on_change(lambda _: threads.append(threading.get_ident()))
+
+    watcher = asyncio.create_task(registry.watch(0.01))
+    _write(path, CSV + "3,parques,Parques zonales\n", 2_000)
+    try:
+        async with asyncio.timeout(2):
+            while not threads:
+                await asyncio.sleep(0.01)
+    finally:
+        watcher.cancel()
+
+    assert threads == [threading.get_ident()]
+    assert registry.current.id_to_name[3] == "parques"
@@ -0,0 +1,319 @@
+"""Test the classifier service with a stubbed Gemini model."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from tests.conftest import StubModel
+
+
+@pytest.mark.asyncio
+async def test_classify_returns_parsed_labels(classifier_service, mock_classification_response):
+    """The model output is parsed into a dictionary."""
+    classifier_service.model = StubModel(text=json.dumps(mock_classification_response))
+
+    result = await classifier_service.classify("Mejoramiento del servicio de agua potable")
+
+    assert result["labels"] == mock_classification_response["labels"]
+    assert result["source"] == "model"
+
+
+@pytest.mark.asyncio
+async def test_classify_does_not_block_event_loop(classifier_service):
+    """Slow upstream calls run concurrently up to GEMINI_MAX_CONCURRENCY."""
+    classifier_service.model = StubModel(delay=0.2)
+    classifier_service._upstream_slots = asyncio.Semaphore(2)
+
+    titles = [f"Proyecto {i}" for i in range(4)]
+    results = await asyncio.gather(*(classifier_service.classify(t) for t in titles))
+
+    assert len(results) == 4
+    assert classifier_service.model.calls == 4
+    assert classifier_service.model.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_classify_rejects_empty_title(classifier_service):
+    """Empty titles are rejected before calling the model."""
+    with pytest.raises(ValueError):
+        await classifier_service.classify("   ")
+    assert classifier_service.model.calls == 0
+
+
+def _label(category_id):
+    return {
+        "label": f"categoria {category_id}",
+        "id": category_id,
+        "confianza": 0.9,
+        "justificacion": "Coincide con la definición.",
+    }
+
+
+@pytest.mark.asyncio
+async def test_classify_many_packs_titles_into_one_prompt(classifier_service):
+    """A batch is answered by one call and results keep the input order."""
+    batch = {
+        "resultados": [
+            {"indice": 2, "labels": [_label(6)]},
+            {"indice": 1, "labels": [_label(2)]},
+        ]
+    }
+    classifier_service.model = StubModel(text=json.dumps(batch))
+
+    results = await classifier_service.classify_many(["Agua potable", "Educación inicial"])
+
+    assert classifier_service.model.calls == 1
+    assert [r["labels"][0]["id"] for r in results] == [2, 6]
+
+
+@pytest.mark.asyncio
+async def test_classify_many_retries_missing_titles_individually(classifier_service):
+    """Titles missing from a batch response are classified one by one."""
+
+    def respond(prompt):
+        if "TÍTULOS A CLASIFICAR" in prompt:
+            return json.dumps({"resultados": [{"indice": 1, "labels": [_label(2)]}]})
+        return json.dumps({"labels": [_label(5)]})
+
+    classifier_service.model = StubModel(text=respond)
+
+    results = await classifier_service.classify_many(["Agua potable", "Pistas y veredas"])
+
+    assert classifier_service.model.calls == 2
+    assert [r["labels"][0]["id"] for r in results] == [2, 5]
+
+
+@pytest.mark.asyncio
+async def test_classify_many_ignores_out_of_range_positions(classifier_service):
+    """Items pointing outside the batch are dropped, never assigned to another title."""
+    unclassified = {"label": "NO_CLASIFICADO", "id": 0, "confianza": 0.0, "justificacion": "-"}
+
+    def respond(prompt):
+        if "TÍTULOS A CLASIFICAR" in prompt:
+            items = [
+                {"indice": 0, "labels": [unclassified]},
+                {"indice": 1, "labels": [_label(2)]},
+                {"indice": 7, "labels": [unclassified]},
+            ]
+            return json.dumps({"resultados": items})
+        return json.dumps({"labels": [_label(5)]})
+
+    classifier_service.model = StubModel(text=respond)
+    classifier_service.escalation_models = [StubModel(text=json.dumps({"labels": [_label(6)]}))]
+    classifier_service.model_names = ["lite", "pro"]
+
+    results = await classifier_service.classify_many(["Agua potable", "Pistas y veredas"])
+
+    assert [r["labels"][0]["id"] for r in results] == [2, 5]
+    assert classifier_service.escalation_models[0].calls == 0
+
+
+def test_chunk_titles_respects_limits(classifier_service, monkeypatch):
+    """Titles are chunked by count and by total size."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_BATCH_MAX_TITLES", 2)
+    monkeypatch.setattr(settings, "GEMINI_BATCH_MAX_CHARS", 10)
+
+    chunks = classifier_service._chunk_titles(["aaaa", "bbbb", "cccc", "dddddddd", "e"])
+
+    assert chunks == [["aaaa", "bbbb"], ["cccc"], ["dddddddd", "e"]]
+
+
+@pytest.mark.asyncio
+async def test_classify_reuses_cached_results(classifier_service):
+    """Repeated titles are answered from the cache, errors are retried."""
+    classifier_service.model = StubModel(text=json.dumps({"labels": [_label(2)]}))
+
+    await classifier_service.classify("Agua potable en San Juan")
+    result = await classifier_service.classify("  agua POTABLE en san juan")
+
+    assert classifier_service.model.calls == 1
+    assert result["labels"][0]["id"] == 2
+
+    # Unrepairable answers are asked for once more, then reported uncached
+    classifier_service.model = StubModel(text="not json")
+    await classifier_service.classify("Pistas y veredas")
+    await classifier_service.classify("Pistas y veredas")
+    assert classifier_service.model.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_titles_share_one_call(classifier_service):
+    """Concurrent requests for the same title trigger a single upstream call."""
+    classifier_service.cache = None
+    classifier_service.model = StubModel(text=json.dumps({"labels": [_label(2)]}), delay=0.05)
+
+    results = await asyncio.gather(
+        *(classifier_service.classify("Agua potable en San Juan") for _ in range(5))
+    )
+
+    assert classifier_service.model.calls == 1
+    assert all(r["labels"][0]["id"] == 2 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_context_cached_model_only_receives_the_title(classifier_service, monkeypatch):
+    """With context caching on, only the dynamic suffix is sent upstream."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_CONTEXT_CACHE_ENABLED", True)
+    context_model = StubModel(text=json.dumps({"labels": [_label(2)]}))
+    classifier_service._context_model = context_model
+    classifier_service._context_model_expires_at = float("inf")
+
+    await classifier_service.classify("Agua potable en San Juan")
+
+    assert classifier_service.model.calls == 0
+    assert context_model.prompts == ['TEXTO A CLASIFICAR:\n"""Agua potable en San Juan"""\n']
+
+
+@pytest.mark.asyncio
+async def test_lexical_classifier_short_circuits_obvious_titles(classifier_service):
+    """Obvious titles are answered locally; ambiguous ones reach the model."""
+    from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+    from app.services.lexical_classifier import LexicalClassifier
+
+    classifier_service.lexical_classifier = LexicalClassifier(DEFINICIONES_DE_CATEGORIAS)
+    classifier_service.model = StubModel(text=json.dumps({"labels": [_label(2)]}))
+
+    result = await classifier_service.classify("Creación del servicio de agua potable")
+    assert result["source"] == "lexical"
+    assert result["labels"][0]["id"] == 2
+    assert classifier_service.model.calls == 0
+
+    result = await classifier_service.classify("Instalación del sistema de agua para riego")
+    assert result["source"] == "model"
+    assert classifier_service.model.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_similar_titles_reuse_previous_classification(classifier_service):
+    """A title differing only by location is answered from the similarity index."""
+    from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+    from app.services.lexical_classifier import category_vocabulary
+    from app.services.similarity_index import SimilarityIndex
+
+    classifier_service.similarity_index = SimilarityIndex(
+        vocabulary=category_vocabulary(DEFINICIONES_DE_CATEGORIAS)
+    )
+    classifier_service.model = StubModel(text=json.dumps({"labels": [_label(2)]}))
+
+    await classifier_service.classify("Ampliación del agua potable en el distrito de Ate")
+    result = await classifier_service.classify(
+        "Ampliación del agua potable en el distrito de Lince"
+    )
+
+    assert classifier_service.model.calls == 1
+    assert result["source"] == "similarity"
+    assert result["labels"][0]["id"] == 2
+
+
+def _confident_label(category_id, confianza):
+    return {**_label(category_id), "confianza": confianza}
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_only_uncertain_titles(classifier_service):
+    """Low-confidence answers of the first tier go to the next one."""
+
+    def cheap(prompt):
+        confianza = 0.4 if "Proyecto dudoso" in prompt else 0.95
+        return json.dumps({"labels": [_confident_label(2, confianza)]})
+
+    classifier_service.model = StubModel(text=cheap)
+    classifier_service.escalation_models = [
+        StubModel(text=json.dumps({"labels": [_confident_label(5, 0.9)]}))
+    ]
+    classifier_service.model_names = ["lite", "pro"]
+
+    clear = await classifier_service.classify("Agua potable")
+    doubtful = await classifier_service.classify("Proyecto dudoso")
+
+    assert (clear["model"], clear["tier"]) == ("lite", 1)
+    assert (doubtful["model"], doubtful["tier"]) == ("pro", 2)
+    assert doubtful["labels"][0]["id"] == 5
+    assert classifier_service.escalation_models[0].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_unclassified_batch_items(classifier_service):
+    """Batch items answered NO_CLASIFICADO are retried on the next tier alone."""
+    unclassified = {"label": "NO_CLASIFICADO", "id": 0, "confianza": 0.0, "justificacion": "-"}
+    batch = {
+        "resultados": [
+            {"indice": 1, "labels": [_label(2)]},
+            {"indice": 2, "labels": [unclassified]},
+        ]
+    }
+    classifier_service.model = StubModel(text=json.dumps(batch))
+    classifier_service.escalation_models = [StubModel(text=json.dumps({"labels": [_label(6)]}))]
+    classifier_service.model_names = ["lite", "pro"]
+
+    results = await classifier_service.classify_many(["Agua potable", "Título ambiguo"])
+
+    assert [r["tier"] for r in results] == [1, 2]
+    assert results[1]["labels"][0]["id"] == 6
+    assert classifier_service.escalation_models[0].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_compact_detail_skips_justifications(classifier_service):
+    """Compact requests use their own prompt, schema, token cap and cache entry."""
+    compact_label = {
+        "label": "servicio de agua potable mediante red publica o pileta publica",
+        "id": 2,
+        "confianza": 0.9,
+    }
+    classifier_service.model = StubModel(text=json.dumps({"labels": [compact_label]}))
+
+    compact = await classifier_service.classify("Agua potable", detail="compact")
+
+    prompt = classifier_service.model.prompts[0]
+    config = classifier_service.model.generation_configs[0]
+    assert prompt.startswith(classifier_service.compact_prompt_template.prefix)
+    assert (
+        "justificacion"
+        not in config["response_schema"]["properties"]["labels"]["items"]["properties"]
+    )
+    assert config["max_output_tokens"] == settings.GEMINI_COMPACT_MAX_OUTPUT_TOKENS
+    assert compact["labels"] == [{**compact_label, "justificacion": ""}]
+    assert classifier_service._cache_key("Agua potable", "compact") != (
+        classifier_service._cache_key("Agua potable")
+    )
+
+
+@pytest.mark.asyncio
+async def test_cascade_keeps_the_lower_tier_answer_when_escalation_fails(classifier_service):
+    """A failed escalation returns the uncertain answer instead of an error."""
+    from google.api_core import exceptions as google_exceptions
+
+    def failing(prompt):
+        raise google_exceptions.InvalidArgument("Bad request")
+
+    unclassified = {"label": "NO_CLASIFICADO", "id": 0, "confianza": 0.0, "justificacion": "-"}
+
+    def cheap(prompt):
+        if "TÍTULOS A CLASIFICAR" in prompt:
+            items = [
+                {"indice": 1, "labels": [_confident_label(2, 0.95)]},
+                {"indice": 2, "labels": [unclassified]},
+            ]
+            return json.dumps({"resultados": items})
+        return json.dumps({"labels": [_confident_label(2, 0.4)]})
+
+    classifier_service.model = StubModel(text=cheap)
+    classifier_service.escalation_models = [StubModel(text=failing)]
+    classifier_service.model_names = ["lite", "pro"]
+
+    doubtful = await classifier_service.classify("Proyecto dudoso")
+    results = await classifier_service.classify_many(["Agua potable", "Título ambiguo"])
+
+    assert "error" not in doubtful
+    assert (doubtful["model"], doubtful["tier"]) == ("lite", 1)
+    assert doubtful["labels"][0]["confianza"] == 0.4
+    assert [r["tier"] for r in results] == [1, 1]
+    assert results[1]["labels"][0]["id"] == 0
+    assert classifier_service.escalation_models[0].calls == 2
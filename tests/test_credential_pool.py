@@ -0,0 +1,172 @@
+"""Test spreading upstream calls over several API keys."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services.credential_pool import CredentialPool, PoolMember
+from app.services.resilience import CircuitBreaker, CircuitOpenError, HedgePolicy
+from tests.conftest import StubModel
+
+LABELS = {"labels": [{"label": "x", "id": 2, "confianza": 0.9, "justificacion": "y"}]}
+
+
+@pytest.mark.asyncio
+async def test_calls_are_spread_over_keys(classifier_service):
+    """Concurrent calls go to the least loaded key."""
+    classifier_service.cache = None
+    classifier_service.pool = CredentialPool([PoolMember("key1", "a"), PoolMember("key2", "b")])
+    classifier_service.model = StubModel(text=json.dumps(LABELS), delay=0.05)
+
+    await asyncio.gather(*(classifier_service.classify(f"Proyecto número {i}") for i in range(6)))
+
+    assert [member.calls for member in classifier_service.pool.members] == [3, 3]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_key_is_benched_and_another_one_used(classifier_service, monkeypatch):
+    """A 429 takes the key out of rotation and the call is retried right away with another."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 2)
+    classifier_service.pool = CredentialPool([PoolMember("key1", "a"), PoolMember("key2", "b")])
+
+    class QuotaModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            if self.calls == 0:
+                self.calls += 1
+                raise google_exceptions.ResourceExhausted("Please retry in 30s.")
+            return await super().generate_content_async(prompt, **kwargs)
+
+    classifier_service.model = QuotaModel(text=json.dumps(LABELS))
+    started_at = time.perf_counter()
+    result = await classifier_service.classify("Agua potable")
+
+    assert time.perf_counter() - started_at < 1
+    assert result["labels"][0]["id"] == 2
+    stats = classifier_service.pool.stats()
+    assert sorted(member["failures"] for member in stats) == [0, 1]
+    assert max(member["benched_for_seconds"] for member in stats) > 25
+
+
+@pytest.mark.asyncio
+async def test_pool_fails_fast_only_when_every_circuit_is_open():
+    """Keys with an open circuit are skipped until none is left."""
+    members = [
+        PoolMember("key1", "a", circuit_breaker=CircuitBreaker(window=1, min_calls=1)),
+        PoolMember("key2", "b", circuit_breaker=CircuitBreaker(window=1, min_calls=1)),
+    ]
+    pool = CredentialPool(members)
+
+    members[0].circuit_breaker.record_failure()
+    assert await pool.acquire(10) is members[1]
+
+    members[1].circuit_breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        await pool.acquire(10)
+
+
+@pytest.mark.asyncio
+async def test_hedged_backup_reports_to_its_own_key(classifier_service):
+    """A backup call that hits the quota benches its key and counts as its failure."""
+    classifier_service.pool = CredentialPool([PoolMember("key1", "a"), PoolMember("key2", "b")])
+    classifier_service.hedge_policy = HedgePolicy(percentile=0.5, min_samples=2)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+
+    class SlowThenQuotaModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            if self.calls == 1:
+                self.calls += 1
+                raise google_exceptions.ResourceExhausted("Please retry in 30s.")
+            self.delay = 0.2
+            return await super().generate_content_async(prompt, **kwargs)
+
+    classifier_service.model = SlowThenQuotaModel(text=json.dumps(LABELS))
+    result = await classifier_service.classify("Agua potable")
+
+    assert result["labels"][0]["id"] == 2
+    primary, backup = sorted(classifier_service.pool.members, key=lambda m: m.failures)
+    assert backup.failures == 1
+    assert backup.benched_for() > 25
+    assert backup.circuit_breaker.stats()["recent_failure_rate"] == 1.0
+    assert primary.benched_for() == 0
+
+
+class ScriptedModel(StubModel):
+    """Stub whose n-th call waits `delay` seconds, then raises or answers."""
+
+    def __init__(self, script):
+        super().__init__(text=json.dumps(LABELS))
+        self.script = script
+
+    async def generate_content_async(self, prompt, **kwargs):
+        delay, error = self.script[self.calls]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return await super().generate_content_async(prompt, **kwargs)
+
+
+def _hedging_service(classifier_service, script):
+    classifier_service.pool = CredentialPool([PoolMember("key1", "a"), PoolMember("key2", "b")])
+    classifier_service.hedge_policy = HedgePolicy(percentile=0.5, min_samples=2)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+    classifier_service.model = ScriptedModel(script)
+    return classifier_service.pool.members
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_is_not_credited_with_the_backup_success(classifier_service):
+    """Each copy of a hedged call is reported to the key that made it."""
+    _hedging_service(
+        classifier_service,
+        [(0.05, google_exceptions.ServiceUnavailable("down")), (0.1, None)],
+    )
+
+    text = await classifier_service._generate_with_retries("prompt")
+
+    assert json.loads(text) == LABELS
+    backup, primary = sorted(classifier_service.pool.members, key=lambda m: m.failures)
+    assert primary.failures == 1
+    assert primary.circuit_breaker.stats()["recent_failure_rate"] == 1.0
+    assert backup.circuit_breaker.stats()["recent_failure_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_raises_the_error_of_the_first_copy(classifier_service):
+    """When every copy fails, the first call's error is the one reported."""
+    primary, _ = _hedging_service(
+        classifier_service,
+        [
+            (0.05, google_exceptions.InvalidArgument("primary")),
+            (0.1, google_exceptions.ServiceUnavailable("backup")),
+        ],
+    )
+
+    with pytest.raises(google_exceptions.InvalidArgument):
+        await classifier_service._generate_hedged(
+            "prompt", classifier_service.model, None, 10, primary
+        )
+
+
+@pytest.mark.asyncio
+async def test_only_key_is_not_benched_on_auth_failure(classifier_service):
+    """Benching the only key would stop every call, so a rejected one stays in rotation."""
+
+    class RejectedModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            self.calls += 1
+            raise google_exceptions.PermissionDenied("API key not valid")
+
+    classifier_service.model = RejectedModel()
+    result = await classifier_service.classify("Agua potable")
+
+    assert result["error"]
+    assert classifier_service.model.calls == 1
+    assert classifier_service.pool.members[0].benched_for() == 0
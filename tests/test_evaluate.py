@@ -0,0 +1,102 @@
+"""Test the evaluation of prompt variants and models."""
+
+import pytest
+
+from app.core.config import settings
+from app.evaluate import (
+    VARIANTS,
+    EvaluatedModel,
+    Example,
+    Recording,
+    evaluate_run,
+    mark_pareto,
+    score,
+)
+
+
+def test_score_counts_per_category_and_overall():
+    """Precision and recall are computed per category and micro-averaged."""
+    expected = [{1}, {2}, {1, 2}, set()]
+    predicted = [{1}, {1}, {1, 2}, set()]
+
+    report = score(expected, predicted, {1: "uno", 2: "dos"})
+
+    assert report["categories"][1]["precision"] == pytest.approx(2 / 3, abs=1e-4)
+    assert report["categories"][1]["recall"] == 1.0
+    assert report["categories"][2]["recall"] == 0.5
+    assert report["micro_precision"] == 0.75
+    assert report["micro_recall"] == 0.75
+    assert report["exact_match"] == 0.75
+
+
+def test_pareto_flags_runs_nobody_beats():
+    """A run worse on every axis than another is not on the frontier."""
+    runs = [
+        {"micro_f1": 0.9, "latency_ms": {"p95": 900}, "cost_per_1k_titles_usd": 0.2},
+        {"micro_f1": 0.8, "latency_ms": {"p95": 300}, "cost_per_1k_titles_usd": 0.1},
+        {"micro_f1": 0.7, "latency_ms": {"p95": 400}, "cost_per_1k_titles_usd": 0.1},
+    ]
+
+    mark_pareto(runs)
+
+    assert [run["pareto"] for run in runs] == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_replayed_runs_match_recorded_ones(tmp_path, monkeypatch):
+    """A run replayed from its recording makes no calls and gives the same report."""
+    monkeypatch.setattr(settings, "GEMINI_BACKEND", "fake")
+    monkeypatch.setattr(settings, "FAKE_MODEL_LATENCY_MS", 0.0)
+    monkeypatch.setattr(settings, "FAKE_MODEL_ERROR_RATE", 0.0)
+    monkeypatch.setattr(settings, "FAKE_MODEL_MALFORMED_RATE", 0.0)
+    examples = [
+        Example("Mejoramiento del servicio de agua potable en Huanta", {2}),
+        Example("Creación de pistas y veredas en el jirón Lima", {5}),
+    ]
+    path = str(tmp_path / "recordings.jsonl")
+    variant = {"name": "compact", **VARIANTS["compact"]}
+
+    recorded = await evaluate_run(
+        examples, "fake-model", variant, Recording(path, writable=True), False, 2, (0.1, 0.4)
+    )
+    # Without the fake backend, a replay miss would need the real API
+    monkeypatch.setattr(settings, "GEMINI_BACKEND", "gemini")
+    replayed = await evaluate_run(
+        examples, "fake-model", variant, Recording(path, writable=False), True, 2, (0.1, 0.4)
+    )
+
+    assert recorded["errors"] == 0
+    assert recorded["input_tokens_per_title"] > 0
+    assert replayed == recorded
+
+
+@pytest.mark.asyncio
+async def test_missing_recordings_are_not_retried(tmp_path, monkeypatch):
+    """A replay miss costs one attempt and does not open the circuit for the next titles."""
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "GEMINI_CIRCUIT_MIN_CALLS", 2)
+    attempts = []
+    original = EvaluatedModel.generate_content_async
+
+    async def counted(self, prompt, **kwargs):
+        attempts.append(prompt)
+        return await original(self, prompt, **kwargs)
+
+    monkeypatch.setattr(EvaluatedModel, "generate_content_async", counted)
+    examples = [Example(f"Creación de pistas en el jirón {i}", {5}) for i in range(4)]
+    variant = {"name": "compact", **VARIANTS["compact"]}
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+
+    report = await evaluate_run(
+        examples,
+        "fake-model",
+        variant,
+        Recording(str(path), writable=False),
+        True,
+        1,
+        (0.1, 0.4),
+    )
+
+    assert report["errors"] == 4
+    assert len(attempts) == 4
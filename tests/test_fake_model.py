@@ -0,0 +1,60 @@
+"""Test the fake Gemini backend."""
+
+import json
+import os
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services.fake_model import FakeGenerativeModel
+
+
+@pytest.mark.asyncio
+async def test_fake_model_answers_through_the_service(classifier_service):
+    """Single and batch prompts get well-formed, stable labels."""
+    classifier_service.model = FakeGenerativeModel(latency_ms=0)
+
+    single = await classifier_service.classify("Creación del parque zonal")
+    batch = await classifier_service.classify_many(
+        ["Creación del parque zonal", "Instalación de pistas"]
+    )
+
+    assert single["source"] == "model"
+    assert single["labels"][0]["id"] == batch[0]["labels"][0]["id"]
+    assert classifier_service.model.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_model_simulates_failures():
+    """Error and malformed rates produce upstream errors and invalid JSON."""
+    failing = FakeGenerativeModel(latency_ms=0, error_rate=1.0)
+    with pytest.raises(google_exceptions.GoogleAPICallError):
+        await failing.generate_content_async('TEXTO A CLASIFICAR:\n"""Agua"""\n')
+
+    malformed = FakeGenerativeModel(latency_ms=0, malformed_rate=1.0)
+    response = await malformed.generate_content_async('TEXTO A CLASIFICAR:\n"""Agua"""\n')
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(response.text)
+    assert response.usage_metadata.candidates_token_count > 0
+
+
+@pytest.mark.asyncio
+async def test_fake_model_answers_with_the_current_categories(tmp_path):
+    """Labels come from the registry it was given, including after a reload."""
+    from app.services.category_registry import CategoryRegistry
+
+    path = tmp_path / "categorias.csv"
+    path.write_text("id,nombre,definicion\n1,agua,Servicio de agua potable\n", encoding="utf-8")
+    registry = CategoryRegistry(str(path))
+    model = FakeGenerativeModel(latency_ms=0, categories=registry)
+    prompt = 'TEXTO A CLASIFICAR:\n"""Agua"""\n'
+    config = {"response_mime_type": "application/json"}
+
+    response = await model.generate_content_async(prompt, generation_config=config)
+    assert json.loads(response.text)["labels"][0]["label"] == "agua"
+
+    path.write_text("id,nombre,definicion\n7,parques,Parques zonales\n", encoding="utf-8")
+    os.utime(path, (2_000, 2_000))
+    registry.reload()
+    response = await model.generate_content_async(prompt, generation_config=config)
+    assert json.loads(response.text)["labels"][0]["id"] == 7
@@ -0,0 +1,117 @@
+"""Test asynchronous classification jobs."""
+
+import json
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.services.jobs import JOB_COMPLETED, JobManager, JobStore
+from tests.conftest import StubModel
+
+LABELS = {"labels": [{"label": "x", "id": 2, "confianza": 0.9, "justificacion": "y"}]}
+
+
+@pytest.mark.asyncio
+async def test_job_is_processed_in_chunks(classifier_service):
+    """Every title of a job gets a result and progress is tracked."""
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    manager = JobManager(classifier_service, JobStore(":memory:"), workers=2, chunk_size=2)
+    await manager.start()
+
+    job = await manager.submit(list(enumerate(["Agua", "Pistas", "Parque"], start=1)))
+    assert job["status"] == "queued"
+    assert job["total"] == 3
+    await manager.join()
+    await manager.stop()
+
+    job = await manager.get(job["job_id"])
+    assert job["status"] == JOB_COMPLETED
+    assert job["processed"] == 3
+    assert job["failed"] == 0
+
+    page = await manager.results(job["job_id"], offset=1, limit=5)
+    assert [r["row"] for r in page] == [2, 3]
+    assert page[0]["title"] == "Pistas"
+    assert page[0]["labels"][0]["id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unfinished_job_resumes_after_restart(classifier_service, tmp_path):
+    """A job interrupted by a restart only classifies its pending titles."""
+    classifier_service.model = StubModel(text=json.dumps(LABELS))
+    db_path = str(tmp_path / "jobs.sqlite3")
+
+    store = JobStore(db_path)
+    store.create("job-1", [(1, "Agua"), (2, "Pistas")])
+    store.save_results("job-1", [(1, LABELS)])
+    store.close()
+
+    manager = JobManager(classifier_service, JobStore(db_path))
+    await manager.start()
+    await manager.join()
+    await manager.stop()
+
+    job = await manager.get("job-1")
+    assert job["status"] == JOB_COMPLETED
+    assert job["processed"] == 2
+    assert classifier_service.model.calls == 1
+    assert "Pistas" in classifier_service.model.prompts[0]
+
+
+def test_jobs_api():
+    """Jobs can be created from a list or a file and polled until done."""
+    from app.main import app
+
+    with TestClient(app) as client:
+        service = app.state.classifier_service
+        service.model = StubModel(text=json.dumps(LABELS))
+        service.lexical_classifier = None
+        service.similarity_index = None
+
+        response = client.post("/api/v1/jobs", json={"titles": ["Agua", "Pistas"]})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["job_id"]
+
+        response = client.post(
+            "/api/v1/jobs/upload?format=csv&column=titulo",
+            content="id,titulo\n1,Parque\n2,Canal\n",
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json()["total"] == 2
+
+        client.portal.call(app.state.job_manager.join)
+
+        response = client.get(f"/api/v1/jobs/{job_id}")
+        assert response.json()["status"] == "completed"
+
+        response = client.get(f"/api/v1/jobs/{job_id}/results?limit=1")
+        assert [r["title"] for r in response.json()["results"]] == ["Agua"]
+
+        assert client.get("/api/v1/jobs/missing").status_code == status.HTTP_404_NOT_FOUND
+        response = client.post("/api/v1/jobs/upload?format=txt", content="Agua\n\n   \n")
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        response = client.post("/api/v1/jobs/upload?format=xml", content="<a/>")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_jobs_api_rejects_oversized_uploads(monkeypatch):
+    """Files over JOBS_MAX_UPLOAD_MB are refused without reading them whole."""
+    from app.core.config import settings
+    from app.main import app
+
+    monkeypatch.setattr(settings, "JOBS_MAX_UPLOAD_MB", 0.001)
+
+    with TestClient(app) as client:
+        content = "titulo\n" + "Agua potable\n" * 200
+        response = client.post("/api/v1/jobs/upload?format=csv&column=titulo", content=content)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        def chunks():
+            yield b"titulo\n"
+            for _ in range(200):
+                yield b"Agua potable\n"
+
+        # Without a Content-Length the body is cut off while it is read
+        response = client.post("/api/v1/jobs/upload?format=csv&column=titulo", content=chunks())
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
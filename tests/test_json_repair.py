@@ -0,0 +1,123 @@
+"""Test the local repair of malformed model answers."""
+
+import json
+
+import pytest
+
+from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.services.json_repair import repair_json, repair_labels
+from app.services.prompts import INVALID_OUTPUT_REMINDER
+from tests.conftest import StubModel
+
+WATER = next(name for name, category in DEFINICIONES_DE_CATEGORIAS.items() if category["id"] == 2)
+
+
+@pytest.mark.parametrize(
+    "text, defect",
+    [
+        ('{"labels": [{"label": "x", "id": 2, "confianza": 0.9,},]}', "trailing_comma"),
+        (
+            '{"labels": [{"label": "x", "id": 2, "confianza": 0.9, '
+            '"justificacion": "Dice "agua potable" en el título"}]}',
+            "unescaped_quote",
+        ),
+        (
+            '{"labels": [{"label": "x", "id": 2, "confianza": 0.9, "justificacion": "El tí',
+            "truncated",
+        ),
+        (
+            '{"labels": [{"label": "x", "id": 2, "confianza": 0.9}, {"label": "y", "conf',
+            "truncated",
+        ),
+    ],
+)
+def test_common_defects_are_repaired(text, defect):
+    """Each defect is fixed and reported, and the complete labels survive."""
+    payload, repairs = repair_json(text)
+
+    assert repairs == [defect]
+    assert payload["labels"][0]["id"] == 2
+    assert len(payload["labels"]) == 1
+
+
+def test_label_ids_follow_the_category_name():
+    """A label naming a known category gets that category's id; unknown ones are dropped."""
+    labels = [
+        {"label": WATER, "id": 3, "confianza": 0.9, "justificacion": "Agua"},
+        {"label": "inventada", "id": 999, "confianza": 0.5, "justificacion": "?"},
+    ]
+
+    repaired, repairs = repair_labels(labels, DEFINICIONES_DE_CATEGORIAS)
+
+    assert [label["id"] for label in repaired] == [2]
+    assert repairs == ["id_mismatch", "unknown_category"]
+
+
+def test_unknown_names_follow_the_category_id():
+    """A label with an unknown name but a known id gets the name of that id."""
+    labels = [{"label": "agua", "id": 2, "confianza": 0.9, "justificacion": "Agua"}]
+
+    repaired, repairs = repair_labels(labels, DEFINICIONES_DE_CATEGORIAS)
+
+    assert repaired[0]["label"] == WATER
+    assert repairs == ["name_mismatch"]
+
+
+@pytest.mark.asyncio
+async def test_truncated_answers_are_repaired_without_another_call(classifier_service):
+    """A repairable answer costs a single call and is flagged as repaired."""
+    answer = json.dumps({"labels": [{"label": WATER, "id": 2, "confianza": 0.9}]})
+    classifier_service.model = StubModel(text=answer[:-3] + ', "justificacion": "Agua')
+
+    result = await classifier_service.classify("Agua potable")
+
+    assert classifier_service.model.calls == 1
+    assert result["labels"][0]["id"] == 2
+    assert result["repaired"] == ["truncated"]
+
+
+@pytest.mark.asyncio
+async def test_unrepairable_answers_are_asked_for_again(classifier_service):
+    """When nothing can be recovered, the model is asked once more with a reminder."""
+    label = {"label": WATER, "id": 2, "confianza": 0.9, "justificacion": "Agua"}
+    answer = json.dumps({"labels": [label]})
+    classifier_service.model = StubModel(
+        text=lambda prompt: answer if prompt.endswith(INVALID_OUTPUT_REMINDER) else "Lo siento"
+    )
+
+    result = await classifier_service.classify("Agua potable")
+
+    assert classifier_service.model.calls == 2
+    assert result["labels"][0]["id"] == 2
+    assert "error" not in result
+
+
+def test_full_labels_must_be_justified():
+    """Full answers without a justification are invalid; compact ones get an empty one."""
+    labels = [{"label": WATER, "id": 2, "confianza": 0.9}]
+
+    assert repair_labels(labels, DEFINICIONES_DE_CATEGORIAS) == ([], ["invalid_label"])
+    repaired, repairs = repair_labels(labels, DEFINICIONES_DE_CATEGORIAS, compact=True)
+    assert repaired == [{**labels[0], "justificacion": ""}]
+    assert repairs == []
+
+
+def test_unclassified_name_and_id_must_agree():
+    """NO_CLASIFICADO goes with id 0 like any other category name and its id."""
+    labels = [
+        {"label": "NO_CLASIFICADO", "id": 7, "confianza": 0.0, "justificacion": "-"},
+        {"label": "inventada", "id": 0, "confianza": 0.0, "justificacion": "-"},
+        {"label": WATER, "id": 0, "confianza": 0.9, "justificacion": "Agua"},
+    ]
+
+    repaired, repairs = repair_labels(labels[:1], DEFINICIONES_DE_CATEGORIAS)
+    assert [(label["label"], label["id"]) for label in repaired] == [("NO_CLASIFICADO", 0)]
+    assert repairs == ["id_mismatch"]
+
+    repaired, repairs = repair_labels(labels[1:2], DEFINICIONES_DE_CATEGORIAS)
+    assert [(label["label"], label["id"]) for label in repaired] == [("NO_CLASIFICADO", 0)]
+    assert repairs == ["name_mismatch"]
+
+    repaired, repairs = repair_labels(labels[2:], DEFINICIONES_DE_CATEGORIAS)
+    assert [(label["label"], label["id"]) for label in repaired] == [(WATER, 2)]
+    assert repairs == ["id_mismatch"]
@@ -0,0 +1,46 @@
+"""Test the local lexical pre-classifier."""
+
+import pytest
+
+from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.services.lexical_classifier import LexicalClassifier
+
+
+@pytest.fixture(scope="module")
+def lexical_classifier():
+    """Lexical classifier built from the real category definitions."""
+    return LexicalClassifier(DEFINICIONES_DE_CATEGORIAS)
+
+
+@pytest.mark.parametrize(
+    "title, expected_ids",
+    [
+        ("Mejoramiento del servicio de agua potable en el distrito de San Juan", [2]),
+        ("Creación del servicio de educación inicial en el caserío Pampas", [6]),
+        ("Mejoramiento de pistas y veredas en la localidad de Huancayo", [5]),
+        ("Ampliación del servicio de educación primaria y secundaria", [7, 8]),
+    ],
+)
+def test_formulaic_titles_are_confident(lexical_classifier, title, expected_ids):
+    """Titles naming a category outright are classified with high confidence."""
+    prediction = lexical_classifier.predict(title)
+
+    assert prediction is not None
+    assert prediction.confidence >= 0.85
+    assert sorted(label["id"] for label in prediction.labels) == expected_ids
+
+
+@pytest.mark.parametrize(
+    "title",
+    [
+        "Mejoramiento del servicio de educación",
+        "Instalación del sistema de agua para riego",
+        "Mejoramiento del servicio de salud",
+        "Construcción de planta de tratamiento de aguas residuales",
+    ],
+)
+def test_ambiguous_titles_are_not_confident(lexical_classifier, title):
+    """Shared, unknown or definition-only words leave the decision to the model."""
+    prediction = lexical_classifier.predict(title)
+
+    assert prediction is None or prediction.confidence < 0.85
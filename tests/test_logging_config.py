@@ -0,0 +1,41 @@
+"""Test structured logging and sampling."""
+
+import json
+import logging
+
+from app.core.config import settings
+from app.core.logging_config import JsonFormatter, RequestContextFilter, request_context
+
+
+def _record(level=logging.INFO, **extra):
+    record = logging.makeLogRecord(
+        {"name": "app.test", "levelno": level, "levelname": logging.getLevelName(level)}
+    )
+    record.msg, record.args = "Classified %d titles", (3,)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_records_carry_request_id_and_extra_fields():
+    """Records become one JSON object with the request id and `extra=` fields."""
+    record = _record(duration_ms=12.5)
+    with request_context("req-1"):
+        assert RequestContextFilter().filter(record)
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "Classified 3 titles"
+    assert payload["severity"] == "INFO"
+    assert payload["request_id"] == "req-1"
+    assert payload["duration_ms"] == 12.5
+
+
+def test_unsampled_requests_keep_only_warnings(monkeypatch):
+    """INFO records of unsampled requests are dropped; warnings never are."""
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+    record_filter = RequestContextFilter()
+    with request_context():
+        assert not record_filter.filter(_record(logging.INFO))
+        assert record_filter.filter(_record(logging.WARNING))
+
+    # Records logged outside a request are always kept
+    assert record_filter.filter(_record(logging.INFO))
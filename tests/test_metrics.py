@@ -0,0 +1,56 @@
+"""Test the in-process metrics and the /metrics endpoint."""
+
+import threading
+
+from fastapi import status
+
+from app.core.metrics import Counter, Histogram, Registry
+
+
+def test_counter_adds_up_every_thread():
+    """Per-thread shards are summed when rendering."""
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs.", ("kind",)))
+
+    def work():
+        for _ in range(1000):
+            counter.labels("a").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 'jobs_total{kind="a"} 4000' in registry.render()
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Bucket counts are cumulative and end with +Inf, _sum and _count."""
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_metrics_endpoint_reports_routes(client):
+    """Requests are counted per route template."""
+    client.get("/health")
+    client.get("/api/v1/jobs/unknown-job")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+    assert 'route="/api/v1/jobs/{job_id}",status="404"' in response.text
+    assert "classify_stage_duration_seconds" in response.text
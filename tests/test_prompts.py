@@ -0,0 +1,52 @@
+"""Test the precompiled prompt template."""
+
+from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.services.prompts import compile_prompt_template
+
+
+def test_prompts_share_a_byte_identical_prefix():
+    """Every prompt starts with the same static prefix, title last."""
+    template = compile_prompt_template(DEFINICIONES_DE_CATEGORIAS)
+
+    first = template.render("Mejoramiento del servicio de agua potable")
+    second = template.render("Creación del servicio de educación inicial")
+    batch = template.render_batch(["Pistas y veredas", "Parque zonal"])
+
+    for prompt in (first, second):
+        assert prompt.startswith(template.prefix)
+    assert batch.startswith(template.batch_prefix)
+    assert first.endswith('"""Mejoramiento del servicio de agua potable"""\n')
+    for category in DEFINICIONES_DE_CATEGORIAS:
+        assert category in template.prefix
+
+
+def test_fingerprint_is_stable():
+    """Recompiling the same categories yields the same fingerprint."""
+    first = compile_prompt_template(DEFINICIONES_DE_CATEGORIAS)
+    second = compile_prompt_template(dict(DEFINICIONES_DE_CATEGORIAS))
+    assert first.fingerprint == second.fingerprint
+    assert len(first.fingerprint) == 64
+
+
+def test_compact_prefix_only_changes_the_output_format():
+    """The compact prompt keeps the categories and rules but drops justifications."""
+    full = compile_prompt_template(DEFINICIONES_DE_CATEGORIAS)
+    compact = compile_prompt_template(DEFINICIONES_DE_CATEGORIAS, compact=True)
+
+    shared = full.prefix.split("FORMATO DE RESPUESTA")[0]
+    assert compact.prefix.startswith(shared)
+    assert '"justificacion"' in full.prefix
+    assert '"justificacion"' not in compact.prefix
+    assert compact.fingerprint != full.fingerprint
+
+
+def test_batch_prefix_only_asks_for_the_batch_format():
+    """Multi-title prompts keep the categories but not the single-title output format."""
+    for compact in (False, True):
+        template = compile_prompt_template(DEFINICIONES_DE_CATEGORIAS, compact=compact)
+        shared = template.prefix.split("FORMATO DE RESPUESTA")[0]
+
+        assert template.batch_prefix.startswith(shared)
+        output_format = template.batch_prefix[len(shared) :]
+        assert '"resultados"' in output_format
+        assert '{\n  "labels"' not in output_format
@@ -0,0 +1,191 @@
+"""Test rate limiting, backoff and circuit breaking of upstream calls."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgePolicy,
+    TokenBucket,
+    backoff_delay,
+    classify_failure,
+    deadline,
+)
+from tests.conftest import StubModel
+
+
+def test_classify_failure_by_status():
+    """Quota and server errors are retried; request and auth errors are not."""
+    quota = classify_failure(google_exceptions.ResourceExhausted("Please retry in 12.5s."))
+    assert quota.cause == "rate_limited"
+    assert quota.retryable
+    assert quota.retry_after == 12.5
+
+    assert classify_failure(google_exceptions.ServiceUnavailable("down")).retryable
+    assert classify_failure(asyncio.TimeoutError()).cause == "timeout"
+    assert not classify_failure(google_exceptions.PermissionDenied("no")).retryable
+    invalid = classify_failure(google_exceptions.InvalidArgument("bad"))
+    assert not invalid.retryable
+    assert not invalid.counts_against_upstream
+
+
+def test_backoff_delay_is_jittered_and_honours_hint():
+    """Delays stay under the exponential ceiling and never undercut the hint."""
+    delays = [backoff_delay(3, base=1.0, cap=30.0) for _ in range(100)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+    assert backoff_delay(1, base=1.0, cap=30.0, retry_after=10.0) >= 10.0
+    assert backoff_delay(1, base=1.0, cap=30.0, retry_after=100.0) == 30.0
+
+
+def test_token_bucket_makes_callers_wait_once_empty():
+    """Reservations beyond the capacity wait for the bucket to refill."""
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_circuit_breaker_opens_and_recovers(monkeypatch):
+    """The circuit opens on a high failure rate and closes after a good probe."""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=30)
+
+    for _ in range(2):
+        breaker.record_success()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    now[0] += 31
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_hedge_policy_respects_samples_and_budget():
+    """Hedging waits for enough samples and stops once its budget is spent."""
+    policy = HedgePolicy(percentile=0.9, max_rate=0.1, min_samples=10)
+    for latency in range(1, 10):
+        policy.record(latency / 10, hedged=False)
+    assert policy.delay() is None
+
+    policy.record(1.0, hedged=False)
+    assert policy.delay() == pytest.approx(1.0)
+    policy.record(1.0, hedged=True)
+    policy.record(1.0, hedged=True)
+    assert policy.delay() is None
+    assert HedgePolicy(percentile=0).delay() is None
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_not_retried(classifier_service, monkeypatch):
+    """An auth error fails after a single call."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 3)
+
+    class FailingModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            self.calls += 1
+            raise google_exceptions.PermissionDenied("API key not valid")
+
+    classifier_service.model = FailingModel()
+    result = await classifier_service.classify("Agua potable")
+
+    assert classifier_service.model.calls == 1
+    assert "API key not valid" in result["detalle_error"]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(classifier_service, monkeypatch):
+    """While the circuit is open no call reaches the model."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "GEMINI_RETRY_DELAY", 0)
+    classifier_service.pool.members[0].circuit_breaker = CircuitBreaker(
+        window=2, min_calls=2, cooldown=60
+    )
+
+    class DownModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            self.calls += 1
+            raise google_exceptions.ServiceUnavailable("overloaded")
+
+    classifier_service.model = DownModel()
+    await classifier_service.classify("Agua potable")
+    assert classifier_service.model.calls == 2
+
+    result = await classifier_service.classify("Pistas y veredas")
+    assert classifier_service.model.calls == 2
+    assert result["labels"] == []
+    assert "no está disponible temporalmente" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_retries(classifier_service, monkeypatch):
+    """Retries that could not finish before the deadline are not attempted."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 5)
+    monkeypatch.setattr(settings, "GEMINI_RETRY_DELAY", 1)
+
+    class DownModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            self.calls += 1
+            raise google_exceptions.ServiceUnavailable("overloaded")
+
+    classifier_service.model = DownModel()
+    started_at = time.perf_counter()
+    with deadline(0.2):
+        result = await classifier_service.classify("Agua potable")
+
+    assert time.perf_counter() - started_at < 0.5
+    assert classifier_service.model.calls < 5
+    assert result["labels"] == []
+    assert "tiempo límite" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_a_slow_call(classifier_service):
+    """A call still running at the deadline is cancelled."""
+    classifier_service.model = StubModel(delay=5)
+    started_at = time.perf_counter()
+    with deadline(0.1):
+        result = await classifier_service.classify("Agua potable")
+
+    assert time.perf_counter() - started_at < 1
+    assert classifier_service.model.in_flight == 0
+    assert "tiempo límite" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged(classifier_service, mock_classification_response):
+    """A call slower than usual gets a backup copy, and the faster one wins."""
+    classifier_service.hedge_policy = HedgePolicy(percentile=0.5, min_samples=2)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+    classifier_service.hedge_policy.record(0.01, hedged=False)
+
+    class FirstCallSlowModel(StubModel):
+        async def generate_content_async(self, prompt, **kwargs):
+            self.delay = 5 if self.calls == 0 else 0
+            return await super().generate_content_async(prompt, **kwargs)
+
+    classifier_service.model = FirstCallSlowModel(text=json.dumps(mock_classification_response))
+    started_at = time.perf_counter()
+    result = await classifier_service.classify("Agua potable")
+
+    assert time.perf_counter() - started_at < 1
+    assert classifier_service.model.calls == 2
+    assert classifier_service.model.in_flight == 0
+    assert result["labels"][0]["id"] == 2
@@ -0,0 +1,75 @@
+"""Test the near-duplicate title index."""
+
+import json
+
+from app.models.categories import DEFINICIONES_DE_CATEGORIAS
+from app.services.lexical_classifier import category_vocabulary
+from app.services.similarity_index import SimilarityIndex
+
+RESULT = {"labels": [{"label": "x", "id": 7, "confianza": 0.9, "justificacion": "y"}]}
+
+
+def _index(**kwargs):
+    return SimilarityIndex(vocabulary=category_vocabulary(DEFINICIONES_DE_CATEGORIAS), **kwargs)
+
+
+def test_titles_differing_by_location_match():
+    """Only the location changes, so the stored labels are reused."""
+    index = _index()
+    index.add("Mejoramiento del servicio de educación primaria en el distrito de San Juan", RESULT)
+
+    match = index.query(
+        "Mejoramiento del servicio de educacion primaria en el distrito de Santa Rosa", 0.9
+    )
+
+    assert match is not None
+    similarity, result = match
+    assert similarity > 0.99
+    assert result == RESULT
+
+
+def test_different_category_keywords_never_match():
+    """A single different category keyword prevents reuse."""
+    index = _index()
+    index.add("Mejoramiento del servicio de educación primaria en el distrito de San Juan", RESULT)
+
+    assert index.query("Mejoramiento del servicio de educación secundaria", 0.5) is None
+    assert index.query("Creación de pistas y veredas", 0.0) is None
+
+
+def test_memory_budget_evicts_oldest_entries():
+    """The index never grows beyond its memory budget."""
+    index = _index(dim=64, max_bytes=10 * (64 * 4 + len(json.dumps(RESULT))))
+
+    for i in range(25):
+        index.add(f"Proyecto de parque numero {i} alameda", RESULT)
+
+    assert len(index) <= 10
+    assert index.memory_bytes <= index.max_bytes
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """A saved index answers the same queries after loading."""
+    path = str(tmp_path / "index")
+    index = _index()
+    index.add("Creación de pistas y veredas en el distrito de Ate", RESULT)
+    index.save(path)
+
+    restored = _index()
+    restored.load(path)
+
+    assert len(restored) == 1
+    assert restored.query("Creación de pistas y veredas en el distrito de Lince", 0.9)[1] == RESULT
+
+
+def test_load_ignores_index_saved_under_another_scope(tmp_path):
+    """Labels produced with other models or categories are not reused after a restart."""
+    path = str(tmp_path / "index")
+    index = _index()
+    index.add("Creación de pistas y veredas en el distrito de Ate", RESULT)
+    index.save(path, scope="gemini-2.0-flash;abc")
+
+    restored = _index()
+    restored.load(path, scope="gemini-2.0-flash;def")
+
+    assert len(restored) == 0
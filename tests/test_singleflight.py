@@ -0,0 +1,71 @@
+"""Test coalescing of identical in-flight calls."""
+
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Callers with the same key get the result of a single call."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert flight.coalesced == 4
+    assert len(flight) == 0
+    assert await flight.do("k", work) == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_waiter():
+    """An exception in the shared call is raised to all callers."""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(flight.do("k", work) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_the_shared_call():
+    """The shared call is only cancelled when nobody waits for it anymore."""
+    flight = SingleFlight()
+    started = asyncio.Event()
+    finished = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.set()
+        return "ok"
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "ok"
+    assert finished.is_set()
+
+    lonely = asyncio.ensure_future(flight.do("j", work))
+    await asyncio.sleep(0.01)
+    lonely.cancel()
+    await asyncio.sleep(0.01)
+    assert len(flight) == 0
@@ -0,0 +1,109 @@
+"""Test streamed classification."""
+
+import json
+import time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from google.api_core import exceptions as google_exceptions
+
+from app.services.fake_model import FakeGenerativeModel
+from app.services.label_stream import LabelStreamParser
+from tests.conftest import StubModel
+
+LABELS = {
+    "labels": [
+        {"label": "x", "id": 2, "confianza": 0.9, "justificacion": 'Dice "agua" y más'},
+        {"label": "y", "id": 5, "confianza": 0.7, "justificacion": "Pistas"},
+    ]
+}
+
+
+def test_parser_emits_labels_before_their_justification():
+    """Labels are announced once complete; justifications arrive in pieces."""
+    answer = "```json\n" + json.dumps(LABELS, ensure_ascii=False) + "\n```"
+    parser = LabelStreamParser()
+
+    events = []
+    for start in range(0, len(answer), 5):
+        events.extend(parser.feed(answer[start : start + 5]))
+
+    labels = [data for event, data in events if event == "label"]
+    assert labels == [
+        {"index": 0, "label": "x", "id": 2, "confianza": 0.9},
+        {"index": 1, "label": "y", "id": 5, "confianza": 0.7},
+    ]
+    pieces = [data["text"] for event, data in events if event == "justificacion"]
+    assert len(pieces) > 2
+    assert "".join(pieces) == 'Dice "agua" y másPistas'
+    assert events[0][0] == "label"
+    assert not parser.broken
+
+
+@pytest.mark.asyncio
+async def test_first_label_arrives_before_the_answer_is_complete(classifier_service):
+    """The first label is sent while the model is still writing the rest."""
+    classifier_service.model = FakeGenerativeModel(latency_ms=500)
+
+    started_at = time.perf_counter()
+    events = []
+    async for event, data in classifier_service.classify_stream("Creación del parque zonal"):
+        events.append((event, data, time.perf_counter() - started_at))
+
+    first_label_at = next(at for event, _, at in events if event == "label")
+    event, result, done_at = events[-1]
+    assert event == "result"
+    assert first_label_at < done_at / 2
+    assert result["source"] == "model"
+    assert [data["id"] for event, data, _ in events if event == "label"] == [
+        label["id"] for label in result["labels"]
+    ]
+
+    # The result is cached like any other answer
+    again = [
+        event async for event in classifier_service.classify_stream("Creación del parque zonal")
+    ]
+    assert again[-1][1]["source"] in ("cache", "similarity")
+    assert classifier_service.model.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_falls_back_to_a_regular_call(classifier_service):
+    """When the stream fails, the title is classified again without streaming."""
+
+    class StreamFailingModel(StubModel):
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            if stream:
+                raise google_exceptions.ServiceUnavailable("Try again")
+            return await super().generate_content_async(prompt, **kwargs)
+
+    classifier_service.model = StreamFailingModel(text=json.dumps(LABELS))
+
+    events = [event async for event in classifier_service.classify_stream("Agua potable")]
+
+    assert events[-1][0] == "result"
+    assert [label["id"] for label in events[-1][1]["labels"]] == [2, 5]
+
+
+def test_stream_endpoint():
+    """The endpoint sends labels and the final result as Server-Sent Events."""
+    from app.main import app
+
+    with TestClient(app) as client:
+        service = app.state.classifier_service
+        service.model = FakeGenerativeModel(latency_ms=0)
+        service.lexical_classifier = None
+        service.similarity_index = None
+
+        response = client.post(
+            "/api/v1/classify/stream", json={"title": "Mejoramiento de pistas y veredas"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert events[0][0] == "event: label"
+    assert events[-1][0] == "event: result"
+    result = json.loads(events[-1][1].removeprefix("data: "))
+    assert result["labels"] and result["source"] == "model"
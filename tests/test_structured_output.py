@@ -0,0 +1,58 @@
+"""Test schema-constrained model output and its parsing."""
+
+import json
+
+import pytest
+
+from app.models.schemas import ClassificationOutput
+from app.services.structured_output import gemini_schema
+from tests.conftest import StubModel
+
+WATER = "servicio de agua potable mediante red publica o pileta publica"
+LABEL = {"label": WATER, "id": 2, "confianza": 0.9, "justificacion": "y"}
+
+
+def test_gemini_schema_keeps_only_supported_keywords():
+    """The schema is inlined and reduced to what Gemini accepts."""
+    schema = gemini_schema(ClassificationOutput)
+
+    item = schema["properties"]["labels"]["items"]
+    assert item["type"] == "object"
+    assert item["required"] == ["label", "id", "confianza", "justificacion"]
+    assert item["properties"]["id"] == {"type": "integer", "description": "Category ID"}
+    assert "title" not in item and "$ref" not in json.dumps(schema)
+
+
+@pytest.mark.asyncio
+async def test_model_is_asked_for_schema_constrained_json(classifier_service):
+    """Single-title calls carry the JSON mime type and the output schema."""
+    classifier_service.model = StubModel(text=json.dumps({"labels": [LABEL]}))
+
+    result = await classifier_service.classify("Agua potable")
+
+    config = classifier_service.model.generation_configs[0]
+    assert config["response_mime_type"] == "application/json"
+    assert "labels" in config["response_schema"]["properties"]
+    assert result["labels"] == [LABEL]
+
+
+@pytest.mark.asyncio
+async def test_free_form_answers_are_still_parsed(classifier_service):
+    """Markdown-fenced JSON falls back to the cleanup path."""
+    fenced = "```json\n" + json.dumps({"labels": [LABEL]}) + "\n```"
+    classifier_service.model = StubModel(text=fenced)
+
+    result = await classifier_service.classify("Agua potable")
+
+    assert result["labels"] == [LABEL]
+
+
+@pytest.mark.asyncio
+async def test_answers_off_schema_are_reported(classifier_service):
+    """Valid JSON that does not match the schema is an error, not a result."""
+    classifier_service.model = StubModel(text=json.dumps({"labels": [{"label": "x"}]}))
+
+    result = await classifier_service.classify("Agua potable")
+
+    assert result["labels"] == []
+    assert result["error"] == "La respuesta del modelo no tiene el formato esperado"
@@ -0,0 +1,91 @@
+"""Test request timing breakdowns and the sampling profiler."""
+
+import logging
+import time
+
+from app.core.profiling import SamplingProfiler
+from app.core.timing import RequestTimings
+
+
+def test_server_timing_header_sums_repeated_stages():
+    """Stages run several times are summed, and the total comes last."""
+    timings = RequestTimings()
+    timings.add("prompt", 0.0004)
+    timings.add("upstream", 0.5)
+    timings.add("upstream", 0.25)
+
+    assert timings.header(0.8) == (
+        'prompt;dur=0.4, upstream;dur=750.0;desc="2 runs", total;dur=800.0'
+    )
+
+
+def test_responses_carry_timing_and_request_id(client, sample_project_title):
+    """Classification responses report their stages and echo the request id."""
+    response = client.post(
+        "/api/v1/classify",
+        json={"title": sample_project_title},
+        headers={"X-Request-ID": "trace-42"},
+    )
+
+    assert response.headers["X-Request-ID"] == "trace-42"
+    server_timing = response.headers["Server-Timing"]
+    assert "lexical;dur=" in server_timing
+    assert "total;dur=" in server_timing
+
+
+def test_slow_requests_are_logged(client, caplog, monkeypatch):
+    """Requests above SLOW_REQUEST_THRESHOLD_MS are logged with their breakdown."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 0.001)
+    with caplog.at_level(logging.WARNING, logger="app.core.timing"):
+        client.get("/health")
+
+    assert any("Slow request GET /health" in record.getMessage() for record in caplog.records)
+
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampling_profiler_records_the_running_stack():
+    """The profile attributes samples to the function that was running."""
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy_wait(0.1)
+    profile = profiler.stop()
+
+    folded = profile.folded()
+    assert folded.startswith("#")
+    assert "_busy_wait (tests/test_timing.py" in folded
+
+
+def test_profile_ids_are_generated_by_the_server(monkeypatch):
+    """The profile URL never contains the client's request id."""
+    import re
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.core.logging_config import RequestContextMiddleware
+    from app.core.profiling import ProfileStore, ProfilingMiddleware
+
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=ProfileStore())
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        response = client.get(
+            "/ping",
+            headers={"X-Profile": "1", "X-Profile-Token": "secret", "X-Request-ID": "../../x?y"},
+        )
+
+    assert re.fullmatch(r"/debug/profiles/[0-9a-f]{32}", response.headers["x-profile-url"])